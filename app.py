@@ -5,21 +5,29 @@ from extensions import db, socketio, migrate
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
-    app.config.update(
-        SQLALCHEMY_ENGINE_OPTIONS={
-            'pool_recycle': 300,
-            'pool_pre_ping': True
-        }
-    )
+    # 安装了 orjson 时用它编码 JSON 响应
+    from utils.serialization import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    # 按 DB_PROFILE 配置数据库连接
+    from utils import db_profiles
+    db_profiles.configure_database(app)
 
     # 初始化扩展
     db.init_app(app)
+    db_profiles.init_app(app, db)
+    # 协程模式需要入口脚本先执行 utils.async_mode.monkey_patch
+    from utils import async_mode
+    async_mode.check_environment(app, app.config['SOCKETIO_ASYNC_MODE'])
+    # 配置 SOCKETIO_MESSAGE_QUEUE 后，任一工作进程的推送都会送达所有进程中的房间
+    from utils.socketio_queue import message_queue_options
     socketio.init_app(
         app, 
         cors_allowed_origins="*",
         logger=True,
         engineio_logger=True,
-        async_mode='threading'
+        async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+        **message_queue_options(app)
     )
     migrate.init_app(app, db)
 
@@ -37,6 +45,7 @@ def create_app():
         from blueprints.notes import notes_bp
         from blueprints.web_notes import web_notes_bp
         from blueprints.developer import developer_bp
+        from blueprints.metrics import metrics_bp
 
         app.register_blueprint(auth_bp)
         app.register_blueprint(main_bp)
@@ -50,11 +59,45 @@ def create_app():
         app.register_blueprint(notes_bp)
         app.register_blueprint(web_notes_bp)
         app.register_blueprint(developer_bp)
+        app.register_blueprint(metrics_bp)
+
+    # 初始化缓存失效广播
+    from utils.cache_bus import cache_bus
+    cache_bus.init_app(app)
+
+    # 初始化白板凭证和用户token缓存
+    from utils.auth_cache import board_credential_cache, user_token_cache
+    board_credential_cache.init_app(app)
+    user_token_cache.init_app(app)
+
+    # 初始化白板读取接口的响应缓存
+    from utils.response_cache import response_cache
+    response_cache.init_app(app)
+
+    # 初始化班级权限缓存
+    from utils.permissions import class_permissions
+    class_permissions.init_app(app)
+
+    # 初始化白板在线状态登记表
+    from utils.presence import presence_registry
+    presence_registry.init_app(app)
+
+    # 初始化白板状态推送合并器
+    from utils.status_broadcaster import status_broadcaster
+    status_broadcaster.init_app(app)
+
+    # 初始化 Socket.IO 发件箱的投递线程
+    from utils.socket_outbox import socket_outbox
+    socket_outbox.init_app(app)
 
     # 初始化定时任务
     from utils.scheduler import scheduler_manager
     scheduler_manager.init_app(app)
 
+    # 请求 SQL 语句数检查和统计
+    from utils.query_guard import query_guard
+    query_guard.init_app(app)
+
     # 注册错误处理器
     from utils.error_handlers import register_error_handlers
     register_error_handlers(app)
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify, session
-from extensions import db, socketio
+from extensions import db
 from models.user import User
 from models.whiteboard import Whiteboard
 from models.announcement import Announcement
 from utils.auth_utils import login_required, teacher_required
+from utils.pagination import keyset_paginate, CursorError
+from utils.socket_outbox import socket_outbox
 from utils.time_utils import format_china_time
 
 announcements_bp = Blueprint('announcements', __name__)
@@ -36,16 +38,17 @@ def create_announcement(whiteboard_id):
     
     try:
         db.session.add(announcement)
-        db.session.commit()
+        db.session.flush()
         
-        socketio.emit('new_announcement', {
+        socket_outbox.enqueue('new_announcement', {
             'id': announcement.id,
             'title': announcement.title,
             'content': announcement.content,
             'is_long_term': announcement.is_long_term,
             'created_at': format_china_time(announcement.created_at),
             'teacher_name': announcement.teacher.username
-        }, room=f"whiteboard_{whiteboard_id}")
+        }, f"whiteboard_{whiteboard_id}")
+        db.session.commit()
         
         return jsonify({'success': True, 'announcement_id': announcement.id})
     except Exception as e:
@@ -65,8 +68,8 @@ def delete_announcement(announcement_id):
     try:
         whiteboard_id = announcement.whiteboard_id
         db.session.delete(announcement)
+        socket_outbox.enqueue('delete_announcement', {'announcement_id': announcement_id}, f"whiteboard_{whiteboard_id}")
         db.session.commit()
-        socketio.emit('delete_announcement', {'announcement_id': announcement_id}, room=f"whiteboard_{whiteboard_id}")
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -82,7 +85,7 @@ def get_whiteboard_announcements_list(whiteboard_id):
         return jsonify({'error': '无权限'}), 403
     
     try:
-        announcements = Announcement.query.filter_by(whiteboard_id=whiteboard_id).order_by(Announcement.created_at.desc()).all()
+        announcements, next_cursor = keyset_paginate(Announcement.query.filter_by(whiteboard_id=whiteboard_id), Announcement)
         
         announcements_data = []
         for announcement in announcements:
@@ -94,6 +97,8 @@ def get_whiteboard_announcements_list(whiteboard_id):
                 'created_at': format_china_time(announcement.created_at)
             })
         
-        return jsonify({'success': True, 'announcements': announcements_data})
+        return jsonify({'success': True, 'announcements': announcements_data, 'next_cursor': next_cursor})
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': '获取公告列表失败'}), 500
\ No newline at end of file
@@ -1,19 +1,37 @@
 from flask import Blueprint, request, jsonify
+from collections import Counter
 from datetime import timedelta
-from extensions import db, socketio
-from models.user import User
-from models.whiteboard import Whiteboard, WhiteboardStatusHistory
+from extensions import db
+from models.whiteboard import Whiteboard
 from models.developer import DeveloperApp
 from models.task import Task
 from models.assignment import Assignment
 from models.announcement import Announcement
+from utils.access_control import get_accessible_whiteboards
 from utils.auth_utils import whiteboard_auth_required, user_token_auth_required
+from utils.auth_cache import user_token_cache
+from utils.board_payloads import (
+    task_payload, announcement_payload, assignment_payload,
+    TASK_COLUMNS, ANNOUNCEMENT_COLUMNS, ASSIGNMENT_COLUMNS
+)
+from utils.change_log import get_floor, get_latest_cursor, get_changes_since, build_snapshot
+from utils.content_version import conditional_board_read
+from utils.db_routing import use_reader
+from utils.pagination import keyset_paginate, get_page_args, CursorError
+from utils.presence import presence_registry
+from utils.response_cache import cached_board_response
+from utils.socket_outbox import socket_outbox
+from utils.status_broadcaster import status_broadcaster
 from utils.time_utils import parse_china_time, format_china_time, get_china_time
+from utils.timeline import fetch_timeline, KIND_NAMES, KIND_TASK, KIND_ANNOUNCEMENT, KIND_ASSIGNMENT
 
 api_bp = Blueprint('api', __name__, url_prefix='/api/whiteboard')
 
 @api_bp.route('/assignments', methods=['GET'])
 @whiteboard_auth_required
+@use_reader
+@conditional_board_read
+@cached_board_response
 def get_whiteboard_assignments():
     date_str = request.args.get('date')
     subject = request.args.get('subject')
@@ -35,27 +53,25 @@ def get_whiteboard_assignments():
     if subject:
         query = query.filter(Assignment.subject == subject)
     
-    assignments = query.order_by(Assignment.created_at.desc()).all()
-    
-    assignments_data = []
-    for assignment in assignments:
-        assignments_data.append({
-            'id': assignment.id,
-            'title': assignment.title,
-            'description': assignment.description,
-            'subject': assignment.subject,
-            'due_date': format_china_time(assignment.due_date),
-            'created_at': format_china_time(assignment.created_at)
-        })
+    try:
+        assignments, next_cursor = keyset_paginate(query.with_entities(*ASSIGNMENT_COLUMNS), Assignment)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    assignments_data = [assignment_payload(assignment) for assignment in assignments]
     
     return jsonify({
         'success': True,
         'data': assignments_data,
-        'count': len(assignments_data)
+        'count': len(assignments_data),
+        'next_cursor': next_cursor
     })
 
 @api_bp.route('/tasks', methods=['GET'])
 @whiteboard_auth_required
+@use_reader
+@conditional_board_read
+@cached_board_response
 def get_whiteboard_tasks():
     date_str = request.args.get('date')
     priority = request.args.get('priority')
@@ -83,30 +99,25 @@ def get_whiteboard_tasks():
     elif status == 'completed':
         query = query.filter(Task.is_completed == True)
     
-    tasks = query.order_by(Task.created_at.desc()).all()
+    try:
+        tasks, next_cursor = keyset_paginate(query.with_entities(*TASK_COLUMNS), Task)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     
-    tasks_data = []
-    for task in tasks:
-        tasks_data.append({
-            'id': task.id,
-            'title': task.title,
-            'description': task.description,
-            'priority': task.priority,
-            'action_id': task.action_id,
-            'due_date': format_china_time(task.due_date) if task.due_date else None,
-            'is_acknowledged': task.is_acknowledged,
-            'is_completed': task.is_completed,
-            'created_at': format_china_time(task.created_at)
-        })
+    tasks_data = [task_payload(task) for task in tasks]
     
     return jsonify({
         'success': True,
         'data': tasks_data,
-        'count': len(tasks_data)
+        'count': len(tasks_data),
+        'next_cursor': next_cursor
     })
 
 @api_bp.route('/announcements', methods=['GET'])
 @whiteboard_auth_required
+@use_reader
+@conditional_board_read
+@cached_board_response
 def get_whiteboard_announcements():
     date_str = request.args.get('date')
     long_term = request.args.get('long_term')
@@ -131,107 +142,95 @@ def get_whiteboard_announcements():
         elif long_term.lower() == 'false':
             query = query.filter(Announcement.is_long_term == False)
     
-    announcements = query.order_by(Announcement.created_at.desc()).all()
+    try:
+        announcements, next_cursor = keyset_paginate(query.with_entities(*ANNOUNCEMENT_COLUMNS), Announcement)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     
-    announcements_data = []
-    for announcement in announcements:
-        announcements_data.append({
-            'id': announcement.id,
-            'title': announcement.title,
-            'content': announcement.content,
-            'is_long_term': announcement.is_long_term,
-            'created_at': format_china_time(announcement.created_at)
-        })
+    announcements_data = [announcement_payload(announcement) for announcement in announcements]
     
     return jsonify({
         'success': True,
         'data': announcements_data,
-        'count': len(announcements_data)
+        'count': len(announcements_data),
+        'next_cursor': next_cursor
     })
 
 @api_bp.route('/all', methods=['GET'])
 @whiteboard_auth_required
+@use_reader
+@conditional_board_read
+@cached_board_response
 def get_whiteboard_all():
     date_str = request.args.get('date')
-    
-    tasks_query = Task.query.filter_by(whiteboard_id=request.whiteboard.id)
-    announcements_query = Announcement.query.filter_by(whiteboard_id=request.whiteboard.id)
-    assignments_query = Assignment.query.filter_by(whiteboard_id=request.whiteboard.id)
+    target_date = next_date = None
     
     if date_str:
         try:
             target_date = parse_china_time(date_str + ' 00:00:00')
             next_date = target_date + timedelta(days=1)
-            
-            tasks_query = tasks_query.filter(
-                Task.created_at >= target_date,
-                Task.created_at < next_date
-            )
-            
-            announcements_query = announcements_query.filter(
-                Announcement.created_at >= target_date,
-                Announcement.created_at < next_date
-            )
-            
-            assignments_query = assignments_query.filter(
-                Assignment.due_date >= target_date,
-                Assignment.due_date < next_date
-            )
         except ValueError:
             return jsonify({'error': '日期格式无效，请使用YYYY-MM-DD格式'}), 400
     
-    tasks = tasks_query.order_by(Task.created_at.desc()).all()
-    announcements = announcements_query.order_by(Announcement.created_at.desc()).all()
-    assignments = assignments_query.order_by(Assignment.created_at.desc()).all()
-    
-    tasks_data = []
-    for task in tasks:
-        tasks_data.append({
-            'type': 'task',
-            'id': task.id,
-            'title': task.title,
-            'description': task.description,
-            'priority': task.priority,
-            'action_id': task.action_id,
-            'due_date': format_china_time(task.due_date) if task.due_date else None,
-            'is_acknowledged': task.is_acknowledged,
-            'is_completed': task.is_completed,
-            'created_at': format_china_time(task.created_at)
-        })
-    
-    announcements_data = []
-    for announcement in announcements:
-        announcements_data.append({
-            'type': 'announcement',
-            'id': announcement.id,
-            'title': announcement.title,
-            'content': announcement.content,
-            'is_long_term': announcement.is_long_term,
-            'created_at': format_china_time(announcement.created_at)
-        })
-    
-    assignments_data = []
-    for assignment in assignments:
-        assignments_data.append({
-            'type': 'assignment',
-            'id': assignment.id,
-            'title': assignment.title,
-            'description': assignment.description,
-            'subject': assignment.subject,
-            'due_date': format_china_time(assignment.due_date),
-            'created_at': format_china_time(assignment.created_at)
-        })
+    try:
+        limit, after = get_page_args()
+        # 作业按截止日期筛选，任务和公告按创建时间筛选；三类数据由数据库合并排序
+        rows, next_cursor = fetch_timeline(
+            request.whiteboard.id, target_date, next_date,
+            assignments_by_due_date=True, limit=limit, after=after
+        )
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     
-    all_data = tasks_data + announcements_data + assignments_data
-    all_data.sort(key=lambda x: x['created_at'], reverse=True)
+    serializers = {
+        KIND_TASK: task_payload,
+        KIND_ANNOUNCEMENT: announcement_payload,
+        KIND_ASSIGNMENT: assignment_payload,
+    }
+    all_data = [{'type': KIND_NAMES[row.kind], **serializers[row.kind](row)} for row in rows]
+    counts = Counter(row.kind for row in rows)
     
     return jsonify({
         'success': True,
         'data': all_data,
         'count': len(all_data),
-        'tasks_count': len(tasks_data),
-        'announcements_count': len(announcements_data),
-        'assignments_count': len(assignments_data)
+        'tasks_count': counts[KIND_TASK],
+        'announcements_count': counts[KIND_ANNOUNCEMENT],
+        'assignments_count': counts[KIND_ASSIGNMENT],
+        'next_cursor': next_cursor
+    })
+
+@api_bp.route('/changes', methods=['GET'])
+@whiteboard_auth_required
+@use_reader
+@conditional_board_read
+def get_whiteboard_changes():
+    """增量同步：返回游标之后的变更（含删除记录），游标过旧或未提供时返回全量快照"""
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', 200, type=int)
+    if limit <= 0:
+        return jsonify({'error': 'limit 参数无效'}), 400
+    limit = min(limit, 1000)
+    
+    floor = get_floor()
+    if since is None or since < floor:
+        # 先取游标再读快照，快照期间发生的变更会在下次同步时重复下发
+        cursor = max(get_latest_cursor(), floor)
+        return jsonify({
+            'success': True,
+            'mode': 'snapshot',
+            'cursor': cursor,
+            'data': build_snapshot(request.whiteboard.id)
+        })
+    
+    changes, has_more = get_changes_since(request.whiteboard.id, since, limit)
+    return jsonify({
+        'success': True,
+        'mode': 'delta',
+        'cursor': changes[-1]['cursor'] if changes else since,
+        'has_more': has_more,
+        'changes': changes,
+        'count': len(changes)
     })
 
 @api_bp.route('/tasks/<int:task_id>/acknowledge', methods=['POST'])
@@ -247,14 +246,14 @@ def acknowledge_task(task_id):
     
     try:
         task.is_acknowledged = True
-        db.session.commit()
         
-        socketio.emit('task_updated', {
+        socket_outbox.enqueue('task_updated', {
             'id': task.id,
             'title': task.title,
             'is_acknowledged': task.is_acknowledged,
             'is_completed': task.is_completed
-        }, room=f"teacher_{task.whiteboard.class_obj.teacher_id}")
+        }, f"teacher_{request.whiteboard.teacher_id}")
+        db.session.commit()
         
         return jsonify({'success': True})
     except Exception as e:
@@ -275,14 +274,14 @@ def complete_task(task_id):
     try:
         task.is_acknowledged = True
         task.is_completed = True
-        db.session.commit()
         
-        socketio.emit('task_updated', {
+        socket_outbox.enqueue('task_updated', {
             'id': task.id,
             'title': task.title,
             'is_acknowledged': task.is_acknowledged,
             'is_completed': task.is_completed
-        }, room=f"teacher_{task.whiteboard.class_obj.teacher_id}")
+        }, f"teacher_{request.whiteboard.teacher_id}")
+        db.session.commit()
         
         return jsonify({'success': True})
     except Exception as e:
@@ -293,25 +292,24 @@ def complete_task(task_id):
 @whiteboard_auth_required
 def whiteboard_heartbeat():
     try:
-        current_time = get_china_time().replace(tzinfo=None)
+        current_time = get_china_time()
         
         whiteboard = request.whiteboard
-        whiteboard.last_heartbeat = current_time
-        whiteboard.is_online = True
-        
-        status_history = WhiteboardStatusHistory(
-            whiteboard_id=whiteboard.id,
-            is_online=True
-        )
-        db.session.add(status_history)
+        # 心跳只记录在内存中，只有从离线切换为在线时才写数据库并立即推送
+        changed = False
+        if not presence_registry.touch(whiteboard.id, current_time):
+            changed = presence_registry.mark_online(whiteboard.id, current_time)
         
-        db.session.commit()
-        
-        socketio.emit('whiteboard_status_update', {
+        update = {
             'whiteboard_id': whiteboard.id,
             'is_online': True,
             'last_heartbeat': format_china_time(current_time)
-        }, room=f"teacher_{whiteboard.class_obj.teacher_id}")
+        }
+        room = f"teacher_{whiteboard.teacher_id}"
+        if changed:
+            status_broadcaster.publish_change(room, update)
+        else:
+            status_broadcaster.publish_refresh(room, update)
         
         return jsonify({'success': True, 'message': '心跳接收成功'})
     except Exception as e:
@@ -380,7 +378,7 @@ def reset_whiteboard_secret():
         from utils.code_utils import generate_whiteboard_credentials
         _, new_secret_key = generate_whiteboard_credentials()
         
-        # 更新白板密钥
+        # 更新白板密钥（提交前后自动清除该白板的凭证缓存）
         whiteboard.secret_key = new_secret_key
         db.session.commit()
         
@@ -403,7 +401,7 @@ def get_user_whiteboards():
     user = request.user
     
     try:
-        accessible_whiteboards = user.get_accessible_whiteboards()
+        accessible_whiteboards = get_accessible_whiteboards(user.id)
         
         whiteboards_data = []
         for whiteboard in accessible_whiteboards:
@@ -455,12 +453,12 @@ def framework_auth_with_token():
         return jsonify({'error': '应用认证失败'}), 401
     
     # 验证用户token
-    user = User.query.filter_by(user_token=user_token, role='teacher', is_active=True).first()
+    user = user_token_cache.resolve(user_token)
     if not user:
         return jsonify({'error': '用户token无效'}), 401
     
     # 获取用户所有可访问的白板
-    accessible_whiteboards = user.get_accessible_whiteboards()
+    accessible_whiteboards = get_accessible_whiteboards(user.id)
     
     whiteboards_data = []
     for whiteboard in accessible_whiteboards:
@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify, session
-from extensions import db, socketio
-from models.user import User
+from sqlalchemy.orm import joinedload
+from extensions import db
 from models.whiteboard import Whiteboard
 from models.assignment import Assignment
-from models.class_models import TeacherClass, ClassSubject
-from utils.auth_utils import login_required, teacher_required
+from utils.auth_utils import login_required, teacher_required, get_current_user
+from utils.pagination import keyset_paginate, CursorError
+from utils.permissions import class_permissions
+from utils.socket_outbox import socket_outbox
 from utils.time_utils import parse_china_time, format_china_time, get_china_time
 from datetime import timedelta
 
@@ -15,28 +17,11 @@ assignments_bp = Blueprint('assignments', __name__)
 @teacher_required
 def create_assignment(whiteboard_id):
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     # 检查权限：班主任或授课老师
-    is_class_teacher = (whiteboard.class_obj.teacher_id == user.id)
-    is_teaching_teacher = False
-    assigned_subjects = []
-    
-    if is_class_teacher:
-        class_subjects = ClassSubject.query.filter_by(class_id=whiteboard.class_id).all()
-        assigned_subjects = [subject.subject_name for subject in class_subjects]
-    else:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=whiteboard.class_id, 
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        
-        if teacher_class and teacher_class.assigned_subjects:
-            is_teaching_teacher = True
-            assigned_subjects = teacher_class.get_assigned_subjects_list()
-    
-    if not is_class_teacher and not is_teaching_teacher:
+    permission = class_permissions.resolve(user.id, whiteboard.class_id)
+    if not permission.can_teach:
         return jsonify({'error': '无权限发布作业'}), 403
     
     data = request.get_json()
@@ -50,7 +35,7 @@ def create_assignment(whiteboard_id):
         return jsonify({'error': '所有字段都必须填写'}), 400
     
     # 检查学科权限
-    if subject not in assigned_subjects:
+    if subject not in permission.subjects:
         return jsonify({'error': f'您没有权限发布{subject}学科的作业'}), 403
     
     try:
@@ -72,16 +57,15 @@ def create_assignment(whiteboard_id):
         
         if existing_assignment:
             # 检查更新权限：班主任或作业发布者
-            if existing_assignment.teacher_id != user.id and not is_class_teacher:
+            if existing_assignment.teacher_id != user.id and not permission.is_class_teacher:
                 return jsonify({'error': '无权限更新此作业'}), 403
                 
             existing_assignment.title = title
             existing_assignment.description = description
             existing_assignment.due_date = due_date
             existing_assignment.updated_at = get_china_time().replace(tzinfo=None)
-            db.session.commit()
             
-            socketio.emit('update_assignment', {
+            socket_outbox.enqueue('update_assignment', {
                 'id': existing_assignment.id,
                 'title': existing_assignment.title,
                 'description': existing_assignment.description,
@@ -89,7 +73,8 @@ def create_assignment(whiteboard_id):
                 'due_date': format_china_time(existing_assignment.due_date),
                 'updated_at': format_china_time(existing_assignment.updated_at),
                 'teacher_name': existing_assignment.teacher.username
-            }, room=f"whiteboard_{whiteboard_id}")
+            }, f"whiteboard_{whiteboard_id}")
+            db.session.commit()
             
             return jsonify({'success': True, 'assignment_id': existing_assignment.id, 'is_update': True})
         else:
@@ -102,9 +87,9 @@ def create_assignment(whiteboard_id):
                 teacher_id=user.id
             )
             db.session.add(assignment)
-            db.session.commit()
+            db.session.flush()
             
-            socketio.emit('new_assignment', {
+            socket_outbox.enqueue('new_assignment', {
                 'id': assignment.id,
                 'title': assignment.title,
                 'description': assignment.description,
@@ -112,7 +97,8 @@ def create_assignment(whiteboard_id):
                 'due_date': format_china_time(assignment.due_date),
                 'created_at': format_china_time(assignment.created_at),
                 'teacher_name': assignment.teacher.username
-            }, room=f"whiteboard_{whiteboard_id}")
+            }, f"whiteboard_{whiteboard_id}")
+            db.session.commit()
             
             return jsonify({'success': True, 'assignment_id': assignment.id})
     except Exception as e:
@@ -124,24 +110,11 @@ def create_assignment(whiteboard_id):
 @teacher_required
 def check_assignment(whiteboard_id):
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     # 检查权限：班主任或授课老师
-    is_class_teacher = (whiteboard.class_obj.teacher_id == user.id)
-    is_teaching_teacher = False
-    assigned_subjects = []
-    
-    if not is_class_teacher:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=whiteboard.class_id, 
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class and teacher_class.assigned_subjects:
-            is_teaching_teacher = True
-            assigned_subjects = teacher_class.get_assigned_subjects_list()
-    
-    if not is_class_teacher and not is_teaching_teacher:
+    permission = class_permissions.resolve(user.id, whiteboard.class_id)
+    if not permission.can_teach:
         return jsonify({'error': '无权限'}), 403
     
     subject = request.args.get('subject')
@@ -150,7 +123,7 @@ def check_assignment(whiteboard_id):
         return jsonify({'error': '缺少科目参数'}), 400
     
     # 如果是授课老师，检查是否有该学科的权限
-    if is_teaching_teacher and subject not in assigned_subjects:
+    if permission.is_teaching_teacher and subject not in permission.subjects:
         return jsonify({'error': f'您没有权限查看{subject}学科的作业'}), 403
     
     assignment = Assignment.query.filter_by(
@@ -175,17 +148,17 @@ def check_assignment(whiteboard_id):
 @teacher_required
 def delete_assignment(assignment_id):
     assignment = Assignment.query.get_or_404(assignment_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     # 检查权限：班主任或作业发布者
-    if user.role != 'teacher' or (assignment.whiteboard.class_obj.teacher_id != user.id and assignment.teacher_id != user.id):
+    if assignment.teacher_id != user.id and not class_permissions.resolve(user.id, assignment.whiteboard.class_id).is_class_teacher:
         return jsonify({'error': '无权限'}), 403
     
     try:
         whiteboard_id = assignment.whiteboard_id
         db.session.delete(assignment)
+        socket_outbox.enqueue('delete_assignment', {'assignment_id': assignment_id}, f"whiteboard_{whiteboard_id}")
         db.session.commit()
-        socketio.emit('delete_assignment', {'assignment_id': assignment_id}, room=f"whiteboard_{whiteboard_id}")
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -195,30 +168,22 @@ def delete_assignment(assignment_id):
 @login_required
 def get_whiteboard_assignments_list(whiteboard_id):
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user_id = session['user_id']
     
     # 检查权限：班主任或授课老师
-    is_class_teacher = (whiteboard.class_obj.teacher_id == user.id)
-    is_teaching_teacher = False
-    if not is_class_teacher:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=whiteboard.class_id, 
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class and teacher_class.assigned_subjects:
-            is_teaching_teacher = True
-    
-    if not is_class_teacher and not is_teaching_teacher:
+    permission = class_permissions.resolve(user_id, whiteboard.class_id)
+    if not permission.can_teach:
         return jsonify({'error': '无权限'}), 403
     
     try:
-        assignments = Assignment.query.filter_by(whiteboard_id=whiteboard_id).order_by(Assignment.created_at.desc()).all()
+        assignments, next_cursor = keyset_paginate(
+            Assignment.query.options(joinedload(Assignment.teacher)).filter_by(whiteboard_id=whiteboard_id), Assignment
+        )
         
         assignments_data = []
         for assignment in assignments:
             # 计算删除权限：班主任或作业发布者
-            can_delete = is_class_teacher or assignment.teacher_id == user.id
+            can_delete = permission.is_class_teacher or assignment.teacher_id == user_id
             
             assignments_data.append({
                 'id': assignment.id,
@@ -232,6 +197,8 @@ def get_whiteboard_assignments_list(whiteboard_id):
                 'can_delete': can_delete  # 添加删除权限字段
             })
         
-        return jsonify({'success': True, 'assignments': assignments_data})
+        return jsonify({'success': True, 'assignments': assignments_data, 'next_cursor': next_cursor})
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': '获取作业列表失败'}), 500
\ No newline at end of file
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, redirect, url_for, session, reques
 from extensions import db, socketio
 from models.user import User
 from models.class_models import Class, StudentClass, TeacherClass, ClassSubject
+from utils.access_control import rebuild_class_access
 from utils.auth_utils import login_required, teacher_required
 from utils.code_utils import generate_class_code
 
@@ -58,6 +59,8 @@ def create_class():
         
         try:
             db.session.add(new_class)
+            db.session.flush()
+            rebuild_class_access(new_class.id)
             db.session.commit()
             flash(f'班级 "{name}" 创建成功！班级代码: {code}', 'success')
             return redirect(url_for('classes.view_class', class_id=new_class.id))
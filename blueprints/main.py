@@ -1,8 +1,8 @@
 from flask import Blueprint, send_from_directory, render_template, redirect, url_for, abort, session
 from extensions import db, socketio
 from models.user import User
-from models.class_models import Class, TeacherClass
-from utils.auth_utils import login_required, teacher_required
+from utils.auth_utils import login_required, teacher_required, get_current_user
+from utils.permissions import class_permissions
 from utils.time_utils import format_china_time
 import os
 
@@ -32,27 +32,14 @@ def dashboard():
 @login_required
 def serve_uploaded_file(class_id, filename):
     """提供上传文件的访问，需要班级权限验证"""
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     # 检查用户是否有权限访问该班级的文件
     has_permission = False
     
     if user.role == 'teacher':
         # 教师：检查是否是班主任或授课教师
-        class_obj = Class.query.get(class_id)
-        if class_obj:
-            # 班主任
-            if class_obj.teacher_id == user.id:
-                has_permission = True
-            else:
-                # 授课教师
-                teacher_class = TeacherClass.query.filter_by(
-                    class_id=class_id, 
-                    teacher_id=user.id,
-                    is_approved=True
-                ).first()
-                if teacher_class:
-                    has_permission = True
+        has_permission = class_permissions.resolve(user.id, class_id).is_member
     
     # TODO: 未来添加学生权限检查
     # elif user.role == 'student':
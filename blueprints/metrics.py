@@ -0,0 +1,20 @@
+import hmac
+from flask import Blueprint, request, jsonify, current_app
+from utils.metrics import collect_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """运行指标（配置了 METRICS_TOKEN 时总是需要 X-Metrics-Token，未配置时只在调试模式下开放）"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('X-Metrics-Token', ''), token):
+            return jsonify({'error': '未授权'}), 401
+    elif not current_app.debug:
+        return jsonify({'error': '接口不存在'}), 404
+    
+    return jsonify({
+        'success': True,
+        'metrics': collect_metrics()
+    })
@@ -5,9 +5,10 @@ from werkzeug.utils import secure_filename
 from extensions import db
 from models.whiteboard import Whiteboard
 from models.class_models import Class, TeacherClass
-from models.note import Note
+from models.note import Note, format_file_size
 from models.user import User
 from utils.auth_utils import whiteboard_auth_required, login_required, teacher_required
+from utils.db_routing import use_reader
 from utils.time_utils import get_china_time, format_china_time
 
 notes_bp = Blueprint('notes', __name__, url_prefix='/api/whiteboard')
@@ -123,7 +124,7 @@ def upload_note():
             mime_type=mime_type,
             whiteboard_id=request.whiteboard.id,
             class_id=request.whiteboard.class_id,
-            uploaded_by=request.whiteboard.class_obj.teacher_id,  # 使用班级创建者的ID
+            uploaded_by=request.whiteboard.teacher_id,  # 使用班级创建者的ID
             title=request.form.get('title', ''),
             description=request.form.get('description', ''),
             tags=request.form.get('tags', '')
@@ -155,6 +156,7 @@ def upload_note():
 
 @notes_bp.route('/notes', methods=['GET'])
 @whiteboard_auth_required
+@use_reader
 def get_notes_list():
     """获取白板笔记列表"""
     try:
@@ -206,13 +208,13 @@ def get_notes_list():
             query = query.order_by(order_field.desc())
         
         # 分页
-        pagination = query.paginate(
+        pagination = Note.with_list_columns(query).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
         )
         
-        notes_data = [note.to_dict() for note in pagination.items]
+        notes_data = [Note.row_to_dict(row) for row in pagination.items]
         
         return jsonify({
             'success': True,
@@ -240,6 +242,7 @@ def get_notes_list():
 
 @notes_bp.route('/notes/<int:note_id>', methods=['GET'])
 @whiteboard_auth_required
+@use_reader
 def get_note_detail(note_id):
     """获取笔记详情"""
     try:
@@ -379,6 +382,7 @@ def download_note(note_id):
 
 @notes_bp.route('/notes/stats', methods=['GET'])
 @whiteboard_auth_required
+@use_reader
 def get_notes_stats():
     """获取笔记统计信息"""
     try:
@@ -399,7 +403,7 @@ def get_notes_stats():
         ).scalar() or 0
         
         # 最近上传的笔记
-        recent_notes = Note.query.filter_by(whiteboard_id=whiteboard_id).order_by(
+        recent_notes = Note.with_list_columns(Note.query.filter_by(whiteboard_id=whiteboard_id)).order_by(
             Note.created_at.desc()
         ).limit(5).all()
         
@@ -408,9 +412,9 @@ def get_notes_stats():
             'stats': {
                 'total_notes': total_notes,
                 'total_size': total_size,
-                'total_size_formatted': Note.format_file_size(Note(file_size=total_size)),
+                'total_size_formatted': format_file_size(total_size),
                 'file_types': {file_type: count for file_type, count in type_stats},
-                'recent_notes': [note.to_dict() for note in recent_notes]
+                'recent_notes': [Note.row_to_dict(row) for row in recent_notes]
             }
         })
         
@@ -2,7 +2,9 @@ from flask import Blueprint, render_template, redirect, url_for, session, reques
 from extensions import db
 from models.user import User
 from models.class_models import Class, TeacherClass, ClassSubject
-from utils.auth_utils import login_required, teacher_required
+from utils.access_control import rebuild_class_access
+from utils.auth_utils import login_required, teacher_required, get_current_user
+from utils.permissions import class_permissions
 from smtp import email_sender
 
 settings_bp = Blueprint('settings', __name__)
@@ -95,7 +97,7 @@ def settings():
 @teacher_required
 def class_settings(class_id):
     class_obj = Class.query.get_or_404(class_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if class_obj.teacher_id != user.id:
         flash('只有班主任可以访问班级设置', 'error')
@@ -121,7 +123,7 @@ def class_settings(class_id):
 @teacher_required
 def update_class_subjects(class_id):
     class_obj = Class.query.get_or_404(class_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if class_obj.teacher_id != user.id:
         flash('只有班主任可以修改班级学科', 'error')
@@ -138,7 +140,9 @@ def update_class_subjects(class_id):
                 class_subject = ClassSubject(class_id=class_id, subject_name=subject_name)
                 db.session.add(class_subject)
         
+        rebuild_class_access(class_id)
         db.session.commit()
+        class_permissions.invalidate_class(class_id)
         flash('班级学科设置已更新', 'success')
     except Exception as e:
         db.session.rollback()
@@ -151,7 +155,7 @@ def update_class_subjects(class_id):
 @teacher_required
 def invite_teachers(class_id):
     class_obj = Class.query.get_or_404(class_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if class_obj.teacher_id != user.id:
         flash('只有班主任可以邀请老师', 'error')
@@ -194,7 +198,7 @@ def invite_teachers(class_id):
 @teacher_required
 def approve_teacher(class_id, teacher_id):
     class_obj = Class.query.get_or_404(class_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if class_obj.teacher_id != user.id:
         flash('只有班主任可以批准老师', 'error')
@@ -203,7 +207,9 @@ def approve_teacher(class_id, teacher_id):
     teacher_class = TeacherClass.query.filter_by(class_id=class_id, teacher_id=teacher_id).first()
     if teacher_class:
         teacher_class.is_approved = True
+        rebuild_class_access(class_id)
         db.session.commit()
+        class_permissions.invalidate_class(class_id)
         flash('老师已批准加入班级', 'success')
     
     return redirect(url_for('settings.class_settings', class_id=class_id))
@@ -213,7 +219,7 @@ def approve_teacher(class_id, teacher_id):
 @teacher_required
 def update_teacher_subjects(class_id, teacher_id):
     class_obj = Class.query.get_or_404(class_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if class_obj.teacher_id != user.id:
         flash('只有班主任可以分配学科', 'error')
@@ -223,7 +229,9 @@ def update_teacher_subjects(class_id, teacher_id):
     if teacher_class and teacher_class.is_approved:
         selected_subjects = request.form.getlist('subjects')
         teacher_class.assigned_subjects = ','.join(selected_subjects)
+        rebuild_class_access(class_id)
         db.session.commit()
+        class_permissions.invalidate_class(class_id)
         flash('老师学科分配已更新', 'success')
     
     return redirect(url_for('settings.class_settings', class_id=class_id))
@@ -233,7 +241,7 @@ def update_teacher_subjects(class_id, teacher_id):
 @teacher_required
 def remove_teacher(class_id, teacher_id):
     class_obj = Class.query.get_or_404(class_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if class_obj.teacher_id != user.id:
         flash('只有班主任可以移除老师', 'error')
@@ -242,7 +250,9 @@ def remove_teacher(class_id, teacher_id):
     teacher_class = TeacherClass.query.filter_by(class_id=class_id, teacher_id=teacher_id).first()
     if teacher_class:
         db.session.delete(teacher_class)
+        rebuild_class_access(class_id)
         db.session.commit()
+        class_permissions.invalidate_class(class_id)
         flash('老师已从班级移除', 'success')
     
     return redirect(url_for('settings.class_settings', class_id=class_id))
@@ -252,7 +262,7 @@ def remove_teacher(class_id, teacher_id):
 @login_required
 @teacher_required
 def leave_class(class_id):
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     teacher_class = TeacherClass.query.filter_by(
         class_id=class_id, 
@@ -262,7 +272,9 @@ def leave_class(class_id):
     if teacher_class:
         try:
             db.session.delete(teacher_class)
+            rebuild_class_access(class_id)
             db.session.commit()
+            class_permissions.invalidate_class(class_id)
             flash('已成功退出班级', 'success')
         except Exception as e:
             db.session.rollback()
@@ -277,7 +289,7 @@ def leave_class(class_id):
 @teacher_required
 def generate_user_token():
     """生成用户token"""
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     try:
         token = user.generate_user_token()
@@ -294,7 +306,7 @@ def generate_user_token():
 @teacher_required
 def reset_user_token():
     """重置用户token"""
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     try:
         token = user.generate_user_token()
@@ -311,7 +323,7 @@ def reset_user_token():
 @teacher_required
 def revoke_user_token():
     """撤销用户token"""
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     try:
         user.revoke_user_token()
@@ -328,7 +340,7 @@ def revoke_user_token():
 @teacher_required
 def get_user_token_api():
     """获取用户token的API端点"""
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if not user.user_token:
         return jsonify({'error': '用户令牌不存在'}), 404
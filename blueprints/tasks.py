@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify, session
-from extensions import db, socketio
-from models.user import User
+from sqlalchemy.orm import joinedload
+from extensions import db
 from models.whiteboard import Whiteboard
 from models.task import Task
-from models.class_models import TeacherClass, ClassSubject
-from utils.auth_utils import login_required, teacher_required
+from utils.auth_utils import login_required, teacher_required, get_current_user
+from utils.pagination import keyset_paginate, CursorError
+from utils.permissions import class_permissions
+from utils.socket_outbox import socket_outbox
 from utils.time_utils import parse_china_time, format_china_time
 
 tasks_bp = Blueprint('tasks', __name__)
@@ -14,27 +16,11 @@ tasks_bp = Blueprint('tasks', __name__)
 @teacher_required
 def create_task(whiteboard_id):
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
-    has_permission = False
-    assigned_subjects = []
-    
-    if whiteboard.class_obj.teacher_id == user.id:
-        has_permission = True
-        class_subjects = ClassSubject.query.filter_by(class_id=whiteboard.class_id).all()
-        assigned_subjects = [subject.subject_name for subject in class_subjects]
-    else:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=whiteboard.class_id, 
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        
-        if teacher_class and teacher_class.assigned_subjects:
-            has_permission = True
-            assigned_subjects = teacher_class.get_assigned_subjects_list()
-    
-    if not has_permission:
+    # 检查权限：班主任或授课老师
+    permission = class_permissions.resolve(user.id, whiteboard.class_id)
+    if not permission.can_teach:
         return jsonify({'error': '无权限发布任务'}), 403
     
     data = request.get_json()
@@ -48,7 +34,7 @@ def create_task(whiteboard_id):
     if not title:
         return jsonify({'error': '任务标题不能为空'}), 400
     
-    if subject and subject not in assigned_subjects:
+    if subject and subject not in permission.subjects:
         return jsonify({'error': f'您没有权限发布{subject}学科的任务'}), 403
     
     due_date = None
@@ -71,9 +57,9 @@ def create_task(whiteboard_id):
     
     try:
         db.session.add(task)
-        db.session.commit()
+        db.session.flush()
         
-        socketio.emit('new_task', {
+        socket_outbox.enqueue('new_task', {
             'id': task.id,
             'title': task.title,
             'description': task.description,
@@ -83,7 +69,8 @@ def create_task(whiteboard_id):
             'due_date': format_china_time(task.due_date),
             'created_at': format_china_time(task.created_at),
             'teacher_name': task.teacher.username
-        }, room=f"whiteboard_{whiteboard_id}")
+        }, f"whiteboard_{whiteboard_id}")
+        db.session.commit()
         
         return jsonify({'success': True, 'task_id': task.id})
     except Exception as e:
@@ -95,16 +82,16 @@ def create_task(whiteboard_id):
 @teacher_required
 def delete_task(task_id):
     task = Task.query.get_or_404(task_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
-    if user.role != 'teacher' or task.whiteboard.class_obj.teacher_id != user.id:
+    if not class_permissions.resolve(user.id, task.whiteboard.class_id).is_class_teacher:
         return jsonify({'error': '无权限'}), 403
     
     try:
         whiteboard_id = task.whiteboard_id
         db.session.delete(task)
+        socket_outbox.enqueue('delete_task', {'task_id': task_id}, f"whiteboard_{whiteboard_id}")
         db.session.commit()
-        socketio.emit('delete_task', {'task_id': task_id}, room=f"whiteboard_{whiteboard_id}")
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -114,30 +101,22 @@ def delete_task(task_id):
 @login_required
 def get_whiteboard_tasks_list(whiteboard_id):
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user_id = session['user_id']
     
     # 检查权限：班主任或授课老师
-    is_class_teacher = (whiteboard.class_obj.teacher_id == user.id)
-    is_teaching_teacher = False
-    if not is_class_teacher:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=whiteboard.class_id, 
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class and teacher_class.assigned_subjects:
-            is_teaching_teacher = True
-    
-    if not is_class_teacher and not is_teaching_teacher:
+    permission = class_permissions.resolve(user_id, whiteboard.class_id)
+    if not permission.can_teach:
         return jsonify({'error': '无权限'}), 403
     
     try:
-        tasks = Task.query.filter_by(whiteboard_id=whiteboard_id).order_by(Task.created_at.desc()).all()
+        tasks, next_cursor = keyset_paginate(
+            Task.query.options(joinedload(Task.teacher)).filter_by(whiteboard_id=whiteboard_id), Task
+        )
         
         tasks_data = []
         for task in tasks:
             # 计算删除权限：班主任或任务发布者
-            can_delete = is_class_teacher or task.teacher_id == user.id
+            can_delete = permission.is_class_teacher or task.teacher_id == user_id
             
             tasks_data.append({
                 'id': task.id,
@@ -154,6 +133,8 @@ def get_whiteboard_tasks_list(whiteboard_id):
                 'can_delete': can_delete
             })
         
-        return jsonify({'success': True, 'tasks': tasks_data})
+        return jsonify({'success': True, 'tasks': tasks_data, 'next_cursor': next_cursor})
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': '获取任务列表失败'}), 500
\ No newline at end of file
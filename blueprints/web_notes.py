@@ -1,37 +1,25 @@
 from flask import Blueprint, render_template, redirect, url_for, session, request, flash, jsonify, send_file
 import os
 from extensions import db
-from models.user import User
-from models.class_models import Class, TeacherClass
+from models.class_models import Class
 from models.note import Note
 from models.whiteboard import Whiteboard
 from utils.auth_utils import login_required, teacher_required
+from utils.db_routing import use_reader
+from utils.permissions import class_permissions
 
 web_notes_bp = Blueprint('web_notes', __name__, url_prefix='/web/notes')
 
 @web_notes_bp.route('/classes/<int:class_id>/notes', methods=['GET'])
 @login_required
 @teacher_required
+@use_reader
 def get_class_notes(class_id):
     """获取班级的所有笔记（Web端教师使用）"""
-    user = db.session.get(User, session['user_id'])
-    
-    # 检查权限
+    # 检查权限：班主任或授课教师
     class_obj = Class.query.get_or_404(class_id)
-    has_permission = False
-    
-    if class_obj.teacher_id == user.id:
-        has_permission = True
-    else:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=class_id,
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class:
-            has_permission = True
     
-    if not has_permission:
+    if not class_permissions.resolve(session['user_id'], class_id).is_member:
         return jsonify({'error': '无权限访问该班级的笔记'}), 403
     
     try:
@@ -65,13 +53,13 @@ def get_class_notes(class_id):
             )
         
         # 分页
-        pagination = query.order_by(Note.created_at.desc()).paginate(
+        pagination = Note.with_list_columns(query.order_by(Note.created_at.desc())).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
         )
         
-        notes_data = [note.to_dict() for note in pagination.items]
+        notes_data = [Note.row_to_dict(row) for row in pagination.items]
         
         # 获取班级的所有白板
         whiteboards = Whiteboard.query.filter_by(class_id=class_id).all()
@@ -101,25 +89,10 @@ def get_class_notes(class_id):
 @teacher_required
 def delete_class_note(note_id):
     """删除班级笔记"""
-    user = db.session.get(User, session['user_id'])
-    
     note = Note.query.get_or_404(note_id)
     
     # 检查权限：班主任或笔记所在班级的授课教师
-    has_permission = False
-    
-    if note.class_obj.teacher_id == user.id:
-        has_permission = True
-    else:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=note.class_id,
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class:
-            has_permission = True
-    
-    if not has_permission:
+    if not class_permissions.resolve(session['user_id'], note.class_id).is_member:
         return jsonify({'error': '无权限删除该笔记'}), 403
     
     try:
@@ -153,25 +126,10 @@ def delete_class_note(note_id):
 @login_required
 @teacher_required
 def preview_note(note_id):
-    user = db.session.get(User, session['user_id'])
-    
     note = Note.query.get_or_404(note_id)
     
     # 检查权限：班主任或笔记所在班级的授课教师
-    has_permission = False
-    
-    if note.class_obj.teacher_id == user.id:
-        has_permission = True
-    else:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=note.class_id,
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class:
-            has_permission = True
-    
-    if not has_permission:
+    if not class_permissions.resolve(session['user_id'], note.class_id).is_member:
         return jsonify({'error': '无权限预览该笔记'}), 403
     
     try:
@@ -207,25 +165,10 @@ def preview_note(note_id):
 @teacher_required
 def download_note(note_id):
     """下载笔记文件"""
-    user = db.session.get(User, session['user_id'])
-    
     note = Note.query.get_or_404(note_id)
     
     # 检查权限：班主任或笔记所在班级的授课教师
-    has_permission = False
-    
-    if note.class_obj.teacher_id == user.id:
-        has_permission = True
-    else:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=note.class_id,
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class:
-            has_permission = True
-    
-    if not has_permission:
+    if not class_permissions.resolve(session['user_id'], note.class_id).is_member:
         flash('无权限下载该笔记', 'error')
         return redirect(url_for('classes.classes'))
     
@@ -262,26 +205,13 @@ def download_note(note_id):
 @web_notes_bp.route('/classes/<int:class_id>/notes/page')
 @login_required
 @teacher_required
+@use_reader
 def class_notes_page(class_id):
     """班级笔记管理页面"""
-    user = db.session.get(User, session['user_id'])
-    
-    # 检查权限
+    # 检查权限：班主任或授课教师
     class_obj = Class.query.get_or_404(class_id)
-    has_permission = False
-    
-    if class_obj.teacher_id == user.id:
-        has_permission = True
-    else:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=class_id,
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        if teacher_class:
-            has_permission = True
     
-    if not has_permission:
+    if not class_permissions.resolve(session['user_id'], class_id).is_member:
         flash('无权限访问该班级的笔记', 'error')
         return redirect(url_for('classes.classes'))
     
@@ -1,15 +1,22 @@
 from flask import Blueprint, render_template, redirect, url_for, session, request, flash, jsonify
+from sqlalchemy.orm import joinedload
 from datetime import timedelta
 from extensions import db, socketio
-from models.user import User
-from models.class_models import Class, TeacherClass, ClassSubject
+from models.class_models import Class, ClassSubject
 from models.whiteboard import Whiteboard
 from models.task import Task
 from models.assignment import Assignment
 from models.announcement import Announcement
-from utils.auth_utils import login_required, teacher_required
+from utils.access_control import rebuild_class_access
+from utils.auth_utils import login_required, teacher_required, get_current_user
+from utils.auth_cache import board_credential_cache
 from utils.code_utils import generate_whiteboard_credentials
+from utils.pagination import get_page_args, CursorError
+from utils.permissions import class_permissions
+from utils.presence import presence_registry
+from utils.status_history import get_online_intervals, get_uptime_seconds
 from utils.time_utils import get_china_time, format_china_time, parse_china_time
+from utils.timeline import fetch_timeline, KIND_TASK, KIND_ANNOUNCEMENT
 
 whiteboards_bp = Blueprint('whiteboards', __name__, url_prefix='/whiteboards')
 
@@ -17,29 +24,21 @@ whiteboards_bp = Blueprint('whiteboards', __name__, url_prefix='/whiteboards')
 @login_required
 def view_whiteboard(whiteboard_id):
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
     
-    is_class_teacher = (whiteboard.class_obj.teacher_id == user.id)
-    is_teaching_teacher = False
-    assigned_subjects = []
+    permission = class_permissions.resolve(session['user_id'], whiteboard.class_id)
+    is_class_teacher = permission.is_class_teacher
+    is_teaching_teacher = permission.is_teaching_teacher
+    assigned_subjects = list(permission.subjects) if is_teaching_teacher else []
     
-    if not is_class_teacher:
-        teacher_class = TeacherClass.query.filter_by(
-            class_id=whiteboard.class_id, 
-            teacher_id=user.id,
-            is_approved=True
-        ).first()
-        
-        if teacher_class and teacher_class.assigned_subjects:
-            is_teaching_teacher = True
-            assigned_subjects = teacher_class.get_assigned_subjects_list()
-    
-    if not is_class_teacher and not is_teaching_teacher:
+    if not permission.can_teach:
         flash('您没有权限查看此白板', 'error')
         return redirect(url_for('classes.classes'))
     
-    class_subjects = ClassSubject.query.filter_by(class_id=whiteboard.class_id).all()
-    class_subjects_list = [subject.subject_name for subject in class_subjects]
+    if is_class_teacher:
+        class_subjects_list = list(permission.subjects)
+    else:
+        class_subjects = ClassSubject.query.filter_by(class_id=whiteboard.class_id).all()
+        class_subjects_list = [subject.subject_name for subject in class_subjects]
     
 #    if request.method == 'POST' and 'subjects' in request.form:
 #        if not is_class_teacher:
@@ -64,9 +63,13 @@ def view_whiteboard(whiteboard_id):
     else:
         whiteboard_url = None
     
-    tasks = Task.query.filter_by(whiteboard_id=whiteboard_id).order_by(Task.created_at.desc()).all()
-    announcements = Announcement.query.filter_by(whiteboard_id=whiteboard_id).order_by(Announcement.created_at.desc()).all()
-    assignments = Assignment.query.filter_by(whiteboard_id=whiteboard_id).order_by(Assignment.created_at.desc()).all()
+    # 模板中显示发布者，随列表一起加载
+    tasks = Task.query.options(joinedload(Task.teacher)).filter_by(whiteboard_id=whiteboard_id) \
+        .order_by(Task.created_at.desc()).all()
+    announcements = Announcement.query.options(joinedload(Announcement.teacher)).filter_by(whiteboard_id=whiteboard_id) \
+        .order_by(Announcement.created_at.desc()).all()
+    assignments = Assignment.query.options(joinedload(Assignment.teacher)).filter_by(whiteboard_id=whiteboard_id) \
+        .order_by(Assignment.created_at.desc()).all()
     
     for task in tasks:
         task.created_at_str = format_china_time(task.created_at)
@@ -106,7 +109,7 @@ def view_whiteboard(whiteboard_id):
 def get_whiteboard_token(whiteboard_id):
     """获取白板token（教师权限）"""
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     # 验证教师权限
     if not (whiteboard.class_obj.teacher_id == user.id):
@@ -126,13 +129,14 @@ def get_whiteboard_token(whiteboard_id):
 def reset_whiteboard_token(whiteboard_id):
     """重置白板token"""
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if not (whiteboard.class_obj.teacher_id == user.id):
         flash('只有班主任可以重置token', 'error')
         return redirect(url_for('whiteboards.view_whiteboard', whiteboard_id=whiteboard_id))
     
     whiteboard.generate_token()
+    board_credential_cache.invalidate_whiteboard_on_commit(db.session(), whiteboard.id)
     db.session.commit()
     
     flash('Token已重置成功', 'success')
@@ -143,7 +147,7 @@ def reset_whiteboard_token(whiteboard_id):
 @teacher_required
 def create_whiteboard(class_id):
     class_obj = Class.query.get_or_404(class_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if user.role != 'teacher' or class_obj.teacher_id != user.id:
         flash('您没有权限执行此操作', 'error')
@@ -167,6 +171,8 @@ def create_whiteboard(class_id):
         
         try:
             db.session.add(whiteboard)
+            db.session.flush()
+            rebuild_class_access(class_id)
             db.session.commit()
             flash(f'白板 "{name}" 创建成功！', 'success')
             return redirect(url_for('whiteboards.view_whiteboard', whiteboard_id=whiteboard.id))
@@ -185,31 +191,25 @@ def create_whiteboard(class_id):
 @login_required
 def get_whiteboard_status(whiteboard_id):
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if user.role != 'teacher' or whiteboard.class_obj.teacher_id != user.id:
         return jsonify({'error': '无权限'}), 403
     
-    is_actually_online = False
-    if whiteboard.last_heartbeat:
-        time_diff = (get_china_time().replace(tzinfo=None) - whiteboard.last_heartbeat).total_seconds()
-        is_actually_online = time_diff < 30
-    
-    if whiteboard.is_online != is_actually_online:
-        whiteboard.is_online = is_actually_online
-        db.session.commit()
+    last_heartbeat = presence_registry.last_seen(whiteboard.id, whiteboard.last_heartbeat)
     
     return jsonify({
         'success': True,
-        'is_online': whiteboard.is_online,
-        'last_heartbeat': format_china_time(whiteboard.last_heartbeat) if whiteboard.last_heartbeat else None
+        'is_online': presence_registry.is_online(whiteboard.id, whiteboard.last_heartbeat),
+        'last_heartbeat': format_china_time(last_heartbeat) if last_heartbeat else None
     })
 
-@whiteboards_bp.route('/<int:whiteboard_id>/history')
+@whiteboards_bp.route('/<int:whiteboard_id>/uptime')
 @login_required
-def get_history(whiteboard_id):
+def get_uptime(whiteboard_id):
+    """白板某一天的在线区间和在线时长"""
     whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
-    user = db.session.get(User, session['user_id'])
+    user = get_current_user()
     
     if user.role != 'teacher' or whiteboard.class_obj.teacher_id != user.id:
         return jsonify({'error': '无权限'}), 403
@@ -224,49 +224,65 @@ def get_history(whiteboard_id):
     except ValueError:
         return jsonify({'error': '日期格式无效'}), 400
     
-    tasks = Task.query.filter(
-        Task.whiteboard_id == whiteboard_id,
-        Task.created_at >= target_date,
-        Task.created_at < next_date
-    ).all()
+    intervals = get_online_intervals(whiteboard_id, target_date, next_date)
     
-    announcements = Announcement.query.filter(
-        Announcement.whiteboard_id == whiteboard_id,
-        Announcement.created_at >= target_date,
-        Announcement.created_at < next_date
-    ).all()
-    
-    assignments = Assignment.query.filter(
-        Assignment.whiteboard_id == whiteboard_id,
-        Assignment.created_at >= target_date,
-        Assignment.created_at < next_date
-    ).all()
+    return jsonify({
+        'success': True,
+        'date': date_str,
+        'uptime_seconds': int(get_uptime_seconds(whiteboard_id, target_date, next_date, intervals)),
+        'intervals': [{
+            'online_from': format_china_time(online_from),
+            'online_until': format_china_time(online_until)
+        } for online_from, online_until in intervals]
+    })
+
+@whiteboards_bp.route('/<int:whiteboard_id>/history')
+@login_required
+def get_history(whiteboard_id):
+    whiteboard = Whiteboard.query.get_or_404(whiteboard_id)
+    user = get_current_user()
     
-    history = []
-    for task in tasks:
-        history.append({
-            'type': '任务',
-            'title': task.title,
-            'description': task.description,
-            'created_at': format_china_time(task.created_at)
-        })
+    if user.role != 'teacher' or whiteboard.class_obj.teacher_id != user.id:
+        return jsonify({'error': '无权限'}), 403
     
-    for announcement in announcements:
-        history.append({
-            'type': '公告',
-            'title': announcement.title,
-            'description': announcement.content[:100] + '...' if len(announcement.content) > 100 else announcement.content,
-            'created_at': format_china_time(announcement.created_at)
-        })
+    date_str = request.args.get('date')
+    if not date_str:
+        return jsonify({'error': '需要日期参数'}), 400
     
-    for assignment in assignments:
-        history.append({
-            'type': '作业',
-            'title': assignment.title,
-            'description': f"{assignment.subject}: {assignment.description[:100]}{'...' if len(assignment.description) > 100 else ''}",
-            'created_at': format_china_time(assignment.created_at)
-        })
+    try:
+        target_date = parse_china_time(date_str + ' 00:00:00')
+        next_date = target_date + timedelta(days=1)
+    except ValueError:
+        return jsonify({'error': '日期格式无效'}), 400
     
-    history.sort(key=lambda x: x['created_at'], reverse=True)
+    try:
+        limit, after = get_page_args()
+        rows, next_cursor = fetch_timeline(whiteboard_id, target_date, next_date, limit=limit, after=after)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({'success': True, 'data': history})
\ No newline at end of file
+    history = []
+    for row in rows:
+        if row.kind == KIND_TASK:
+            history.append({
+                'type': '任务',
+                'title': row.title,
+                'description': row.description,
+                'created_at': format_china_time(row.created_at)
+            })
+        elif row.kind == KIND_ANNOUNCEMENT:
+            history.append({
+                'type': '公告',
+                'title': row.title,
+                'description': row.content[:100] + '...' if len(row.content) > 100 else row.content,
+                'created_at': format_china_time(row.created_at)
+            })
+        else:
+            history.append({
+                'type': '作业',
+                'title': row.title,
+                'description': f"{row.subject}: {row.description[:100]}{'...' if len(row.description) > 100 else ''}",
+                'created_at': format_china_time(row.created_at)
+            })
+    
+    return jsonify({'success': True, 'data': history, 'next_cursor': next_cursor})
\ No newline at end of file
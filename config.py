@@ -33,4 +33,90 @@ class Config:
     SMTP_EMAIL = os.environ.get('SMTP_EMAIL')
     SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
     SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'True').lower() == 'true'
-    SITE_URL = os.environ.get('SITE_URL', 'http://localhost:5000')
\ No newline at end of file
+    SITE_URL = os.environ.get('SITE_URL', 'http://localhost:5000')
+    
+    # 白板在线状态配置
+    WHITEBOARD_OFFLINE_TIMEOUT = int(os.environ.get('WHITEBOARD_OFFLINE_TIMEOUT', 30))  # 超过该秒数没有心跳视为离线
+    PRESENCE_FLUSH_INTERVAL = int(os.environ.get('PRESENCE_FLUSH_INTERVAL', 10))  # 心跳时间批量写回数据库的间隔（秒）
+    OFFLINE_DETECTOR_TICK = float(os.environ.get('OFFLINE_DETECTOR_TICK', 1.0))  # 离线检测时间轮的精度（秒）
+    OFFLINE_RECONCILE_INTERVAL = int(os.environ.get('OFFLINE_RECONCILE_INTERVAL', 600))  # 兜底扫描离线白板的间隔（秒）
+    STATUS_BATCH_INTERVAL = float(os.environ.get('STATUS_BATCH_INTERVAL', 5))  # 心跳刷新合并推送的间隔（秒）
+    
+    # 白板变更日志保留天数，更早的游标需要重新拉取全量快照
+    CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 7))
+    
+    # Socket.IO 发件箱：事件随数据修改一起提交，由后台线程投递
+    SOCKET_OUTBOX_POLL_INTERVAL = float(os.environ.get('SOCKET_OUTBOX_POLL_INTERVAL', 1.0))  # 检查待重试事件的间隔（秒）
+    SOCKET_OUTBOX_BATCH_SIZE = int(os.environ.get('SOCKET_OUTBOX_BATCH_SIZE', 200))  # 每批最多投递的事件数
+    SOCKET_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('SOCKET_OUTBOX_MAX_ATTEMPTS', 10))  # 超过后放弃投递，保留期满后删除
+    SOCKET_OUTBOX_ORPHAN_AFTER = int(os.environ.get('SOCKET_OUTBOX_ORPHAN_AFTER', 30))  # 其他进程的事件超过该秒数未投递时接管
+    
+    # 白板凭证缓存配置
+    BOARD_AUTH_CACHE_SIZE = int(os.environ.get('BOARD_AUTH_CACHE_SIZE', 10000))
+    BOARD_AUTH_CACHE_TTL = int(os.environ.get('BOARD_AUTH_CACHE_TTL', 300))  # 秒
+    
+    # 用户token缓存配置
+    USER_TOKEN_CACHE_SIZE = int(os.environ.get('USER_TOKEN_CACHE_SIZE', 10000))
+    USER_TOKEN_CACHE_TTL = int(os.environ.get('USER_TOKEN_CACHE_TTL', 300))  # 秒
+    
+    # 班级权限缓存配置
+    PERMISSION_CACHE_SIZE = int(os.environ.get('PERMISSION_CACHE_SIZE', 10000))
+    PERMISSION_CACHE_TTL = int(os.environ.get('PERMISSION_CACHE_TTL', 60))  # 秒
+    
+    # 白板读取接口响应缓存：local（进程内，默认）、redis（多进程共用）或 none（关闭）
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'local')
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL')  # 未设置时使用 CACHE_BUS_URL
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 2000))
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))  # 秒
+    
+    # 多进程部署时用于同步缓存失效的 Redis 地址，如 redis://localhost:6379/0，未设置时只在本进程内失效
+    CACHE_BUS_URL = os.environ.get('CACHE_BUS_URL')
+    
+    # 数据库连接配置：default、sqlite-production（WAL、只读接口使用独立的只读连接池）或 postgresql
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # 毫秒
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536))  # 每个连接的页缓存
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))  # 字节
+    SQLITE_WRITER_POOL_SIZE = int(os.environ.get('SQLITE_WRITER_POOL_SIZE', 5))
+    SQLITE_READER_POOL_SIZE = int(os.environ.get('SQLITE_READER_POOL_SIZE', 10))
+    
+    # 只读从库地址（可选），设置后只读接口的查询发往从库
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    # 用户或白板写入后，在该时间（秒）内其读取仍走主库；多进程部署需配置 CACHE_BUS_URL 同步
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+    
+    # postgresql 配置的连接池：默认按进程数和线程数计算，连接总数不超过 DB_MAX_CONNECTIONS
+    DB_WORKERS = int(os.environ.get('DB_WORKERS', 1))  # 工作进程数
+    DB_THREADS_PER_WORKER = int(os.environ.get('DB_THREADS_PER_WORKER', 16))  # 每个进程同时访问数据库的线程数（协程模式下为并发协程数）
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 90))  # 分配给本应用的数据库连接总数
+    DB_POOL_SIZE = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+    DB_MAX_OVERFLOW = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))  # 秒
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # 秒
+    DB_QUERY_CACHE_SIZE = int(os.environ.get('DB_QUERY_CACHE_SIZE', 1200))  # 编译语句缓存条数
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))  # 秒
+    DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME', 'dynamic-class')  # pg_stat_activity 中显示的应用名
+    
+    # 单个请求允许执行的 SQL 语句数上限，用于测试中发现 N+1 查询；0 表示不检查
+    SQL_STATEMENT_LIMIT = int(os.environ.get('SQL_STATEMENT_LIMIT', 0))
+    
+    # 按请求统计 SQL 语句数、数据库耗时和重复语句（N+1），按接口汇总到 /metrics
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'False').lower() == 'true'
+    SQL_REPEAT_THRESHOLD = int(os.environ.get('SQL_REPEAT_THRESHOLD', 5))  # 同一语句执行多少次视为 N+1
+    
+    # Socket.IO 并发模型：threading（开发服务器，每个连接一个线程）、gevent 或 eventlet（协程服务器，用于生产）
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')
+    SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.environ.get('SERVER_PORT', 5000))
+    # run.py 是否以调试模式运行，生产环境应设为 False
+    SERVER_DEBUG = os.environ.get('SERVER_DEBUG', 'True').lower() == 'true'
+    
+    # 多进程部署：Socket.IO 消息队列（redis://、amqp:// 等，local:// 为测试用的进程内替身），未设置时推送只送达本进程
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'dynamic-class')
+    # 工作进程角色：all（处理请求并运行定时任务）、web（只处理请求）、scheduler（只运行定时任务）
+    # 多进程部署时只能有一个进程为 all 或 scheduler，缓存失效需同时配置 CACHE_BUS_URL
+    WORKER_ROLE = os.environ.get('WORKER_ROLE', 'all')
+    
+    # 运行指标接口 /metrics 的访问令牌，设置后总是需要提供；未设置时接口关闭（仅调试模式下开放）
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
\ No newline at end of file
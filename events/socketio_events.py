@@ -3,8 +3,11 @@ from flask import session, request
 from flask_socketio import emit, join_room, leave_room
 from models.user import User
 from models.class_models import Class
-from models.whiteboard import Whiteboard, WhiteboardStatusHistory
+from models.whiteboard import Whiteboard
 from models.task import Task
+from utils.presence import presence_registry
+from utils.socket_outbox import socket_outbox
+from utils.status_broadcaster import status_broadcaster
 from utils.time_utils import get_china_time, format_china_time
 
 @socketio.on('connect')
@@ -18,23 +21,20 @@ def handle_connect():
             if whiteboard:
                 join_room(f"whiteboard_{whiteboard.id}")
                 
-                current_time = get_china_time().replace(tzinfo=None)
-                whiteboard.is_online = True
-                whiteboard.last_heartbeat = current_time
-                db.session.commit()
+                current_time = get_china_time()
+                presence_registry.touch(whiteboard.id, current_time)
+                changed = presence_registry.mark_online(whiteboard.id, current_time)
                 
-                status_history = WhiteboardStatusHistory(
-                    whiteboard_id=whiteboard.id,
-                    is_online=True
-                )
-                db.session.add(status_history)
-                db.session.commit()
-                
-                socketio.emit('whiteboard_status_update', {
+                update = {
                     'whiteboard_id': whiteboard.id,
                     'is_online': True,
                     'last_heartbeat': format_china_time(current_time)
-                }, room=f"teacher_{whiteboard.class_obj.teacher_id}")
+                }
+                room = f"teacher_{whiteboard.class_obj.teacher_id}"
+                if changed:
+                    status_broadcaster.publish_change(room, update)
+                else:
+                    status_broadcaster.publish_refresh(room, update)
                 
                 emit('connected', {'status': 'success', 'message': '认证成功'})
                 return True
@@ -48,23 +48,19 @@ def handle_connect():
                 if user and user.role == 'teacher':
                     join_room(f"teacher_{user_id}")
                     
+                    # 把教师所有白板的当前状态合并为一条事件发送
+                    updates = []
                     classes = Class.query.filter_by(teacher_id=user_id).all()
                     for class_obj in classes:
                         for whiteboard in class_obj.whiteboards:
-                            is_actually_online = False
-                            if whiteboard.last_heartbeat:
-                                time_diff = (get_china_time().replace(tzinfo=None) - whiteboard.last_heartbeat).total_seconds()
-                                is_actually_online = time_diff < 30
-                            
-                            if whiteboard.is_online != is_actually_online:
-                                whiteboard.is_online = is_actually_online
-                                db.session.commit()
-                            
-                            socketio.emit('whiteboard_status_update', {
+                            last_heartbeat = presence_registry.last_seen(whiteboard.id, whiteboard.last_heartbeat)
+                            updates.append({
                                 'whiteboard_id': whiteboard.id,
-                                'is_online': whiteboard.is_online,
-                                'last_heartbeat': format_china_time(whiteboard.last_heartbeat) if whiteboard.last_heartbeat else None
-                            }, room=f"teacher_{user_id}")
+                                'is_online': presence_registry.is_online(whiteboard.id, whiteboard.last_heartbeat),
+                                'last_heartbeat': format_china_time(last_heartbeat) if last_heartbeat else None
+                            })
+                    if updates:
+                        emit('whiteboard_status_batch', {'updates': updates})
                     
                     emit('connected', {'status': 'success', 'message': '教师端连接成功'})
                     return True
@@ -85,21 +81,14 @@ def handle_disconnect():
         if board_id:
             whiteboard = Whiteboard.query.filter_by(board_id=board_id).first()
             if whiteboard:
-                whiteboard.is_online = False
-                db.session.commit()
+                last_heartbeat = presence_registry.last_seen(whiteboard.id, whiteboard.last_heartbeat)
+                presence_registry.mark_offline(whiteboard.id)
                 
-                status_history = WhiteboardStatusHistory(
-                    whiteboard_id=whiteboard.id,
-                    is_online=False
-                )
-                db.session.add(status_history)
-                db.session.commit()
-                
-                socketio.emit('whiteboard_status_update', {
+                status_broadcaster.publish_change(f"teacher_{whiteboard.class_obj.teacher_id}", {
                     'whiteboard_id': whiteboard.id,
                     'is_online': False,
-                    'last_heartbeat': format_china_time(whiteboard.last_heartbeat) if whiteboard.last_heartbeat else None
-                }, room=f"teacher_{whiteboard.class_obj.teacher_id}")
+                    'last_heartbeat': format_china_time(last_heartbeat) if last_heartbeat else None
+                })
     except Exception as e:
         pass
 
@@ -109,14 +98,21 @@ def handle_heartbeat(data):
     if board_id:
         whiteboard = Whiteboard.query.filter_by(board_id=board_id).first()
         if whiteboard:
-            whiteboard.last_heartbeat = get_china_time().replace(tzinfo=None)
-            db.session.commit()
+            current_time = get_china_time()
+            changed = False
+            if not presence_registry.touch(whiteboard.id, current_time):
+                changed = presence_registry.mark_online(whiteboard.id, current_time)
             
-            socketio.emit('whiteboard_status_update', {
+            update = {
                 'whiteboard_id': whiteboard.id,
                 'is_online': True,
-                'last_heartbeat': format_china_time(whiteboard.last_heartbeat)
-            }, room=f"teacher_{whiteboard.class_obj.teacher_id}")
+                'last_heartbeat': format_china_time(current_time)
+            }
+            room = f"teacher_{whiteboard.class_obj.teacher_id}"
+            if changed:
+                status_broadcaster.publish_change(room, update)
+            else:
+                status_broadcaster.publish_refresh(room, update)
 
 @socketio.on('task_acknowledged')
 def handle_task_acknowledged(data):
@@ -124,14 +120,14 @@ def handle_task_acknowledged(data):
     task = Task.query.get(task_id)
     if task:
         task.is_acknowledged = True
-        db.session.commit()
         
-        socketio.emit('task_updated', {
+        socket_outbox.enqueue('task_updated', {
             'id': task.id,
             'title': task.title,
             'is_acknowledged': task.is_acknowledged,
             'is_completed': task.is_completed
-        }, room=f"teacher_{task.whiteboard.class_obj.teacher_id}")
+        }, f"teacher_{task.whiteboard.class_obj.teacher_id}")
+        db.session.commit()
 
 @socketio.on('task_completed')
 def handle_task_completed(data):
@@ -139,14 +135,14 @@ def handle_task_completed(data):
     task = Task.query.get(task_id)
     if task:
         task.is_completed = True
-        db.session.commit()
         
-        socketio.emit('task_updated', {
+        socket_outbox.enqueue('task_updated', {
             'id': task.id,
             'title': task.title,
             'is_acknowledged': task.is_acknowledged,
             'is_completed': task.is_completed
-        }, room=f"teacher_{task.whiteboard.class_obj.teacher_id}")
+        }, f"teacher_{task.whiteboard.class_obj.teacher_id}")
+        db.session.commit()
 
 @socketio.on('join_teacher_room')
 def handle_join_teacher_room():
@@ -2,9 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
 from flask_migrate import Migrate
 from apscheduler.schedulers.background import BackgroundScheduler
+from utils.db_routing import RoutingSession
 
 # 初始化扩展
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 socketio = SocketIO()
 migrate = Migrate()
 scheduler = BackgroundScheduler()
\ No newline at end of file
@@ -40,6 +40,20 @@ def show_status():
         for h in history():
             print(f"  {h}")
 
+def compact_history():
+    """把白板状态历史的逐条记录合并为在线区间"""
+    with app.app_context():
+        from utils.status_history import compact_status_history
+        removed, created = compact_status_history(logger=print)
+        print(f"状态历史压缩完成: {removed} 条旧记录合并为 {created} 个在线区间")
+
+def rebuild_access():
+    """为所有班级重建白板访问记录"""
+    with app.app_context():
+        from utils.access_control import rebuild_all_access
+        total = rebuild_all_access(logger=print)
+        print(f"白板访问记录重建完成: 共 {total} 条")
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("用法:")
@@ -48,6 +62,8 @@ if __name__ == '__main__':
         print("  python migrate.py apply     # 应用迁移")
         print("  python migrate.py rollback  # 回滚迁移")
         print("  python migrate.py status    # 查看状态")
+        print("  python migrate.py compact-history  # 合并白板状态历史为在线区间")
+        print("  python migrate.py rebuild-access   # 重建白板访问记录")
         sys.exit(1)
     
     command = sys.argv[1]
@@ -63,6 +79,10 @@ if __name__ == '__main__':
         rollback_migration()
     elif command == 'status':
         show_status()
+    elif command == 'compact-history':
+        compact_history()
+    elif command == 'rebuild-access':
+        rebuild_access()
     else:
         print(f"未知命令: {command}")
         sys.exit(1)
\ No newline at end of file
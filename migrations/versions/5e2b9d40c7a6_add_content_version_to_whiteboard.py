@@ -0,0 +1,26 @@
+"""add content_version to whiteboard
+
+Revision ID: 5e2b9d40c7a6
+Revises: d3a8f61e0b27
+Create Date: 2026-10-18 16:40:11.273958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b9d40c7a6'
+down_revision = 'd3a8f61e0b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('whiteboard', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('whiteboard', schema=None) as batch_op:
+        batch_op.drop_column('content_version')
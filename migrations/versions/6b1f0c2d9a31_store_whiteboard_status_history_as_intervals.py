@@ -0,0 +1,32 @@
+"""store whiteboard status history as online intervals
+
+Revision ID: 6b1f0c2d9a31
+Revises: 21924fe5f860
+Create Date: 2026-10-18 10:12:05.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f0c2d9a31'
+down_revision = '21924fe5f860'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('whiteboard_status_history', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('online_from', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('online_until', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_whiteboard_status_history_whiteboard_from', ['whiteboard_id', 'online_from'], unique=False)
+
+    # 旧的逐条记录需要运行 `python migrate.py compact-history` 合并为区间
+
+
+def downgrade():
+    with op.batch_alter_table('whiteboard_status_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_whiteboard_status_history_whiteboard_from')
+        batch_op.drop_column('online_until')
+        batch_op.drop_column('online_from')
@@ -0,0 +1,50 @@
+"""add user_token_digest to user
+
+Revision ID: 9c4e7a15d2b8
+Revises: 6b1f0c2d9a31
+Create Date: 2026-10-18 14:36:52.104417
+
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e7a15d2b8'
+down_revision = '6b1f0c2d9a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_token_digest', sa.String(length=64), nullable=True))
+
+    # 为已有的token补算摘要
+    user_table = sa.table(
+        'user',
+        sa.column('id', sa.Integer),
+        sa.column('user_token', sa.String),
+        sa.column('user_token_digest', sa.String)
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(user_table.c.id, user_table.c.user_token)
+        .where(user_table.c.user_token.isnot(None))
+    ).all()
+    for user_id, user_token in rows:
+        connection.execute(
+            user_table.update()
+            .where(user_table.c.id == user_id)
+            .values(user_token_digest=hashlib.sha256(user_token.encode('utf-8')).hexdigest())
+        )
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_user_token_digest', ['user_token_digest'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_user_token_digest')
+        batch_op.drop_column('user_token_digest')
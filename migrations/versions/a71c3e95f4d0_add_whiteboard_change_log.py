@@ -0,0 +1,42 @@
+"""add whiteboard_change log
+
+Revision ID: a71c3e95f4d0
+Revises: 5e2b9d40c7a6
+Create Date: 2026-10-18 17:22:47.905316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a71c3e95f4d0'
+down_revision = '5e2b9d40c7a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('whiteboard_change',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('whiteboard_id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=10), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('changed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['whiteboard_id'], ['whiteboard.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('whiteboard_change', schema=None) as batch_op:
+        batch_op.create_index('ix_whiteboard_change_whiteboard_cursor', ['whiteboard_id', 'id'], unique=False)
+        batch_op.create_index('ix_whiteboard_change_changed_at', ['changed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('whiteboard_change', schema=None) as batch_op:
+        batch_op.drop_index('ix_whiteboard_change_changed_at')
+        batch_op.drop_index('ix_whiteboard_change_whiteboard_cursor')
+
+    op.drop_table('whiteboard_change')
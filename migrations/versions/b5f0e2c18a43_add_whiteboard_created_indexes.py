@@ -0,0 +1,38 @@
+"""add (whiteboard_id, created_at, id) indexes for keyset pagination
+
+Revision ID: b5f0e2c18a43
+Revises: a71c3e95f4d0
+Create Date: 2026-10-18 18:05:33.518720
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f0e2c18a43'
+down_revision = 'a71c3e95f4d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_whiteboard_created', ['whiteboard_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.create_index('ix_assignment_whiteboard_created', ['whiteboard_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('announcement', schema=None) as batch_op:
+        batch_op.create_index('ix_announcement_whiteboard_created', ['whiteboard_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('announcement', schema=None) as batch_op:
+        batch_op.drop_index('ix_announcement_whiteboard_created')
+
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.drop_index('ix_assignment_whiteboard_created')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_whiteboard_created')
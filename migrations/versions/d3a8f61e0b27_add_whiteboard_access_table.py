@@ -0,0 +1,43 @@
+"""add whiteboard_access table
+
+Revision ID: d3a8f61e0b27
+Revises: 9c4e7a15d2b8
+Create Date: 2026-10-18 15:48:20.661093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f61e0b27'
+down_revision = '9c4e7a15d2b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('whiteboard_access',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('whiteboard_id', sa.Integer(), nullable=False),
+        sa.Column('class_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('subjects_bitmap', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['class_id'], ['class.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['whiteboard_id'], ['whiteboard.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'whiteboard_id', name='uq_whiteboard_access_user_whiteboard')
+    )
+    with op.batch_alter_table('whiteboard_access', schema=None) as batch_op:
+        batch_op.create_index('ix_whiteboard_access_class_id', ['class_id'], unique=False)
+
+    # 已有数据需要运行 `python migrate.py rebuild-access` 生成访问记录
+
+
+def downgrade():
+    with op.batch_alter_table('whiteboard_access', schema=None) as batch_op:
+        batch_op.drop_index('ix_whiteboard_access_class_id')
+
+    op.drop_table('whiteboard_access')
@@ -0,0 +1,54 @@
+"""add composite indexes for hot filters
+
+Revision ID: e4c71b9a2f56
+Revises: b5f0e2c18a43
+Create Date: 2026-10-18 18:20:41.207365
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c71b9a2f56'
+down_revision = 'b5f0e2c18a43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.create_index('ix_assignment_whiteboard_due', ['whiteboard_id', 'due_date'], unique=False)
+
+    with op.batch_alter_table('note', schema=None) as batch_op:
+        batch_op.create_index('ix_note_whiteboard_created', ['whiteboard_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_note_class_created', ['class_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('teacher_class', schema=None) as batch_op:
+        batch_op.create_index('ix_teacher_class_class_teacher', ['class_id', 'teacher_id', 'is_approved'], unique=False)
+        batch_op.create_index('ix_teacher_class_teacher_approved', ['teacher_id', 'is_approved'], unique=False)
+
+    with op.batch_alter_table('class_subject', schema=None) as batch_op:
+        batch_op.create_index('ix_class_subject_class_id', ['class_id'], unique=False)
+
+    with op.batch_alter_table('whiteboard_status_history', schema=None) as batch_op:
+        batch_op.create_index('ix_whiteboard_status_history_whiteboard_until', ['whiteboard_id', 'online_until'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('whiteboard_status_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_whiteboard_status_history_whiteboard_until')
+
+    with op.batch_alter_table('class_subject', schema=None) as batch_op:
+        batch_op.drop_index('ix_class_subject_class_id')
+
+    with op.batch_alter_table('teacher_class', schema=None) as batch_op:
+        batch_op.drop_index('ix_teacher_class_teacher_approved')
+        batch_op.drop_index('ix_teacher_class_class_teacher')
+
+    with op.batch_alter_table('note', schema=None) as batch_op:
+        batch_op.drop_index('ix_note_class_created')
+        batch_op.drop_index('ix_note_whiteboard_created')
+
+    with op.batch_alter_table('assignment', schema=None) as batch_op:
+        batch_op.drop_index('ix_assignment_whiteboard_due')
@@ -0,0 +1,40 @@
+"""add socket_outbox
+
+Revision ID: f2d96b3e8a17
+Revises: e4c71b9a2f56
+Create Date: 2026-10-18 19:42:16.530872
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d96b3e8a17'
+down_revision = 'e4c71b9a2f56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('socket_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event', sa.String(length=64), nullable=False),
+        sa.Column('room', sa.String(length=128), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('owner', sa.String(length=32), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('socket_outbox', schema=None) as batch_op:
+        batch_op.create_index('ix_socket_outbox_next_attempt', ['next_attempt_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('socket_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_socket_outbox_next_attempt')
+
+    op.drop_table('socket_outbox')
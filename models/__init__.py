@@ -1,6 +1,6 @@
 from .user import User
 from .class_models import Class, StudentClass, TeacherClass, ClassSubject
-from .whiteboard import Whiteboard, WhiteboardStatusHistory
+from .whiteboard import Whiteboard, WhiteboardStatusHistory, WhiteboardAccess, WhiteboardChange
 from .task import Task
 from .assignment import Assignment
 from .announcement import Announcement
@@ -8,6 +8,7 @@ from .message import Message
 from .system_setting import SystemSetting
 from .note import Note
 from .developer import Developer, DeveloperApp
+from .socket_outbox import SocketOutbox
 
 __all__ = [
     'User',
@@ -17,6 +18,8 @@ __all__ = [
     'ClassSubject',
     'Whiteboard',
     'WhiteboardStatusHistory', 
+    'WhiteboardAccess',
+    'WhiteboardChange',
     'Task',
     'Assignment',
     'Announcement',
@@ -24,5 +27,6 @@ __all__ = [
     'SystemSetting',
     'Note',
     'Developer',
-    'DeveloperApp'
+    'DeveloperApp',
+    'SocketOutbox'
 ]
\ No newline at end of file
@@ -13,6 +13,10 @@ class Announcement(db.Model):
     whiteboard = db.relationship('Whiteboard', backref=db.backref('announcements', lazy=True))
     teacher = db.relationship('User', foreign_keys=[teacher_id], backref=db.backref('created_announcements', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_announcement_whiteboard_created', 'whiteboard_id', 'created_at', 'id'),  # 按白板的游标分页
+    )
+    
     def __repr__(self):
         return f'<Announcement {self.title}>'
     
@@ -15,6 +15,11 @@ class Assignment(db.Model):
     whiteboard = db.relationship('Whiteboard', backref=db.backref('assignments', lazy=True))
     teacher = db.relationship('User', foreign_keys=[teacher_id], backref=db.backref('created_assignments', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_assignment_whiteboard_created', 'whiteboard_id', 'created_at', 'id'),  # 按白板的游标分页
+        db.Index('ix_assignment_whiteboard_due', 'whiteboard_id', 'due_date'),  # 按截止日期筛选
+    )
+    
     def __repr__(self):
         return f'<Assignment {self.title}>'
     
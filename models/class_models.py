@@ -58,6 +58,11 @@ class TeacherClass(db.Model):
     teacher = db.relationship('User', backref=db.backref('teaching_classes', lazy=True))
     class_obj = db.relationship('Class', backref=db.backref('teaching_teachers', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_teacher_class_class_teacher', 'class_id', 'teacher_id', 'is_approved'),
+        db.Index('ix_teacher_class_teacher_approved', 'teacher_id', 'is_approved'),  # 教师加入的班级
+    )
+    
     def __repr__(self):
         return f'<TeacherClass teacher:{self.teacher_id} class:{self.class_id}>'
     
@@ -74,5 +79,9 @@ class ClassSubject(db.Model):
     
     class_obj = db.relationship('Class', backref=db.backref('subjects', lazy=True, cascade='all, delete-orphan'))
     
+    __table_args__ = (
+        db.Index('ix_class_subject_class_id', 'class_id'),
+    )
+    
     def __repr__(self):
         return f'<ClassSubject {self.subject_name}>'
\ No newline at end of file
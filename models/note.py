@@ -1,6 +1,23 @@
 from extensions import db
 from utils.time_utils import get_china_time, format_china_time
 
+def format_file_size(file_size):
+    """格式化文件大小"""
+    if file_size < 1024:
+        return f"{file_size} B"
+    elif file_size < 1024 * 1024:
+        return f"{file_size / 1024:.1f} KB"
+    elif file_size < 1024 * 1024 * 1024:
+        return f"{file_size / (1024 * 1024):.1f} MB"
+    else:
+        return f"{file_size / (1024 * 1024 * 1024):.1f} GB"
+
+def split_tags(tags):
+    """把逗号分隔的标签拆分为列表"""
+    if tags:
+        return [tag.strip() for tag in tags.split(',') if tag.strip()]
+    return []
+
 class Note(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
@@ -29,6 +46,11 @@ class Note(db.Model):
     class_obj = db.relationship('Class', backref=db.backref('notes', lazy=True))
     uploader = db.relationship('User', foreign_keys=[uploaded_by], backref=db.backref('uploaded_notes', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_note_whiteboard_created', 'whiteboard_id', 'created_at'),  # 白板端笔记列表
+        db.Index('ix_note_class_created', 'class_id', 'created_at'),  # 网页端按班级列出笔记
+    )
+    
     def __repr__(self):
         return f'<Note {self.original_filename}>'
     
@@ -62,20 +84,59 @@ class Note(db.Model):
     
     def format_file_size(self):
         """格式化文件大小"""
-        if self.file_size < 1024:
-            return f"{self.file_size} B"
-        elif self.file_size < 1024 * 1024:
-            return f"{self.file_size / 1024:.1f} KB"
-        elif self.file_size < 1024 * 1024 * 1024:
-            return f"{self.file_size / (1024 * 1024):.1f} MB"
-        else:
-            return f"{self.file_size / (1024 * 1024 * 1024):.1f} GB"
+        return format_file_size(self.file_size)
     
     def get_tags_list(self):
         """获取标签列表"""
-        if self.tags:
-            return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
-        return []
+        return split_tags(self.tags)
+    
+    @staticmethod
+    def with_list_columns(query):
+        """列表查询只取 to_dict 需要的列，上传者、白板和班级名称通过连接一次取出"""
+        from models.class_models import Class
+        from models.user import User
+        from models.whiteboard import Whiteboard
+        return query.outerjoin(User, Note.uploaded_by == User.id) \
+            .outerjoin(Whiteboard, Note.whiteboard_id == Whiteboard.id) \
+            .outerjoin(Class, Note.class_id == Class.id) \
+            .with_entities(
+                Note.id, Note.filename, Note.original_filename, Note.file_path, Note.file_size,
+                Note.file_type, Note.mime_type, Note.whiteboard_id, Note.class_id, Note.uploaded_by,
+                Note.title, Note.description, Note.tags, Note.is_public, Note.download_count,
+                Note.created_at, Note.updated_at,
+                User.username.label('uploader_name'),
+                Whiteboard.name.label('whiteboard_name'),
+                Class.name.label('class_name')
+            )
+    
+    @staticmethod
+    def row_to_dict(row):
+        """把 with_list_columns 查询的结果行转换为与 to_dict 相同的字典"""
+        return {
+            'id': row.id,
+            'filename': row.filename,
+            'original_filename': row.original_filename,
+            'file_path': row.file_path,
+            'file_url': f"/uploads/{row.class_id}/{row.file_path}",
+            'file_size': row.file_size,
+            'file_size_formatted': format_file_size(row.file_size),
+            'file_type': row.file_type,
+            'mime_type': row.mime_type,
+            'whiteboard_id': row.whiteboard_id,
+            'class_id': row.class_id,
+            'uploaded_by': row.uploaded_by,
+            'uploader_name': row.uploader_name,
+            'title': row.title or row.original_filename,
+            'description': row.description,
+            'tags': row.tags,
+            'tags_list': split_tags(row.tags),
+            'is_public': row.is_public,
+            'download_count': row.download_count,
+            'created_at': format_china_time(row.created_at),
+            'updated_at': format_china_time(row.updated_at),
+            'whiteboard_name': row.whiteboard_name,
+            'class_name': row.class_name
+        }
     
     def increment_download_count(self):
         """增加下载计数"""
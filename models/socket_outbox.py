@@ -0,0 +1,21 @@
+from extensions import db
+from utils.time_utils import get_china_time
+
+class SocketOutbox(db.Model):
+    """待推送的 Socket.IO 事件，和触发它的数据修改在同一事务中写入，由 utils.socket_outbox 投递后删除"""
+    id = db.Column(db.Integer, primary_key=True)
+    event = db.Column(db.String(64), nullable=False)
+    room = db.Column(db.String(128), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    owner = db.Column(db.String(32), nullable=False)  # 写入事件的进程，优先由该进程投递
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=get_china_time)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=get_china_time)
+    
+    __table_args__ = (
+        db.Index('ix_socket_outbox_next_attempt', 'next_attempt_at', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<SocketOutbox {self.id} {self.event} -> {self.room}>'
@@ -18,6 +18,10 @@ class Task(db.Model):
     whiteboard = db.relationship('Whiteboard', backref=db.backref('tasks', lazy=True))
     teacher = db.relationship('User', foreign_keys=[teacher_id], backref=db.backref('created_tasks', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_task_whiteboard_created', 'whiteboard_id', 'created_at', 'id'),  # 按白板的游标分页
+    )
+    
     def __repr__(self):
         return f'<Task {self.title}>'
     
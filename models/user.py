@@ -19,6 +19,7 @@ class User(db.Model):
     organization = db.Column(db.String(50), default='student')  # student, teacher, developer
     
     user_token = db.Column(db.String(64), unique=True, nullable=True)
+    user_token_digest = db.Column(db.String(64), unique=True, index=True, nullable=True)  # 认证时按摘要查找
     token_created_at = db.Column(db.DateTime)
     
     def __repr__(self):
@@ -41,43 +42,28 @@ class User(db.Model):
     
     def generate_user_token(self):
         """生成用户token"""
+        from utils.auth_cache import hash_token
+        self._evict_cached_token()
         self.user_token = secrets.token_urlsafe(48)
+        self.user_token_digest = hash_token(self.user_token)
         self.token_created_at = get_china_time()
         return self.user_token
     
     def revoke_user_token(self):
         """撤销用户token"""
+        self._evict_cached_token()
         self.user_token = None
+        self.user_token_digest = None
         self.token_created_at = None
     
+    def _evict_cached_token(self):
+        """清除旧token的认证缓存（提交后会在所有工作进程中再清除一次）"""
+        if self.id is None:
+            return
+        from utils.auth_cache import user_token_cache
+        user_token_cache.invalidate_user_on_commit(db.session(), self.id)
+    
     def get_accessible_whiteboards(self):
-        """获取用户可以访问的所有白板"""
-        from models.class_models import TeacherClass
-        from models.whiteboard import Whiteboard
-        
-        accessible_whiteboards = []
-        
-        # 如果是教师，获取其管理的班级的白板
-        if self.role == 'teacher':
-            # 获取用户创建的班级
-            owned_classes = Class.query.filter_by(teacher_id=self.id).all()
-            for class_obj in owned_classes:
-                class_whiteboards = Whiteboard.query.filter_by(
-                    class_id=class_obj.id, 
-                    is_active=True
-                ).all()
-                accessible_whiteboards.extend(class_whiteboards)
-            
-            # 获取用户加入的班级
-            teacher_classes = TeacherClass.query.filter_by(
-                teacher_id=self.id, 
-                is_approved=True
-            ).all()
-            for tc in teacher_classes:
-                class_whiteboards = Whiteboard.query.filter_by(
-                    class_id=tc.class_id, 
-                    is_active=True
-                ).all()
-                accessible_whiteboards.extend(class_whiteboards)
-        
-        return accessible_whiteboards
\ No newline at end of file
+        """获取用户可以访问的所有白板（班主任和已批准的授课老师）"""
+        from utils.access_control import get_accessible_whiteboards
+        return get_accessible_whiteboards(self.id)
\ No newline at end of file
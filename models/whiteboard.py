@@ -16,6 +16,7 @@ class Whiteboard(db.Model):
     last_heartbeat = db.Column(db.DateTime)
     token = db.Column(db.String(100), unique=True)
     token_created_at = db.Column(db.DateTime, default=get_china_time)
+    content_version = db.Column(db.Integer, default=0, nullable=False)  # 任务、作业、公告、笔记变化时递增
     
     class_obj = db.relationship('Class', backref=db.backref('whiteboards', lazy=True))
     
@@ -45,13 +46,21 @@ class Whiteboard(db.Model):
         return self.token
 
 class WhiteboardStatusHistory(db.Model):
+    """白板在线区间：online_until 为空表示白板仍在线，is_online 标记区间是否仍未结束"""
     id = db.Column(db.Integer, primary_key=True)
     whiteboard_id = db.Column(db.Integer, db.ForeignKey('whiteboard.id'), nullable=False)
     is_online = db.Column(db.Boolean, default=False)
     recorded_at = db.Column(db.DateTime, default=get_china_time)
+    online_from = db.Column(db.DateTime)
+    online_until = db.Column(db.DateTime)
     
     whiteboard = db.relationship('Whiteboard', backref=db.backref('status_history', lazy=True))
     
+    __table_args__ = (
+        db.Index('ix_whiteboard_status_history_whiteboard_from', 'whiteboard_id', 'online_from'),
+        db.Index('ix_whiteboard_status_history_whiteboard_until', 'whiteboard_id', 'online_until'),  # 查找未结束的区间
+    )
+    
     def __repr__(self):
         return f'<WhiteboardStatusHistory whiteboard:{self.whiteboard_id} online:{self.is_online}>'
     
@@ -61,5 +70,47 @@ class WhiteboardStatusHistory(db.Model):
             'whiteboard_id': self.whiteboard_id,
             'is_online': self.is_online,
             'recorded_at': format_china_time(self.recorded_at),
+            'online_from': format_china_time(self.online_from),
+            'online_until': format_china_time(self.online_until),
             'whiteboard_name': self.whiteboard.name if self.whiteboard else None
-        }
\ No newline at end of file
+        }
+
+class WhiteboardAccess(db.Model):
+    """用户可访问白板的物化表，由 utils/access_control.py 按班级重建
+
+    role 为 class_teacher（班主任）或 teaching_teacher（授课老师）；
+    subjects_bitmap 的第 i 位对应班级按 id 排序的第 i 个学科。
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    whiteboard_id = db.Column(db.Integer, db.ForeignKey('whiteboard.id'), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    subjects_bitmap = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'whiteboard_id', name='uq_whiteboard_access_user_whiteboard'),
+        db.Index('ix_whiteboard_access_class_id', 'class_id'),
+    )
+    
+    def __repr__(self):
+        return f'<WhiteboardAccess user:{self.user_id} whiteboard:{self.whiteboard_id} {self.role}>'
+
+class WhiteboardChange(db.Model):
+    """白板内容变更日志（只追加），id 即同步游标；op 为 delete 时 payload 为空"""
+    id = db.Column(db.Integer, primary_key=True)
+    whiteboard_id = db.Column(db.Integer, db.ForeignKey('whiteboard.id'), nullable=False)
+    entity_type = db.Column(db.String(20), nullable=False)  # task, assignment, announcement, note
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # create, update, delete
+    payload = db.Column(db.Text)  # JSON
+    changed_at = db.Column(db.DateTime, default=get_china_time)
+    
+    __table_args__ = (
+        db.Index('ix_whiteboard_change_whiteboard_cursor', 'whiteboard_id', 'id'),
+        db.Index('ix_whiteboard_change_changed_at', 'changed_at'),
+        {'sqlite_autoincrement': True},  # 游标不能因删除旧记录而被复用
+    )
+    
+    def __repr__(self):
+        return f'<WhiteboardChange {self.id} {self.entity_type}:{self.entity_id} {self.op}>'
\ No newline at end of file
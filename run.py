@@ -1,7 +1,11 @@
+# 协程模式下必须先替换标准库，再导入其他模块
+from config import Config
+from utils.async_mode import monkey_patch, THREADING
+monkey_patch(Config.SOCKETIO_ASYNC_MODE)
+
 import os
 import sys
 from app import app, socketio, db
-from config import Config
 import logging
 logging.basicConfig(level=logging.DEBUG)
 
@@ -10,18 +14,29 @@ def main():
         print("启动班级管理系统...")
         print(f"调试模式: {app.debug}")
         print(f"数据库: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        print(f"并发模型: {socketio.async_mode}")
         
         with app.app_context():
             db.create_all()
             print("数据库表已初始化")
         
+        if app.config['WORKER_ROLE'] == 'scheduler':
+            # 只运行定时任务，推送经消息队列送达处理请求的进程
+            print("工作进程角色: scheduler，不处理请求")
+            while True:
+                socketio.sleep(60)
+        
+        options = {}
+        if socketio.async_mode == THREADING:
+            # Werkzeug 开发服务器，仅用于开发调试
+            options['allow_unsafe_werkzeug'] = True
         socketio.run(
             app,
-            host='0.0.0.0',
-            port=5000,
-            debug=True,
+            host=app.config['SERVER_HOST'],
+            port=app.config['SERVER_PORT'],
+            debug=app.config['SERVER_DEBUG'],
             use_reloader=False,
-            allow_unsafe_werkzeug=True
+            **options
         )
     except Exception as e:
         print(f"启动失败: {str(e)}")
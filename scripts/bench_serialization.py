@@ -0,0 +1,118 @@
+"""白板列表接口序列化基准测试
+
+在临时 SQLite 数据库中为一块白板生成任务，对比两种实现读取并编码全部任务的耗时和内存分配：
+  旧实现：查询完整 ORM 对象，strftime 格式化时间，标准库 json 编码（Flask 默认）
+  新实现：只查询需要的列，isoformat 格式化时间，orjson 编码（已安装时）
+
+用法：python scripts/bench_serialization.py [行数] [重复次数]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 必须在导入 app 之前指定临时数据库
+_db_file = tempfile.mktemp(suffix='.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file
+
+from app import app, db
+from models import User, Class, Whiteboard, Task
+from utils.board_payloads import task_payload, TASK_COLUMNS
+from utils.serialization import json_backend
+from utils.time_utils import get_china_time
+
+def _legacy_time(dt):
+    return dt.strftime('%Y-%m-%d %H:%M:%S') if dt else None
+
+def legacy(whiteboard_id):
+    tasks = Task.query.filter_by(whiteboard_id=whiteboard_id).order_by(Task.created_at.desc(), Task.id.desc()).all()
+    data = [{
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'priority': task.priority,
+        'action_id': task.action_id,
+        'due_date': _legacy_time(task.due_date),
+        'is_acknowledged': task.is_acknowledged,
+        'is_completed': task.is_completed,
+        'created_at': _legacy_time(task.created_at)
+    } for task in tasks]
+    body = json.dumps({'success': True, 'data': data, 'count': len(data)}, sort_keys=True, separators=(',', ':'))
+    db.session.expunge_all()
+    return body.encode('utf-8')
+
+def projected(whiteboard_id):
+    rows = Task.query.filter_by(whiteboard_id=whiteboard_id).with_entities(*TASK_COLUMNS) \
+        .order_by(Task.created_at.desc(), Task.id.desc()).all()
+    data = [task_payload(row) for row in rows]
+    return app.json.encode({'success': True, 'data': data, 'count': len(data)})
+
+def seed(rows):
+    teacher = User(casdoor_id='bench', username='bench', role='teacher', organization='bench')
+    db.session.add(teacher)
+    db.session.flush()
+    class_obj = Class(name='bench', code='BENCH1', teacher_id=teacher.id)
+    db.session.add(class_obj)
+    db.session.flush()
+    whiteboard = Whiteboard(name='bench', board_id='BENCH', secret_key='bench', class_id=class_obj.id)
+    db.session.add(whiteboard)
+    db.session.flush()
+
+    now = get_china_time()
+    db.session.execute(Task.__table__.insert(), [{
+        'title': f'任务 {i}',
+        'description': '今天的课堂任务说明' * 4,
+        'priority': i % 3 + 1,
+        'action_id': 0,
+        'whiteboard_id': whiteboard.id,
+        'teacher_id': teacher.id,
+        'created_at': now - timedelta(seconds=i),
+        'due_date': now + timedelta(days=1),
+        'is_completed': False,
+        'is_acknowledged': bool(i % 2)
+    } for i in range(rows)])
+    db.session.commit()
+    return whiteboard.id
+
+def measure(fn, whiteboard_id, repeat):
+    fn(whiteboard_id)  # 预热
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(whiteboard_id)
+    elapsed = (time.perf_counter() - started) / repeat
+
+    tracemalloc.start()
+    body = fn(whiteboard_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, body
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    try:
+        with app.app_context():
+            db.create_all()
+            whiteboard_id = seed(rows)
+
+            before = measure(legacy, whiteboard_id, repeat)
+            after = measure(projected, whiteboard_id, repeat)
+            assert json.loads(before[2]) == json.loads(after[2]), '两种实现的输出不一致'
+
+            print(f"行数: {rows}，重复: {repeat}，JSON 编码: {json_backend()}")
+            print(f"{'':8}{'耗时(ms)':>12}{'峰值内存(MB)':>16}{'响应大小(KB)':>16}")
+            for name, (elapsed, peak, body) in (('旧实现', before), ('新实现', after)):
+                print(f"{name:8}{elapsed * 1000:>12.1f}{peak / 1024 / 1024:>16.1f}{len(body) / 1024:>16.1f}")
+            print(f"耗时降低 {(1 - after[0] / before[0]) * 100:.0f}%，峰值内存降低 {(1 - after[1] / before[1]) * 100:.0f}%")
+    finally:
+        os.remove(_db_file)
+
+if __name__ == '__main__':
+    main()
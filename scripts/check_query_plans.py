@@ -0,0 +1,182 @@
+"""热点查询的执行计划检查
+
+在一个新建并填充了测试数据的数据库上对关键查询执行 EXPLAIN，任何查询退化为全表扫描时以非零状态退出。
+默认使用临时 SQLite 数据库；指定 --database-url 时检查该数据库（PostgreSQL 下会关闭 enable_seqscan，
+出现 Seq Scan 即说明没有可用的索引）。会在该数据库中建表并写入数据，请勿指向生产库。
+
+用法：python scripts/check_query_plans.py [--database-url URL] [--verbose]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='检查热点查询是否使用索引')
+    parser.add_argument('--database-url', help='要检查的数据库，默认使用临时 SQLite 数据库')
+    parser.add_argument('--verbose', action='store_true', help='输出每条查询的完整执行计划')
+    return parser.parse_args()
+
+ARGS = parse_args()
+_db_file = None
+if ARGS.database_url:
+    os.environ['DATABASE_URL'] = ARGS.database_url
+else:
+    _db_file = tempfile.mktemp(suffix='.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file
+
+from sqlalchemy import select, func
+from app import app, db
+from models import (
+    User, Class, TeacherClass, ClassSubject, Whiteboard, WhiteboardStatusHistory,
+    WhiteboardAccess, WhiteboardChange, Task, Assignment, Announcement, Note
+)
+from utils.auth_cache import hash_token
+from utils.board_payloads import TASK_COLUMNS, ASSIGNMENT_COLUMNS, ANNOUNCEMENT_COLUMNS
+from utils.timeline import build_timeline_query, KIND_ANNOUNCEMENT
+from utils.time_utils import get_china_time
+
+def seed():
+    """每张表写入少量数据，保证执行计划不因空表而失真"""
+    now = get_china_time()
+    teachers = [User(casdoor_id=f'plan-{i}', username=f'plan-{i}', role='teacher', organization='plan') for i in range(3)]
+    db.session.add_all(teachers)
+    db.session.flush()
+    classes = [Class(name=f'plan-{i}', code=f'PLAN{i:02d}', teacher_id=teachers[0].id) for i in range(3)]
+    db.session.add_all(classes)
+    db.session.flush()
+
+    for class_obj in classes:
+        db.session.add(ClassSubject(class_id=class_obj.id, subject_name='数学'))
+        for teacher in teachers[1:]:
+            db.session.add(TeacherClass(class_id=class_obj.id, teacher_id=teacher.id, is_approved=True))
+        for i in range(2):
+            db.session.add(Whiteboard(name=f'plan-{class_obj.id}-{i}', board_id=f'PLAN-{class_obj.id}-{i}',
+                                      secret_key='plan', class_id=class_obj.id))
+    db.session.flush()
+
+    for whiteboard in Whiteboard.query.all():
+        for i in range(20):
+            created_at = now - timedelta(hours=i)
+            db.session.add(Task(title=f't{i}', whiteboard_id=whiteboard.id, teacher_id=teachers[0].id, created_at=created_at))
+            db.session.add(Announcement(title=f'a{i}', content='c', whiteboard_id=whiteboard.id,
+                                        teacher_id=teachers[0].id, created_at=created_at))
+            db.session.add(Assignment(title=f's{i}', description='d', subject='数学', due_date=created_at + timedelta(days=1),
+                                      whiteboard_id=whiteboard.id, teacher_id=teachers[0].id, created_at=created_at))
+            db.session.add(Note(filename='f', original_filename='f.pdf', file_path='f.pdf', file_size=1, file_type='pdf',
+                                whiteboard_id=whiteboard.id, class_id=whiteboard.class_id,
+                                uploaded_by=teachers[0].id, created_at=created_at))
+            db.session.add(WhiteboardStatusHistory(whiteboard_id=whiteboard.id, is_online=False,
+                                                   online_from=created_at, online_until=created_at + timedelta(minutes=30)))
+    db.session.commit()
+
+    from utils.access_control import rebuild_all_access
+    rebuild_all_access(lambda message: None)
+
+def hot_queries():
+    """(名称, 语句)，与各接口实际使用的查询保持一致"""
+    now = get_china_time()
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    day_end = day_start + timedelta(days=1)
+    whiteboard_id, class_id, teacher_id = 1, 1, 2
+
+    def board_page(model, columns):
+        return (
+            select(*columns)
+            .where(model.whiteboard_id == whiteboard_id)
+            .where(db.or_(model.created_at < now, db.and_(model.created_at == now, model.id < 100)))
+            .order_by(model.created_at.desc(), model.id.desc())
+            .limit(51)
+        )
+
+    return [
+        ('白板任务分页', board_page(Task, TASK_COLUMNS)),
+        ('白板公告分页', board_page(Announcement, ANNOUNCEMENT_COLUMNS)),
+        ('白板作业分页', board_page(Assignment, ASSIGNMENT_COLUMNS)),
+        ('白板作业按截止日期', select(*ASSIGNMENT_COLUMNS).where(
+            Assignment.whiteboard_id == whiteboard_id, Assignment.due_date >= day_start, Assignment.due_date < day_end)),
+        ('白板任务按日期', select(*TASK_COLUMNS).where(
+            Task.whiteboard_id == whiteboard_id, Task.created_at >= day_start, Task.created_at < day_end)),
+        ('合并时间线', build_timeline_query(whiteboard_id, day_start, day_end, assignments_by_due_date=True,
+                                            limit=51, after=(now, KIND_ANNOUNCEMENT, 100))),
+        ('白板笔记列表', select(Note.id).where(Note.whiteboard_id == whiteboard_id)
+            .order_by(Note.created_at.desc()).limit(20)),
+        ('班级笔记列表', select(Note.id).where(Note.class_id == class_id)
+            .order_by(Note.created_at.desc()).limit(20)),
+        ('班级教师关系', select(TeacherClass.id).where(
+            TeacherClass.class_id == class_id, TeacherClass.teacher_id == teacher_id, TeacherClass.is_approved == True)),
+        ('教师加入的班级', select(TeacherClass.class_id).where(
+            TeacherClass.teacher_id == teacher_id, TeacherClass.is_approved == True)),
+        ('班级科目', select(ClassSubject.subject_name).where(ClassSubject.class_id == class_id)),
+        ('未结束的在线区间', select(WhiteboardStatusHistory.id).where(
+            WhiteboardStatusHistory.whiteboard_id == whiteboard_id,
+            WhiteboardStatusHistory.online_from.isnot(None),
+            WhiteboardStatusHistory.online_until.is_(None))),
+        ('在线区间范围', select(WhiteboardStatusHistory.online_from, WhiteboardStatusHistory.online_until).where(
+            WhiteboardStatusHistory.whiteboard_id == whiteboard_id,
+            WhiteboardStatusHistory.online_from < day_end,
+            db.or_(WhiteboardStatusHistory.online_until.is_(None), WhiteboardStatusHistory.online_until > day_start))
+            .order_by(WhiteboardStatusHistory.online_from)),
+        ('白板变更日志', select(WhiteboardChange.id).where(
+            WhiteboardChange.whiteboard_id == whiteboard_id, WhiteboardChange.id > 10)
+            .order_by(WhiteboardChange.id).limit(201)),
+        ('教师可访问的白板', select(WhiteboardAccess.whiteboard_id).where(WhiteboardAccess.user_id == teacher_id)),
+        ('白板访问权限', select(WhiteboardAccess.role).where(
+            WhiteboardAccess.user_id == teacher_id, WhiteboardAccess.whiteboard_id == whiteboard_id)),
+        ('用户token认证', select(User.id).where(User.user_token_digest == hash_token('plan'))),
+        ('白板凭证认证', select(Whiteboard.id).where(Whiteboard.board_id == 'PLAN-1-0')),
+        ('笔记总大小', select(func.sum(Note.file_size)).where(Note.whiteboard_id == whiteboard_id)),
+    ]
+
+def explain(connection, statement):
+    """返回 (执行计划文本行, 全表扫描的表)"""
+    tables = set(db.metadata.tables)
+    sql = str(statement.compile(connection.engine, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        lines = [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+        full_scans = []
+        for line in lines:
+            words = line.split()
+            # SCAN <表名> 且没有使用索引即为全表扫描；SCAN 子查询或 CTE 不算
+            if len(words) >= 2 and words[0] == 'SCAN' and words[1] in tables and 'USING' not in words:
+                full_scans.append(words[1])
+        return lines, full_scans
+
+    lines = [row[0] for row in connection.exec_driver_sql('EXPLAIN ' + sql)]
+    full_scans = [line.split(' on ')[1].split()[0] for line in lines if 'Seq Scan on ' in line]
+    return lines, full_scans
+
+def main():
+    try:
+        with app.app_context():
+            db.create_all()
+            seed()
+
+            failures = 0
+            with db.engine.connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    connection.exec_driver_sql('SET enable_seqscan = off')
+                for name, statement in hot_queries():
+                    lines, full_scans = explain(connection, statement)
+                    status = '全表扫描: ' + ', '.join(full_scans) if full_scans else 'OK'
+                    print(f"{name:<12} {status}")
+                    if ARGS.verbose or full_scans:
+                        for line in lines:
+                            print(f"    {line}")
+                    failures += bool(full_scans)
+
+            if failures:
+                print(f"\n{failures} 条查询退化为全表扫描")
+                return 1
+            print("\n所有查询均使用了索引")
+            return 0
+    finally:
+        if _db_file and os.path.exists(_db_file):
+            os.remove(_db_file)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""白板 Socket.IO 长连接压测
+
+按阶梯建立白板 WebSocket 连接（Engine.IO v4 协议），每一级保持一段时间：期间定时发送 heartbeat 事件、
+响应服务器 ping，并探测一个 HTTP 接口的延迟。输出每一级建立成功、保持存活的连接数和延迟，
+存活数低于目标时停止加压。客户端用单线程 selectors 维持所有连接，本身不会成为线程瓶颈。
+
+指定 --mode 时在本机临时数据库上启动 run.py（可重复指定以对比各并发模型），否则压测 --url 指向的服务器。
+需要安装 websocket-client（pip install websocket-client），连接数较多时注意 ulimit -n。
+
+用法：
+    python scripts/socket_load_test.py --mode threading --mode gevent --levels 250,500,1000,2000
+    python scripts/socket_load_test.py --url http://host:5000 --board-id B1 --secret-key S1
+"""
+import argparse
+import json
+import os
+import resource
+import selectors
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import websocket
+except ImportError:
+    sys.exit('需要安装 websocket-client：pip install websocket-client')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='白板 Socket.IO 长连接压测')
+    parser.add_argument('--mode', action='append', choices=['threading', 'gevent', 'eventlet'],
+                        help='在本机启动 run.py 并使用该并发模型，可重复指定')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='未指定 --mode 时压测的服务器地址')
+    parser.add_argument('--board-id', help='白板 ID（压测外部服务器时必填）')
+    parser.add_argument('--secret-key', help='白板密钥（压测外部服务器时必填）')
+    parser.add_argument('--levels', default='100,250,500,1000', help='逐级建立的连接总数，逗号分隔')
+    parser.add_argument('--hold', type=float, default=15, help='每一级保持的秒数')
+    parser.add_argument('--heartbeat', type=float, default=10, help='每个连接发送 heartbeat 事件的间隔（秒）')
+    parser.add_argument('--concurrency', type=int, default=50, help='同时进行握手的连接数')
+    parser.add_argument('--connect-timeout', type=float, default=10, help='单个连接握手的超时（秒）')
+    return parser.parse_args()
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def ms(value):
+    return '-' if value is None else f'{value * 1000:.0f}ms'
+
+class BoardSocket:
+    """一个白板的 Socket.IO 连接，只实现压测需要的握手、ping 和事件发送"""
+
+    def __init__(self, ws_url, board_id, timeout):
+        self.board_id = board_id
+        started = time.perf_counter()
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, enable_multithread=False)
+        try:
+            self._handshake(started + timeout)
+        except Exception:
+            self.ws.close()
+            raise
+        self.latency = time.perf_counter() - started
+        self.next_heartbeat = 0
+
+    def _handshake(self, deadline):
+        # 0{...} 为 Engine.IO open 包，随后连接默认命名空间并等待服务器的 connected 事件
+        if not self.ws.recv().startswith('0'):
+            raise RuntimeError('unexpected open packet')
+        self.ws.send('40')
+        while time.perf_counter() < deadline:
+            packet = self.ws.recv()
+            if packet == '2':
+                self.ws.send('3')
+            elif packet.startswith('44'):
+                raise RuntimeError('connect rejected')
+            elif packet.startswith('42'):
+                name, data = json.loads(packet[2:])[:2]
+                if name == 'connected':
+                    if data.get('status') != 'success':
+                        raise RuntimeError(data.get('message', 'auth failed'))
+                    return
+        raise TimeoutError('handshake timeout')
+
+    def fileno(self):
+        return self.ws.sock.fileno()
+
+    def handle_readable(self):
+        """处理一个到达的包，连接已关闭时返回 False"""
+        opcode, data = self.ws.recv_data()
+        if opcode == websocket.ABNF.OPCODE_CLOSE:
+            return False
+        if data == b'2':
+            self.ws.send('3')
+        return True
+
+    def send_heartbeat(self):
+        self.ws.send('42' + json.dumps(['heartbeat', {'board_id': self.board_id}]))
+
+    def close(self):
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+def open_sockets(count, ws_url, board_id, args):
+    def connect(_):
+        try:
+            return BoardSocket(ws_url, board_id, args.connect_timeout)
+        except Exception as e:
+            return f'{type(e).__name__}: {e}'
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(connect, range(count)))
+    sockets = [result for result in results if isinstance(result, BoardSocket)]
+    errors = [result for result in results if not isinstance(result, BoardSocket)]
+    return sockets, errors
+
+def hold(sockets, http_probe, args):
+    """保持连接 args.hold 秒，返回 (存活的连接, HTTP 探测延迟列表)"""
+    selector = selectors.DefaultSelector()
+    alive = set(sockets)
+    now = time.monotonic()
+    for i, s in enumerate(sockets):
+        selector.register(s.fileno(), selectors.EVENT_READ, s)
+        # 把心跳均匀分散在一个间隔内
+        s.next_heartbeat = now + args.heartbeat * i / max(1, len(sockets))
+
+    def drop(s):
+        selector.unregister(s.fileno())
+        s.close()
+        alive.discard(s)
+
+    probe_latencies = []
+    next_probe = now
+    deadline = now + args.hold
+    try:
+        while alive and time.monotonic() < deadline:
+            for key, _ in selector.select(0.05):
+                try:
+                    if not key.data.handle_readable():
+                        drop(key.data)
+                except Exception:
+                    drop(key.data)
+
+            now = time.monotonic()
+            for s in [s for s in alive if s.next_heartbeat <= now]:
+                try:
+                    s.send_heartbeat()
+                    s.next_heartbeat = now + args.heartbeat
+                except Exception:
+                    drop(s)
+
+            if now >= next_probe:
+                probe_latencies.append(http_probe())
+                next_probe = now + 1
+    finally:
+        selector.close()
+    return list(alive), [latency for latency in probe_latencies if latency is not None]
+
+def make_http_probe(base_url, board_id, secret_key):
+    def probe():
+        request = urllib.request.Request(f'{base_url}/api/whiteboard/tasks', headers={
+            'X-Board-ID': board_id, 'X-Secret-Key': secret_key
+        })
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        except Exception:
+            return None
+        return time.perf_counter() - started
+    return probe
+
+def process_usage(pid):
+    """(常驻内存 MB, 线程数)，仅 Linux"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            fields = dict(line.split(':', 1) for line in f)
+        return int(fields['VmRSS'].split()[0]) // 1024, int(fields['Threads'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def run_levels(base_url, board_id, secret_key, args, server_pid=None):
+    ws_url = base_url.replace('http', 'ws', 1) + '/socket.io/?' + urlencode({
+        'EIO': 4, 'transport': 'websocket', 'board_id': board_id, 'secret_key': secret_key
+    })
+    http_probe = make_http_probe(base_url, board_id, secret_key)
+    levels = [int(level) for level in args.levels.split(',')]
+
+    print(f"{'目标':>6} {'建立':>6} {'存活':>6} {'失败':>6} {'握手p50':>8} {'握手p95':>8} {'HTTP p50':>9} {'HTTP p95':>9} {'内存':>7} {'线程':>6}")
+    sockets = []
+    sustained = 0
+    try:
+        for level in levels:
+            new_sockets, errors = open_sockets(level - len(sockets), ws_url, board_id, args)
+            latencies = [s.latency for s in new_sockets]
+            established = len(sockets) + len(new_sockets)
+            sockets, probes = hold(sockets + new_sockets, http_probe, args)
+
+            rss, threads = process_usage(server_pid) if server_pid else (None, None)
+            print(f"{level:>6} {established:>6} {len(sockets):>6} {len(errors):>6} "
+                  f"{ms(percentile(latencies, 50)):>8} {ms(percentile(latencies, 95)):>8} "
+                  f"{ms(percentile(probes, 50)):>9} {ms(percentile(probes, 95)):>9} "
+                  f"{'-' if rss is None else f'{rss}MB':>7} {'-' if threads is None else threads:>6}")
+            if errors:
+                print(f"       失败示例: {errors[0]}")
+            if len(sockets) < level:
+                break
+            sustained = level
+    finally:
+        for s in sockets:
+            s.close()
+    return sustained
+
+def seed_board(database_url):
+    """在临时数据库中建表并创建一个白板，返回 (board_id, secret_key)"""
+    os.environ['DATABASE_URL'] = database_url
+    from app import app, db
+    from models import User, Class, Whiteboard
+
+    with app.app_context():
+        db.create_all()
+        teacher = User(casdoor_id='load-test', username='load-test', role='teacher', organization='load-test')
+        db.session.add(teacher)
+        db.session.flush()
+        class_obj = Class(name='load-test', code='LOAD01', teacher_id=teacher.id)
+        db.session.add(class_obj)
+        db.session.flush()
+        db.session.add(Whiteboard(name='load-test', board_id='LOAD-TEST', secret_key='load-test', class_id=class_obj.id))
+        db.session.commit()
+        db.engine.dispose()
+    return 'LOAD-TEST', 'load-test'
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def spawn_server(mode, database_url, log_path):
+    port = free_port()
+    env = dict(os.environ, SOCKETIO_ASYNC_MODE=mode, SERVER_HOST='127.0.0.1', SERVER_PORT=str(port),
+               DATABASE_URL=database_url)
+    log = open(log_path, 'w')
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'run.py')], cwd=ROOT, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{mode} 服务器启动失败，日志见 {log_path}')
+        try:
+            urllib.request.urlopen(f'{base_url}/socket.io/?EIO=4&transport=polling', timeout=1).read()
+            return process, base_url
+        except Exception:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{mode} 服务器启动超时，日志见 {log_path}')
+
+def main():
+    args = parse_args()
+    raise_fd_limit()
+
+    if not args.mode:
+        if not args.board_id or not args.secret_key:
+            sys.exit('压测外部服务器时需要提供 --board-id 和 --secret-key')
+        sustained = run_levels(args.url.rstrip('/'), args.board_id, args.secret_key, args)
+        print(f"\n保持存活的最大连接数: {sustained}")
+        return
+
+    db_file = tempfile.mktemp(suffix='.db')
+    database_url = 'sqlite:///' + db_file
+    try:
+        board_id, secret_key = seed_board(database_url)
+        results = {}
+        for mode in args.mode:
+            log_path = os.path.join(tempfile.gettempdir(), f'socket_load_test_{mode}.log')
+            print(f"\n== {mode}（服务器日志: {log_path}）")
+            process, base_url = spawn_server(mode, database_url, log_path)
+            try:
+                results[mode] = run_levels(base_url, board_id, secret_key, args, server_pid=process.pid)
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+        print("\n保持存活的最大连接数:")
+        for mode, sustained in results.items():
+            print(f"  {mode:<10} {sustained}")
+    finally:
+        for path in (db_file, db_file + '-wal', db_file + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+if __name__ == '__main__':
+    main()
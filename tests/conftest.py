@@ -0,0 +1,89 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 配置在导入 app 时读取，需要先设置环境变量
+_db_file = tempfile.mktemp(suffix='.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file
+os.environ['DB_PROFILE'] = 'default'
+os.environ.pop('DATABASE_REPLICA_URL', None)
+os.environ.pop('SOCKETIO_MESSAGE_QUEUE', None)
+os.environ.pop('CACHE_BUS_URL', None)
+os.environ['SOCKETIO_ASYNC_MODE'] = 'threading'
+# 测试中只处理请求，不启动定时任务
+os.environ['WORKER_ROLE'] = 'web'
+# 超过上限的请求在测试模式下直接失败，用于发现 N+1 查询
+os.environ['SQL_STATEMENT_LIMIT'] = '15'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app
+from extensions import db
+from models import User, Class, ClassSubject, Whiteboard
+from utils.access_control import rebuild_class_access
+from utils.auth_cache import board_credential_cache, user_token_cache
+from utils.permissions import class_permissions
+from utils.presence import presence_registry
+from utils.response_cache import response_cache
+
+BOARD_HEADERS = {'X-Board-ID': 'B1', 'X-Secret-Key': 'S1'}
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    yield flask_app
+    for path in (_db_file, _db_file + '-wal', _db_file + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+@pytest.fixture(autouse=True)
+def database(app):
+    """每个测试使用全新的表，并清空进程内缓存"""
+    with app.app_context():
+        db.create_all()
+    yield
+    with app.app_context():
+        db.session.rollback()
+        whiteboard_ids = db.session.execute(db.select(Whiteboard.id)).scalars().all()
+        # 先写回本测试积累的心跳，避免写进下一个测试的数据库
+        presence_registry.flush()
+        for whiteboard_id in whiteboard_ids:
+            presence_registry.forget(whiteboard_id)
+        response_cache.invalidate_whiteboards(whiteboard_ids)
+        db.session.remove()
+        db.drop_all()
+    board_credential_cache.clear()
+    user_token_cache.clear()
+    class_permissions.clear()
+
+@pytest.fixture
+def board(app):
+    """一个班主任、一个班级（数学、语文）和一块白板，返回各自的 id"""
+    with app.app_context():
+        teacher = User(casdoor_id='t1', username='teacher', role='teacher', organization='teacher')
+        db.session.add(teacher)
+        db.session.flush()
+        class_obj = Class(name='class', code='ABC123', teacher_id=teacher.id)
+        db.session.add(class_obj)
+        db.session.flush()
+        db.session.add_all([
+            ClassSubject(class_id=class_obj.id, subject_name='数学'),
+            ClassSubject(class_id=class_obj.id, subject_name='语文')
+        ])
+        whiteboard = Whiteboard(name='board', board_id='B1', secret_key='S1', class_id=class_obj.id)
+        db.session.add(whiteboard)
+        db.session.flush()
+        rebuild_class_access(class_obj.id)
+        db.session.commit()
+        return {'teacher_id': teacher.id, 'class_id': class_obj.id, 'whiteboard_id': whiteboard.id}
+
+@pytest.fixture
+def teacher_client(app, board):
+    """以班主任身份登录的测试客户端"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = board['teacher_id']
+        session['role'] = 'teacher'
+    return client
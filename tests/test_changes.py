@@ -0,0 +1,91 @@
+import pytest
+
+from conftest import BOARD_HEADERS
+from extensions import db
+from models import Whiteboard
+from utils.change_log import compact_change_log
+
+CHANGES_URL = '/api/whiteboard/changes'
+
+@pytest.fixture
+def board_client(app):
+    return app.test_client()
+
+def create_task(teacher_client, whiteboard_id, title):
+    response = teacher_client.post(f'/whiteboards/{whiteboard_id}/create_task', json={'title': title})
+    assert response.status_code == 200
+    return response.get_json()['task_id']
+
+def get_changes(board_client, **params):
+    response = board_client.get(CHANGES_URL, query_string=params, headers=BOARD_HEADERS)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_snapshot_then_delta(board, teacher_client, board_client):
+    whiteboard_id = board['whiteboard_id']
+    first = create_task(teacher_client, whiteboard_id, 'first')
+
+    snapshot = get_changes(board_client)
+    assert snapshot['mode'] == 'snapshot'
+    assert [task['id'] for task in snapshot['data']['tasks']] == [first]
+
+    # 快照的游标之后没有变更
+    empty = get_changes(board_client, since=snapshot['cursor'])
+    assert empty['mode'] == 'delta'
+    assert empty['changes'] == [] and empty['cursor'] == snapshot['cursor'] and not empty['has_more']
+
+    second = create_task(teacher_client, whiteboard_id, 'second')
+    assert board_client.post(f'/api/whiteboard/tasks/{second}/acknowledge', headers=BOARD_HEADERS).status_code == 200
+    assert teacher_client.post(f'/tasks/{first}/delete').status_code == 200
+
+    delta = get_changes(board_client, since=snapshot['cursor'])
+    assert [(change['id'], change['op']) for change in delta['changes']] == [
+        (second, 'create'), (second, 'update'), (first, 'delete')
+    ]
+    assert delta['changes'][1]['data']['is_acknowledged'] is True
+    assert delta['changes'][2]['data'] is None
+    cursors = [change['cursor'] for change in delta['changes']]
+    assert cursors == sorted(cursors) and cursors[0] > snapshot['cursor']
+    assert delta['cursor'] == cursors[-1]
+
+def test_paging_visits_every_change_once(board, teacher_client, board_client):
+    task_ids = [create_task(teacher_client, board['whiteboard_id'], f'task {i}') for i in range(5)]
+
+    seen, cursor = [], 0
+    for _ in range(10):
+        page = get_changes(board_client, since=cursor, limit=2)
+        assert len(page['changes']) <= 2
+        seen.extend(change['id'] for change in page['changes'])
+        cursor = page['cursor']
+        if not page['has_more']:
+            break
+    assert seen == task_ids
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_non_positive_limit_is_rejected(board, board_client, limit):
+    response = board_client.get(CHANGES_URL, query_string={'since': 0, 'limit': limit}, headers=BOARD_HEADERS)
+    assert response.status_code == 400
+
+def test_other_boards_changes_are_not_returned(app, board, teacher_client, board_client):
+    with app.app_context():
+        other = Whiteboard(name='other', board_id='B2', secret_key='S2', class_id=board['class_id'])
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+    create_task(teacher_client, other_id, 'elsewhere')
+    mine = create_task(teacher_client, board['whiteboard_id'], 'mine')
+
+    delta = get_changes(board_client, since=0)
+    assert [change['id'] for change in delta['changes']] == [mine]
+
+def test_compacted_cursor_falls_back_to_snapshot(app, board, teacher_client, board_client):
+    task_id = create_task(teacher_client, board['whiteboard_id'], 'old')
+    stale_cursor = get_changes(board_client, since=0)['cursor'] - 1
+    with app.app_context():
+        assert compact_change_log(retention_days=-1) == 1
+
+    result = get_changes(board_client, since=stale_cursor)
+    assert result['mode'] == 'snapshot'
+    assert [task['id'] for task in result['data']['tasks']] == [task_id]
+    # 快照返回的游标不低于压缩线，可以继续增量同步
+    assert get_changes(board_client, since=result['cursor'])['mode'] == 'delta'
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from conftest import BOARD_HEADERS
+from extensions import db
+from models import User, Whiteboard
+from utils.auth_cache import board_credential_cache
+
+TASKS_URL = '/api/whiteboard/tasks'
+
+@pytest.fixture
+def board_token(app, board):
+    """白板的 token，用于 /api/whiteboard/reset-secret"""
+    with app.app_context():
+        whiteboard = db.session.get(Whiteboard, board['whiteboard_id'])
+        token = whiteboard.generate_token()
+        db.session.commit()
+        return token
+
+def status(client, secret_key):
+    return client.get(TASKS_URL, headers={**BOARD_HEADERS, 'X-Secret-Key': secret_key}).status_code
+
+def test_reset_secret_revokes_cached_credential(app, board, board_token):
+    client = app.test_client()
+    assert status(client, 'S1') == 200  # 旧密钥进入缓存
+
+    response = client.post('/api/whiteboard/reset-secret', json={'id': board['whiteboard_id'], 'token': board_token})
+    assert response.status_code == 200
+    new_secret = response.get_json()['new_secret_key']
+
+    assert status(client, 'S1') == 401
+    assert status(client, new_secret) == 200
+
+def test_credential_cached_by_concurrent_request_is_evicted_on_commit(app, board):
+    """提交前并发请求读到旧行并写回缓存，提交后仍会被清除"""
+    client = app.test_client()
+
+    def concurrent_auth():
+        with app.app_context():
+            assert board_credential_cache.resolve('B1', 'S1') is not None
+            db.session.remove()
+
+    with app.app_context():
+        whiteboard = db.session.get(Whiteboard, board['whiteboard_id'])
+        whiteboard.secret_key = 'S2'  # 修改时立即清除一次
+
+        thread = threading.Thread(target=concurrent_auth)
+        thread.start()
+        thread.join()
+
+        db.session.commit()  # 提交后再清除一次
+
+    assert status(client, 'S1') == 401
+    assert status(client, 'S2') == 200
+
+def test_deactivated_board_is_rejected(app, board):
+    client = app.test_client()
+    assert status(client, 'S1') == 200
+
+    with app.app_context():
+        db.session.get(Whiteboard, board['whiteboard_id']).is_active = False
+        db.session.commit()
+
+    assert status(client, 'S1') == 401
+
+def test_regenerated_user_token_revokes_old_one(app, board):
+    with app.app_context():
+        teacher = db.session.get(User, board['teacher_id'])
+        old_token = teacher.generate_user_token()
+        db.session.commit()
+
+    client = app.test_client()
+    headers = {'X-Board-ID': 'B1', 'X-User-Token': old_token}
+    assert client.get(TASKS_URL, headers=headers).status_code == 200
+
+    with app.app_context():
+        new_token = db.session.get(User, board['teacher_id']).generate_user_token()
+        db.session.commit()
+
+    assert client.get(TASKS_URL, headers=headers).status_code == 401
+    assert client.get(TASKS_URL, headers={**headers, 'X-User-Token': new_token}).status_code == 200
@@ -0,0 +1,111 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from conftest import BOARD_HEADERS
+from extensions import db
+from models import Whiteboard, WhiteboardStatusHistory
+from utils.presence import PresenceRegistry
+from utils.time_utils import get_china_time
+from utils.timing_wheel import TimingWheel
+
+@pytest.fixture
+def registry():
+    """独立的登记表，不启动后台线程，由测试直接调用 sweep_offline / flush"""
+    return PresenceRegistry(timeout=30)
+
+def _whiteboard(whiteboard_id):
+    db.session.expire_all()
+    return db.session.get(Whiteboard, whiteboard_id)
+
+def _intervals(whiteboard_id):
+    return db.session.execute(
+        db.select(WhiteboardStatusHistory.online_from, WhiteboardStatusHistory.online_until)
+        .where(WhiteboardStatusHistory.whiteboard_id == whiteboard_id)
+    ).all()
+
+def test_heartbeats_open_one_interval(app, board, teacher_client):
+    client = app.test_client()
+    for _ in range(3):
+        assert client.post('/api/whiteboard/heartbeat', headers=BOARD_HEADERS).status_code == 200
+
+    status = teacher_client.get(f"/whiteboards/{board['whiteboard_id']}/status").get_json()
+    assert status['is_online'] is True
+    with app.app_context():
+        assert _whiteboard(board['whiteboard_id']).is_online
+        # 只有上线切换写入历史，重复心跳不新增记录
+        intervals = _intervals(board['whiteboard_id'])
+        assert len(intervals) == 1 and intervals[0].online_until is None
+
+def test_expired_board_goes_offline(app, board, registry):
+    whiteboard_id = board['whiteboard_id']
+    seen = get_china_time() - timedelta(seconds=40)
+    with app.app_context():
+        registry.touch(whiteboard_id, seen)
+        registry.mark_online(whiteboard_id, seen)
+        assert not registry.is_online(whiteboard_id)
+
+        assert registry.sweep_offline([whiteboard_id]) == 1
+
+        whiteboard = _whiteboard(whiteboard_id)
+        assert not whiteboard.is_online
+        assert whiteboard.last_heartbeat == seen
+        assert _intervals(whiteboard_id) == [(seen, seen)]
+        assert registry.last_seen(whiteboard_id) is None
+
+def test_fresh_board_stays_online(app, board, registry):
+    whiteboard_id = board['whiteboard_id']
+    with app.app_context():
+        registry.touch(whiteboard_id)
+        registry.mark_online(whiteboard_id)
+
+        assert registry.sweep_offline([whiteboard_id]) == 0
+        assert _whiteboard(whiteboard_id).is_online
+
+def test_heartbeat_seen_by_another_worker_keeps_board_online(app, board):
+    """多个工作进程：本进程的记录已过期，但其他进程刚写回了更新的心跳"""
+    whiteboard_id = board['whiteboard_id']
+    this_worker, other_worker = PresenceRegistry(timeout=30), PresenceRegistry(timeout=30)
+    now = get_china_time()
+    with app.app_context():
+        this_worker.touch(whiteboard_id, now - timedelta(seconds=40))
+        this_worker.mark_online(whiteboard_id, now - timedelta(seconds=40))
+        this_worker.flush()
+        other_worker.touch(whiteboard_id, now)
+        other_worker.flush()
+
+        whiteboard = _whiteboard(whiteboard_id)
+        assert this_worker.is_online(whiteboard_id, whiteboard.last_heartbeat)
+        assert this_worker.last_seen(whiteboard_id, whiteboard.last_heartbeat) == now
+
+        # 时间轮到期时数据库中的心跳仍然新鲜：不下线，并清除本进程过期的记录
+        assert this_worker.sweep_offline([whiteboard_id]) == 0
+        assert _whiteboard(whiteboard_id).is_online
+        assert this_worker.last_seen(whiteboard_id) is None
+
+def test_flush_does_not_move_heartbeat_backwards(app, board, registry):
+    whiteboard_id = board['whiteboard_id']
+    now = get_china_time()
+    with app.app_context():
+        registry.touch(whiteboard_id, now)
+        registry.flush()
+        stale = PresenceRegistry(timeout=30)
+        stale.touch(whiteboard_id, now - timedelta(seconds=20))
+        stale.flush()
+
+        assert _whiteboard(whiteboard_id).last_heartbeat == now
+
+def test_timing_wheel_expires_latest_deadline_only():
+    wheel = TimingWheel(tick=0.01)
+    wheel.schedule('a', 0.02)
+    wheel.schedule('b', 0.02)
+    wheel.schedule('b', 0.2)  # 重新登记覆盖旧的截止时间
+    wheel.schedule('c', 0.02)
+    wheel.cancel('c')
+
+    time.sleep(0.05)
+    assert wheel.advance() == ['a']
+    time.sleep(0.2)
+    assert wheel.advance() == ['b']
+    assert len(wheel) == 0
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import BOARD_HEADERS
+from extensions import db
+from models import User, Task, Assignment, Announcement, Note
+from utils.query_guard import QueryBudgetExceeded, query_guard
+
+ROWS = 30
+
+@pytest.fixture
+def filled_board(app, board):
+    """白板上每种内容各 ROWS 条，每条的发布者都不同，逐行加载关系时语句数会超过上限"""
+    with app.app_context():
+        teachers = [User(casdoor_id=f'p{i}', username=f'publisher {i}', role='teacher', organization='teacher')
+                    for i in range(ROWS)]
+        db.session.add_all(teachers)
+        db.session.flush()
+        for i, teacher in enumerate(teachers):
+            teacher_id = teacher.id
+            db.session.add(Task(title=f'task {i}', whiteboard_id=board['whiteboard_id'], teacher_id=teacher_id))
+            db.session.add(Assignment(title=f'assignment {i}', subject='数学', description='-',
+                                      due_date=datetime(2030, 1, 1),
+                                      whiteboard_id=board['whiteboard_id'], teacher_id=teacher_id))
+            db.session.add(Announcement(title=f'announcement {i}', content='-',
+                                        whiteboard_id=board['whiteboard_id'], teacher_id=teacher_id))
+            db.session.add(Note(filename=f'{i}.txt', original_filename=f'{i}.txt', file_path=f'{i}.txt',
+                                file_size=1, file_type='txt', whiteboard_id=board['whiteboard_id'],
+                                class_id=board['class_id'], uploaded_by=teacher_id))
+        db.session.commit()
+    return board
+
+@pytest.mark.parametrize('url', [
+    '/api/whiteboard/tasks',
+    '/api/whiteboard/assignments',
+    '/api/whiteboard/announcements',
+    '/api/whiteboard/all',
+    '/api/whiteboard/changes',
+    '/api/whiteboard/changes?since=0',
+    '/api/whiteboard/notes',
+])
+def test_board_reads_within_statement_limit(app, filled_board, url):
+    response = app.test_client().get(url, headers=BOARD_HEADERS)
+    assert response.status_code == 200
+
+@pytest.mark.parametrize('path', [
+    '/whiteboards/{whiteboard_id}',
+    '/whiteboards/{whiteboard_id}/tasks',
+    '/whiteboards/{whiteboard_id}/assignments',
+    '/whiteboards/{whiteboard_id}/announcements',
+    '/web/notes/classes/{class_id}/notes',
+])
+def test_teacher_reads_within_statement_limit(filled_board, teacher_client, path):
+    response = teacher_client.get(path.format(**filled_board))
+    assert response.status_code == 200
+
+def test_guard_fails_request_over_limit(app, board, monkeypatch):
+    monkeypatch.setattr(query_guard, 'limit', 1)
+    with pytest.raises(QueryBudgetExceeded):
+        app.test_client().get('/api/whiteboard/tasks', headers=BOARD_HEADERS)
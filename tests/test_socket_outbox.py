@@ -0,0 +1,138 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from extensions import db, socketio
+from models import SocketOutbox
+from utils.socket_outbox import SocketOutboxDispatcher, socket_outbox
+from utils.time_utils import get_china_time
+
+def wait_for(predicate, timeout=3):
+    """等待后台投递线程，返回 predicate 最后一次的结果"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.05)
+    return predicate()
+
+@pytest.fixture
+def board_socket(app, board):
+    client = socketio.test_client(app, query_string='board_id=B1&secret_key=S1')
+    assert client.is_connected()
+    client.get_received()
+    yield client
+    client.disconnect()
+
+def received(board_socket, event_name):
+    return [message['args'][0] for message in board_socket.get_received() if message['name'] == event_name]
+
+def unavailable(*args, **kwargs):
+    raise ConnectionError('queue down')
+
+def outbox_rows(app):
+    with app.app_context():
+        rows = SocketOutbox.query.order_by(SocketOutbox.id).all()
+        return [(row.event, row.attempts, row.last_error) for row in rows]
+
+def test_event_is_delivered_after_commit(app, board, teacher_client, board_socket):
+    response = teacher_client.post(f"/whiteboards/{board['whiteboard_id']}/create_task", json={'title': 'homework'})
+    assert response.status_code == 200
+
+    events = wait_for(lambda: received(board_socket, 'new_task'))
+    assert [event['title'] for event in events] == ['homework']
+    assert wait_for(lambda: outbox_rows(app) == [])
+
+def test_rolled_back_event_is_discarded(app, board):
+    with app.app_context():
+        socket_outbox.enqueue('new_task', {'title': 'never'}, f"whiteboard_{board['whiteboard_id']}")
+        db.session.rollback()
+    assert outbox_rows(app) == []
+
+def test_failed_emit_is_retried(app, board, teacher_client, board_socket, monkeypatch):
+    monkeypatch.setattr(socketio, 'emit', unavailable)
+    teacher_client.post(f"/whiteboards/{board['whiteboard_id']}/create_task", json={'title': 'retry me'})
+    rows = wait_for(lambda: [row for row in outbox_rows(app) if row[1] == 1])
+    assert rows == [('new_task', 1, 'queue down')]
+
+    monkeypatch.undo()
+    with app.app_context():
+        # 跳过退避等待
+        db.session.execute(db.update(SocketOutbox).values(next_attempt_at=get_china_time()))
+        db.session.commit()
+    socket_outbox.wake()
+
+    events = wait_for(lambda: received(board_socket, 'new_task'))
+    assert [event['title'] for event in events] == ['retry me']
+    assert wait_for(lambda: outbox_rows(app) == [])
+
+def test_failed_event_holds_back_later_events_in_room(app, board, teacher_client, board_socket, monkeypatch):
+    create_url = f"/whiteboards/{board['whiteboard_id']}/create_task"
+    monkeypatch.setattr(socketio, 'emit', unavailable)
+    teacher_client.post(create_url, json={'title': 'first'})
+    assert wait_for(lambda: [row for row in outbox_rows(app) if row[1] == 1])
+
+    # 推送恢复后写入的事件要等前一条重试成功，不能先送达
+    monkeypatch.undo()
+    teacher_client.post(create_url, json={'title': 'second'})
+    assert wait_for(lambda: received(board_socket, 'new_task'), timeout=0.5) == []
+    assert outbox_rows(app) == [('new_task', 1, 'queue down'), ('new_task', 0, None)]
+
+    with app.app_context():
+        db.session.execute(db.update(SocketOutbox).values(next_attempt_at=get_china_time()))
+        db.session.commit()
+    socket_outbox.wake()
+
+    events = []
+    wait_for(lambda: events.extend(received(board_socket, 'new_task')) or len(events) == 2)
+    assert [event['title'] for event in events] == ['first', 'second']
+    assert wait_for(lambda: outbox_rows(app) == [])
+
+def test_given_up_event_gives_up_later_events_in_room(app, board, board_socket, monkeypatch):
+    room = f"whiteboard_{board['whiteboard_id']}"
+    worker = SocketOutboxDispatcher()
+    worker.app = app
+    worker.max_attempts = 1
+    with app.app_context():
+        for task_id in (1, 2):
+            db.session.add(SocketOutbox(event='delete_task', room=room, payload=f'{{"task_id": {task_id}}}',
+                                        owner=worker.owner))
+        db.session.commit()
+        monkeypatch.setattr(socketio, 'emit', unavailable)
+        assert worker.dispatch() == 2
+
+        # 放弃之后写入的事件照常投递
+        monkeypatch.undo()
+        db.session.add(SocketOutbox(event='delete_task', room=room, payload='{"task_id": 3}', owner=worker.owner))
+        db.session.commit()
+        assert worker.dispatch() == 1
+
+    assert received(board_socket, 'delete_task') == [{'task_id': 3}]
+    first, second = outbox_rows(app)
+    assert first == ('delete_task', 1, 'queue down')
+    assert second[:2] == ('delete_task', 1) and second[2].startswith('前序事件')
+    assert worker.stats()['failed'] == 2
+
+def test_scheduler_worker_adopts_orphaned_events(app, board, board_socket):
+    room = f"whiteboard_{board['whiteboard_id']}"
+    now = get_china_time()
+    with app.app_context():
+        db.session.add_all([
+            # 已退出的工作进程遗留的事件
+            SocketOutbox(event='delete_task', room=room, payload='{"task_id": 1}', owner='gone',
+                         created_at=now - timedelta(seconds=60), next_attempt_at=now - timedelta(seconds=60)),
+            # 其他工作进程刚写入、还未超时的事件
+            SocketOutbox(event='delete_task', room=room, payload='{"task_id": 2}', owner='busy',
+                         created_at=now, next_attempt_at=now),
+        ])
+        db.session.commit()
+
+        scheduler_worker = SocketOutboxDispatcher()
+        scheduler_worker.app = app
+        assert scheduler_worker.dispatch() == 1
+
+    assert received(board_socket, 'delete_task') == [{'task_id': 1}]
+    assert outbox_rows(app) == [('delete_task', 0, None)]
+    assert scheduler_worker.stats()['adopted'] == 1
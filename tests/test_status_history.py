@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from extensions import db
+from models import WhiteboardStatusHistory
+
+def test_uptime_clips_intervals_to_the_day(app, board, teacher_client):
+    with app.app_context():
+        db.session.add_all([
+            # 跨越零点的区间只统计当天的部分
+            WhiteboardStatusHistory(whiteboard_id=board['whiteboard_id'], is_online=False,
+                                    online_from=datetime(2026, 3, 1, 23, 0), online_until=datetime(2026, 3, 2, 1, 0)),
+            WhiteboardStatusHistory(whiteboard_id=board['whiteboard_id'], is_online=False,
+                                    online_from=datetime(2026, 3, 2, 8, 0), online_until=datetime(2026, 3, 2, 8, 30)),
+            WhiteboardStatusHistory(whiteboard_id=board['whiteboard_id'], is_online=False,
+                                    online_from=datetime(2026, 3, 3, 8, 0), online_until=datetime(2026, 3, 3, 9, 0)),
+        ])
+        db.session.commit()
+
+    result = teacher_client.get(f"/whiteboards/{board['whiteboard_id']}/uptime?date=2026-03-02").get_json()
+
+    assert result['uptime_seconds'] == 90 * 60
+    assert [interval['online_from'] for interval in result['intervals']] == ['2026-03-01 23:00:00', '2026-03-02 08:00:00']
+
+def test_uptime_requires_date(board, teacher_client):
+    assert teacher_client.get(f"/whiteboards/{board['whiteboard_id']}/uptime").status_code == 400
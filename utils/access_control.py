@@ -0,0 +1,105 @@
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import contains_eager
+from extensions import db
+from models.class_models import Class, TeacherClass, ClassSubject
+from models.whiteboard import Whiteboard, WhiteboardAccess
+from utils.db_routing import use_primary
+from utils.permissions import CLASS_TEACHER, TEACHING_TEACHER
+
+# subjects_bitmap 为有符号 64 位整数，只使用低 63 位
+MAX_BITMAP_SUBJECTS = 63
+
+def subjects_to_bitmap(class_subjects, subjects):
+    """把学科列表编码为位图，class_subjects 为班级按 id 排序的学科名"""
+    wanted = set(subjects)
+    bitmap = 0
+    for index, subject_name in enumerate(class_subjects[:MAX_BITMAP_SUBJECTS]):
+        if subject_name in wanted:
+            bitmap |= 1 << index
+    return bitmap
+
+def rebuild_class_access(class_id):
+    """重建某个班级的白板访问记录（不提交事务）
+
+    在创建班级、创建白板、批准/移除/退出授课老师以及修改学科的同一事务中调用。
+    """
+    db.session.flush()
+    db.session.execute(delete(WhiteboardAccess).where(WhiteboardAccess.class_id == class_id))
+
+    teacher_id = db.session.execute(
+        select(Class.teacher_id).where(Class.id == class_id)
+    ).scalar()
+    if teacher_id is None:
+        return 0
+
+    whiteboard_ids = db.session.execute(
+        select(Whiteboard.id).where(Whiteboard.class_id == class_id)
+    ).scalars().all()
+    if not whiteboard_ids:
+        return 0
+
+    class_subjects = db.session.execute(
+        select(ClassSubject.subject_name)
+        .where(ClassSubject.class_id == class_id)
+        .order_by(ClassSubject.id)
+    ).scalars().all()
+
+    members = {teacher_id: (CLASS_TEACHER, subjects_to_bitmap(class_subjects, class_subjects))}
+    teacher_classes = db.session.execute(
+        select(TeacherClass.teacher_id, TeacherClass.assigned_subjects).where(
+            TeacherClass.class_id == class_id,
+            TeacherClass.is_approved == True
+        )
+    ).all()
+    for member_id, assigned_subjects in teacher_classes:
+        if member_id in members:
+            continue
+        subjects = [subject.strip() for subject in (assigned_subjects or '').split(',')]
+        members[member_id] = (TEACHING_TEACHER, subjects_to_bitmap(class_subjects, subjects))
+
+    rows = [{
+        'user_id': user_id,
+        'whiteboard_id': whiteboard_id,
+        'class_id': class_id,
+        'role': role,
+        'subjects_bitmap': bitmap
+    } for user_id, (role, bitmap) in members.items() for whiteboard_id in whiteboard_ids]
+    db.session.execute(insert(WhiteboardAccess), rows)
+    return len(rows)
+
+def rebuild_all_access(logger=None):
+    """一次性任务：为所有班级重建白板访问记录，返回生成的记录数"""
+    class_ids = db.session.execute(select(Class.id).order_by(Class.id)).scalars().all()
+    total = 0
+    for class_id in class_ids:
+        count = rebuild_class_access(class_id)
+        db.session.commit()
+        total += count
+        if logger:
+            logger(f"班级 {class_id}: 生成 {count} 条白板访问记录")
+    return total
+
+def get_accessible_whiteboards(user_id):
+    """用一条查询返回用户可访问的所有启用中的白板（已加载所属班级）"""
+    return db.session.execute(
+        select(Whiteboard)
+        .join(WhiteboardAccess, WhiteboardAccess.whiteboard_id == Whiteboard.id)
+        .join(Whiteboard.class_obj)
+        .options(contains_eager(Whiteboard.class_obj))
+        .where(WhiteboardAccess.user_id == user_id, Whiteboard.is_active == True)
+        .order_by(WhiteboardAccess.role, Whiteboard.class_id, Whiteboard.id)
+    ).scalars().all()
+
+def get_whiteboard_access(user_id, board_id):
+    """按白板编号检查用户能否访问该白板，返回 (id, board_id, name, class_id, teacher_id) 或 None（总是查询主库）"""
+    with use_primary():
+        return db.session.execute(
+            select(Whiteboard.id, Whiteboard.board_id, Whiteboard.name, Whiteboard.class_id, Class.teacher_id)
+            .join(WhiteboardAccess, WhiteboardAccess.whiteboard_id == Whiteboard.id)
+            .join(Class, Whiteboard.class_id == Class.id)
+            .where(
+                WhiteboardAccess.user_id == user_id,
+                Whiteboard.board_id == board_id,
+                Whiteboard.is_active == True
+            )
+        ).first()
@@ -0,0 +1,82 @@
+"""Socket.IO 服务器的并发模型
+
+threading：Werkzeug 开发服务器，每个连接占用一个系统线程，单进程只能承载几百个白板长连接，适合开发调试。
+gevent / eventlet：协程服务器，每个连接只是一个协程，单进程可以承载数千个长连接。
+
+协程模式必须在导入其他模块之前执行 monkey_patch，把 socket、线程、锁和 time.sleep 替换为协作式实现，
+本项目中的后台线程（socketio.start_background_task、APScheduler、cache_bus）和数据库连接池的等待才会让出执行权。
+本模块只能依赖标准库，不能导入 app 或 extensions。
+"""
+import logging
+
+THREADING = 'threading'
+COOPERATIVE_MODES = ('gevent', 'eventlet')
+ASYNC_MODES = (THREADING,) + COOPERATIVE_MODES
+
+def monkey_patch(mode):
+    """按并发模型替换标准库，需要在入口脚本的最开始调用"""
+    if mode == THREADING:
+        return
+    if mode not in COOPERATIVE_MODES:
+        raise RuntimeError(f'未知的 SOCKETIO_ASYNC_MODE: {mode}，可选 {", ".join(ASYNC_MODES)}')
+
+    try:
+        if mode == 'gevent':
+            from gevent import monkey
+            monkey.patch_all()
+        else:
+            import eventlet
+            eventlet.monkey_patch()
+    except ImportError:
+        packages = 'gevent gevent-websocket' if mode == 'gevent' else 'eventlet'
+        raise RuntimeError(f'SOCKETIO_ASYNC_MODE={mode} 需要安装 {mode}，请执行 pip install {packages}')
+
+    # psycopg2 是 C 扩展，monkey patch 对它无效，需要 psycogreen 在等待查询结果时切换协程
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        return
+    try:
+        if mode == 'gevent':
+            from psycogreen.gevent import patch_psycopg
+        else:
+            from psycogreen.eventlet import patch_psycopg
+    except ImportError:
+        return
+    patch_psycopg()
+
+def _is_patched(mode):
+    if mode == 'gevent':
+        from gevent import monkey
+        return monkey.is_module_patched('socket')
+    from eventlet import patcher
+    return patcher.is_monkey_patched('socket')
+
+def check_environment(app, mode):
+    """检查协程模式下标准库是否已替换，以及数据库驱动是否会阻塞整个进程"""
+    if mode not in COOPERATIVE_MODES:
+        return
+
+    logger = logging.getLogger(__name__)
+    try:
+        patched = _is_patched(mode)
+    except ImportError:
+        raise RuntimeError(f'SOCKETIO_ASYNC_MODE={mode} 需要安装 {mode}')
+    if not patched:
+        # flask db 等命令行工具不启动服务器，只提示
+        logger.warning(f'SOCKETIO_ASYNC_MODE={mode} 但标准库尚未替换，请使用 python run.py 启动，'
+                       '或由 gunicorn 的 gevent/eventlet worker 启动')
+
+    from sqlalchemy.engine import make_url
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if patched and url.get_driver_name() == 'psycopg2':
+        import psycopg2.extensions
+        if psycopg2.extensions.get_wait_callback() is None:
+            raise RuntimeError(f'SOCKETIO_ASYNC_MODE={mode} 使用 psycopg2 时需要安装 psycogreen（pip install psycogreen），'
+                               '并在入口脚本最开始调用 utils.async_mode.monkey_patch')
+    elif url.get_backend_name() == 'sqlite':
+        # sqlite3 的调用（包括等待锁的 busy_timeout）会阻塞事件循环
+        logger.warning(
+            f'SOCKETIO_ASYNC_MODE={mode} 下 SQLite 的查询和锁等待会阻塞所有连接，'
+            '建议使用 DB_PROFILE=sqlite-production（WAL）并调小 SQLITE_BUSY_TIMEOUT，或改用 PostgreSQL'
+        )
@@ -0,0 +1,159 @@
+import hashlib
+from collections import namedtuple
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+from extensions import db
+from models.class_models import Class
+from models.user import User
+from models.whiteboard import Whiteboard
+from utils.cache import TTLCache
+from utils.cache_bus import cache_bus
+from utils.db_routing import use_primary
+from utils.metrics import register_metrics
+
+# 认证通过的白板的轻量身份信息，代替完整的 Whiteboard 对象挂在 request.whiteboard 上
+BoardIdentity = namedtuple('BoardIdentity', ['id', 'board_id', 'name', 'class_id', 'teacher_id'])
+
+# 用户token认证通过的教师身份信息，挂在 request.user 上
+UserIdentity = namedtuple('UserIdentity', ['id', 'username', 'email'])
+
+def hash_token(value):
+    """计算凭证的固定长度摘要（64位十六进制）"""
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+class BoardCredentialCache:
+    """白板凭证缓存：(board_id, hash(secret_key)) -> BoardIdentity
+
+    只缓存认证成功的结果；修改密钥、白板编号以及停用白板时，提交事务前后各清除一次该白板的缓存。
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def init_app(self, app):
+        self._cache.configure(
+            maxsize=app.config.get('BOARD_AUTH_CACHE_SIZE', 10000),
+            ttl=app.config.get('BOARD_AUTH_CACHE_TTL', 300)
+        )
+        register_metrics('board_auth_cache', self._cache.stats)
+        cache_bus.subscribe('board_credentials', self._evict)
+
+    def resolve(self, board_id, secret_key):
+        """校验白板凭证，成功返回 BoardIdentity，失败返回 None"""
+        key = (board_id, hash_token(secret_key))
+        identity = self._cache.get(key)
+        if identity is not None:
+            return identity
+
+        # 凭证总是在主库校验，从库延迟时已撤销的密钥不能通过认证并被缓存
+        with use_primary():
+            row = db.session.execute(
+                select(Whiteboard.id, Whiteboard.board_id, Whiteboard.name, Whiteboard.class_id, Class.teacher_id)
+                .join(Class, Whiteboard.class_id == Class.id)
+                .where(
+                    Whiteboard.board_id == board_id,
+                    Whiteboard.secret_key == secret_key,
+                    Whiteboard.is_active == True
+                )
+            ).first()
+        if row is None:
+            return None
+
+        identity = BoardIdentity(*row)
+        self._cache.set(key, identity)
+        return identity
+
+    def invalidate_whiteboard(self, whiteboard_id):
+        """清除某块白板的所有缓存凭证（同步到所有工作进程）"""
+        cache_bus.publish('board_credentials', whiteboard_id)
+
+    def invalidate_whiteboard_on_commit(self, session, whiteboard_id):
+        """立即清除，并在当前事务提交后再清除一次，避免提交前读到旧密钥的请求把旧凭证重新放回缓存"""
+        self._evict(whiteboard_id)
+        session.info.setdefault('evict_board_credentials', set()).add(whiteboard_id)
+
+    def _evict(self, whiteboard_id):
+        self._cache.delete_where(lambda key, identity: identity.id == whiteboard_id)
+
+    def clear(self):
+        self._cache.clear()
+
+class UserTokenCache:
+    """用户token缓存：token摘要 -> UserIdentity
+
+    生成、重置、撤销token以及停用用户时，提交事务后自动清除该用户的缓存。
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def init_app(self, app):
+        self._cache.configure(
+            maxsize=app.config.get('USER_TOKEN_CACHE_SIZE', 10000),
+            ttl=app.config.get('USER_TOKEN_CACHE_TTL', 300)
+        )
+        register_metrics('user_token_cache', self._cache.stats)
+        cache_bus.subscribe('user_tokens', self._evict)
+
+    def resolve(self, user_token):
+        """校验教师的用户token，成功返回 UserIdentity，失败返回 None"""
+        digest = hash_token(user_token)
+        identity = self._cache.get(digest)
+        if identity is not None:
+            return identity
+
+        with use_primary():
+            row = db.session.execute(
+                select(User.id, User.username, User.email).where(
+                    User.user_token_digest == digest,
+                    User.role == 'teacher',
+                    User.is_active == True
+                )
+            ).first()
+        if row is None:
+            return None
+
+        identity = UserIdentity(*row)
+        self._cache.set(digest, identity)
+        return identity
+
+    def invalidate_user(self, user_id):
+        """清除某个用户的缓存token（同步到所有工作进程）"""
+        cache_bus.publish('user_tokens', user_id)
+
+    def invalidate_user_on_commit(self, session, user_id):
+        """立即清除，并在当前事务提交后再清除一次，避免提交前被旧值重新填充"""
+        self._evict(user_id)
+        session.info.setdefault('evict_user_tokens', set()).add(user_id)
+
+    def _evict(self, user_id):
+        self._cache.delete_where(lambda digest, identity: identity.id == user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+# 创建全局实例
+board_credential_cache = BoardCredentialCache()
+user_token_cache = UserTokenCache()
+
+@event.listens_for(Session, 'after_commit')
+def _evict_user_tokens_after_commit(session):
+    for user_id in session.info.pop('evict_user_tokens', ()):
+        user_token_cache.invalidate_user(user_id)
+    for whiteboard_id in session.info.pop('evict_board_credentials', ()):
+        board_credential_cache.invalidate_whiteboard(whiteboard_id)
+
+@event.listens_for(User.is_active, 'set')
+@event.listens_for(User.role, 'set')
+def _invalidate_on_user_change(user, value, old_value, initiator):
+    """用户被停用或角色变化时清除其缓存token"""
+    if user.id is not None and value != old_value:
+        user_token_cache.invalidate_user_on_commit(db.session(), user.id)
+
+@event.listens_for(Whiteboard.is_active, 'set')
+@event.listens_for(Whiteboard.secret_key, 'set')
+@event.listens_for(Whiteboard.board_id, 'set')
+def _invalidate_on_whiteboard_change(whiteboard, value, old_value, initiator):
+    """白板密钥、编号变化或被停用时清除其缓存凭证"""
+    if whiteboard.id is not None and value != old_value:
+        board_credential_cache.invalidate_whiteboard_on_commit(db.session(), whiteboard.id)
@@ -1,8 +1,15 @@
 from functools import wraps
-from flask import session, redirect, url_for, flash, request, jsonify
+from flask import session, redirect, url_for, flash, request, jsonify, g
 from extensions import db
 from models.user import User
-from models.whiteboard import Whiteboard
+from utils.access_control import get_whiteboard_access
+from utils.auth_cache import BoardIdentity, board_credential_cache, user_token_cache
+
+def get_current_user():
+    """当前登录用户，同一请求内只查询一次"""
+    if 'user' not in g:
+        g.user = db.session.get(User, session['user_id']) if 'user_id' in session else None
+    return g.user
 
 def login_required(f):
     @wraps(f)
@@ -17,8 +24,8 @@ def teacher_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return redirect(url_for('auth.login'))
-        user = db.session.get(User, session['user_id'])
-        if user.role != 'teacher':
+        user = get_current_user()
+        if user is None or user.role != 'teacher':
             flash('只有教师可以访问此页面', 'error')
             return redirect(url_for('main.dashboard'))
         return f(*args, **kwargs)
@@ -33,22 +40,28 @@ def whiteboard_auth_required(f):
         
         # 优先使用用户token认证
         if user_token:
-            user = User.query.filter_by(user_token=user_token, role='teacher', is_active=True).first()
+            # 按token摘要查找，结果带缓存
+            user = user_token_cache.resolve(user_token)
             if not user:
                 return jsonify({'error': '用户token无效'}), 401
             
+            if not board_id:
+                return jsonify({'error': '使用用户token时需要提供白板ID'}), 401
+            
+            # 用户token只能访问其班级中的白板
+            row = get_whiteboard_access(user.id, board_id)
+            if not row:
+                return jsonify({'error': '无权访问该白板'}), 403
+            
             request.user = user
-            # 用户token认证通过，允许访问所有白板
+            request.whiteboard = BoardIdentity(*row)
             return f(*args, **kwargs)
         
         if not board_id or not secret_key:
             return jsonify({'error': '需要提供白板ID和密钥或用户token'}), 401
         
-        whiteboard = Whiteboard.query.filter_by(
-            board_id=board_id, 
-            secret_key=secret_key,
-            is_active=True
-        ).first()
+        # 凭证校验结果带缓存，命中时不查询数据库
+        whiteboard = board_credential_cache.resolve(board_id, secret_key)
         
         if not whiteboard:
             return jsonify({'error': '认证失败'}), 401
@@ -65,7 +78,7 @@ def user_token_auth_required(f):
         if not user_token:
             return jsonify({'error': '需要提供用户token'}), 401
         
-        user = User.query.filter_by(user_token=user_token, role='teacher', is_active=True).first()
+        user = user_token_cache.resolve(user_token)
         if not user:
             return jsonify({'error': '用户token无效'}), 401
         
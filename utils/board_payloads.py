@@ -0,0 +1,74 @@
+from models.announcement import Announcement
+from models.assignment import Assignment
+from models.note import Note
+from models.task import Task
+from utils.time_utils import format_china_time
+
+# 白板端接口使用的数据格式，只读取列值，不触发关系加载；
+# 序列化函数既可以传入模型对象，也可以传入按下面的列查询出的结果行
+
+TASK_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.priority, Task.action_id,
+    Task.due_date, Task.is_acknowledged, Task.is_completed, Task.created_at
+)
+ANNOUNCEMENT_COLUMNS = (
+    Announcement.id, Announcement.title, Announcement.content,
+    Announcement.is_long_term, Announcement.created_at
+)
+ASSIGNMENT_COLUMNS = (
+    Assignment.id, Assignment.title, Assignment.description, Assignment.subject,
+    Assignment.due_date, Assignment.created_at
+)
+NOTE_COLUMNS = (
+    Note.id, Note.title, Note.original_filename, Note.description, Note.tags,
+    Note.file_type, Note.file_size, Note.mime_type, Note.class_id, Note.file_path,
+    Note.is_public, Note.created_at, Note.updated_at
+)
+
+def task_payload(task):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'priority': task.priority,
+        'action_id': task.action_id,
+        'due_date': format_china_time(task.due_date) if task.due_date else None,
+        'is_acknowledged': task.is_acknowledged,
+        'is_completed': task.is_completed,
+        'created_at': format_china_time(task.created_at)
+    }
+
+def announcement_payload(announcement):
+    return {
+        'id': announcement.id,
+        'title': announcement.title,
+        'content': announcement.content,
+        'is_long_term': announcement.is_long_term,
+        'created_at': format_china_time(announcement.created_at)
+    }
+
+def assignment_payload(assignment):
+    return {
+        'id': assignment.id,
+        'title': assignment.title,
+        'description': assignment.description,
+        'subject': assignment.subject,
+        'due_date': format_china_time(assignment.due_date),
+        'created_at': format_china_time(assignment.created_at)
+    }
+
+def note_payload(note):
+    return {
+        'id': note.id,
+        'title': note.title or note.original_filename,
+        'original_filename': note.original_filename,
+        'description': note.description,
+        'tags': note.tags,
+        'file_type': note.file_type,
+        'file_size': note.file_size,
+        'mime_type': note.mime_type,
+        'file_url': f"/uploads/{note.class_id}/{note.file_path}",
+        'is_public': note.is_public,
+        'created_at': format_china_time(note.created_at),
+        'updated_at': format_china_time(note.updated_at)
+    }
@@ -0,0 +1,70 @@
+import json
+import threading
+import uuid
+
+class CacheBus:
+    """缓存失效广播
+
+    默认只在本进程内分发；配置 CACHE_BUS_URL（redis://...）后通过 Redis 发布订阅
+    把失效消息同步到所有工作进程。
+    """
+
+    CHANNEL = 'dynamic-class:cache-invalidate'
+
+    def __init__(self):
+        self.app = None
+        self._handlers = {}  # topic -> [handler]
+        self._redis = None
+        self._origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        url = app.config.get('CACHE_BUS_URL')
+        if not url or self._redis is not None:
+            return
+
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('配置了 CACHE_BUS_URL 但未安装 redis，请执行 pip install redis')
+
+        self._redis = redis.Redis.from_url(url)
+        thread = threading.Thread(target=self._listen, name='cache-bus', daemon=True)
+        thread.start()
+
+    def subscribe(self, topic, handler):
+        """注册失效处理函数，handler(payload)"""
+        with self._lock:
+            self._handlers.setdefault(topic, []).append(handler)
+
+    def publish(self, topic, payload):
+        """本进程立即执行失效，并广播给其他工作进程"""
+        self._dispatch(topic, payload)
+        if self._redis is not None:
+            try:
+                self._redis.publish(self.CHANNEL, json.dumps({
+                    'origin': self._origin,
+                    'topic': topic,
+                    'payload': payload
+                }))
+            except Exception as e:
+                self.app.logger.error(f"广播缓存失效消息失败: {str(e)}")
+
+    def _dispatch(self, topic, payload):
+        for handler in list(self._handlers.get(topic, [])):
+            handler(payload)
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.CHANNEL)
+        for message in pubsub.listen():
+            try:
+                data = json.loads(message['data'])
+                if data.get('origin') != self._origin:
+                    self._dispatch(data['topic'], data['payload'])
+            except Exception as e:
+                self.app.logger.error(f"处理缓存失效消息失败: {str(e)}")
+
+# 创建全局实例
+cache_bus = CacheBus()
@@ -0,0 +1,130 @@
+import json
+from datetime import timedelta
+from sqlalchemy import event, insert, select, delete, func, text
+from sqlalchemy.orm import Session
+from extensions import db
+from models.announcement import Announcement
+from models.assignment import Assignment
+from models.note import Note
+from models.system_setting import SystemSetting
+from models.task import Task
+from models.whiteboard import WhiteboardChange
+from utils.board_payloads import (
+    task_payload, announcement_payload, assignment_payload, note_payload,
+    TASK_COLUMNS, ANNOUNCEMENT_COLUMNS, ASSIGNMENT_COLUMNS, NOTE_COLUMNS
+)
+from utils.content_version import content_changed
+from utils.time_utils import get_china_time, format_china_time
+
+# 实体类型 -> (模型, 序列化函数, 快照查询的列)
+ENTITY_TYPES = {
+    'task': (Task, task_payload, TASK_COLUMNS),
+    'assignment': (Assignment, assignment_payload, ASSIGNMENT_COLUMNS),
+    'announcement': (Announcement, announcement_payload, ANNOUNCEMENT_COLUMNS),
+    'note': (Note, note_payload, NOTE_COLUMNS),
+}
+_MODEL_TYPES = {model: (entity_type, serialize) for entity_type, (model, serialize, _) in ENTITY_TYPES.items()}
+
+# 压缩后最早可用游标保存在系统设置中，小于该值的游标需要回退到全量快照
+FLOOR_SETTING_KEY = 'change_log_floor'
+
+# PostgreSQL 上串行化写入变更日志的事务级咨询锁
+CHANGE_LOG_LOCK_KEY = 0x57424348
+
+def _change_row(obj, op, now):
+    entity_type, serialize = _MODEL_TYPES[type(obj)]
+    return {
+        'whiteboard_id': obj.whiteboard_id,
+        'entity_type': entity_type,
+        'entity_id': obj.id,
+        'op': op,
+        'payload': None if op == 'delete' else json.dumps(serialize(obj), ensure_ascii=False),
+        'changed_at': now
+    }
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    """在同一事务中为白板内容的增删改追加变更日志
+
+    游标是自增 id，要求变更按 id 顺序提交：否则较小的 id 晚于较大的 id 提交时，
+    已经越过它的客户端会永久漏掉这条变更。SQLite 的写事务本身是串行的；PostgreSQL 上
+    分配 id 之前先取得事务级咨询锁，写入变更日志的事务因此按 id 顺序提交。其他数据库没有这一保证。
+    """
+    now = get_china_time()
+    rows = []
+    for obj in session.new:
+        if type(obj) in _MODEL_TYPES:
+            rows.append(_change_row(obj, 'create', now))
+    for obj in session.dirty:
+        if type(obj) in _MODEL_TYPES and content_changed(obj):
+            rows.append(_change_row(obj, 'update', now))
+    for obj in session.deleted:
+        if type(obj) in _MODEL_TYPES:
+            rows.append(_change_row(obj, 'delete', now))
+    if rows:
+        connection = session.connection()
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': CHANGE_LOG_LOCK_KEY})
+        connection.execute(insert(WhiteboardChange.__table__), rows)
+
+def get_floor():
+    """已被压缩掉的最大游标"""
+    value = db.session.execute(
+        select(SystemSetting.value).where(SystemSetting.key == FLOOR_SETTING_KEY)
+    ).scalar()
+    return int(value) if value else 0
+
+def get_latest_cursor():
+    """当前最新的游标（所有白板共用一个递增序列）"""
+    return db.session.execute(select(func.max(WhiteboardChange.id))).scalar() or 0
+
+def get_changes_since(whiteboard_id, since, limit):
+    """返回 (变更列表, 是否还有更多)，每项包含 cursor/type/id/op/data/changed_at"""
+    changes = db.session.execute(
+        select(WhiteboardChange)
+        .where(WhiteboardChange.whiteboard_id == whiteboard_id, WhiteboardChange.id > since)
+        .order_by(WhiteboardChange.id)
+        .limit(limit + 1)
+    ).scalars().all()
+
+    has_more = len(changes) > limit
+    return [{
+        'cursor': change.id,
+        'type': change.entity_type,
+        'id': change.entity_id,
+        'op': change.op,
+        'data': json.loads(change.payload) if change.payload else None,
+        'changed_at': format_china_time(change.changed_at)
+    } for change in changes[:limit]], has_more
+
+def build_snapshot(whiteboard_id):
+    """白板当前的全部内容，游标过旧或首次同步时返回"""
+    snapshot = {}
+    for entity_type, (model, serialize, columns) in ENTITY_TYPES.items():
+        rows = db.session.execute(
+            select(*columns).where(model.whiteboard_id == whiteboard_id).order_by(model.id)
+        ).all()
+        snapshot[f'{entity_type}s'] = [serialize(row) for row in rows]
+    return snapshot
+
+def compact_change_log(retention_days):
+    """删除超过保留期的变更日志并记录新的最早可用游标，返回删除的条数"""
+    cutoff = get_china_time() - timedelta(days=retention_days)
+    floor = db.session.execute(
+        select(func.max(WhiteboardChange.id)).where(WhiteboardChange.changed_at < cutoff)
+    ).scalar()
+    if not floor:
+        return 0
+
+    # 先推高最早可用游标，再删除记录
+    setting = SystemSetting.query.filter_by(key=FLOOR_SETTING_KEY).first()
+    if setting is None:
+        setting = SystemSetting(key=FLOOR_SETTING_KEY, description='白板变更日志已压缩的最大游标')
+        db.session.add(setting)
+    setting.value = str(max(floor, int(setting.value or 0)))
+
+    removed = db.session.execute(
+        delete(WhiteboardChange).where(WhiteboardChange.id <= floor)
+    ).rowcount
+    db.session.commit()
+    return removed
@@ -0,0 +1,87 @@
+from functools import wraps
+from itertools import chain
+from flask import request, make_response, g
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+from extensions import db
+from models.announcement import Announcement
+from models.assignment import Assignment
+from models.note import Note
+from models.task import Task
+from models.whiteboard import Whiteboard
+
+# 属于白板内容的模型，增删改时递增所属白板的 content_version
+VERSIONED_MODELS = (Task, Assignment, Announcement, Note)
+
+# 不影响白板内容的字段，只有这些字段变化时不递增版本
+IGNORED_ATTRIBUTES = {
+    Note: {'download_count', 'updated_at'},
+}
+
+def content_changed(obj):
+    """对象是否有影响白板内容的字段变化"""
+    ignored = IGNORED_ATTRIBUTES.get(type(obj), ())
+    state = inspect(obj)
+    return any(
+        attr.key not in ignored and attr.history.has_changes()
+        for attr in state.attrs
+    )
+
+@event.listens_for(Session, 'before_flush')
+def _collect_changed_whiteboards(session, flush_context, instances):
+    whiteboard_ids = session.info.setdefault('content_changed_whiteboards', set())
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, VERSIONED_MODELS) and obj.whiteboard_id is not None:
+            whiteboard_ids.add(obj.whiteboard_id)
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and content_changed(obj):
+            # 移动到其他白板时，新旧白板都需要递增版本
+            history = inspect(obj).attrs.whiteboard_id.history
+            whiteboard_ids.update(wid for wid in chain(history.added, history.unchanged, history.deleted) if wid)
+
+@event.listens_for(Session, 'after_flush')
+def _bump_content_versions(session, flush_context):
+    whiteboard_ids = session.info.pop('content_changed_whiteboards', None)
+    if not whiteboard_ids:
+        return
+    session.connection().execute(
+        update(Whiteboard.__table__)
+        .where(Whiteboard.__table__.c.id.in_(whiteboard_ids))
+        .values(content_version=Whiteboard.__table__.c.content_version + 1)
+    )
+    # 事务提交后据此清除这些白板的响应缓存
+    session.info.setdefault('content_committed_whiteboards', set()).update(whiteboard_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_whiteboards(session):
+    session.info.pop('content_changed_whiteboards', None)
+    session.info.pop('content_committed_whiteboards', None)
+
+def get_content_version(whiteboard_id):
+    """读取白板当前的内容版本（只查询白板表）"""
+    return db.session.execute(
+        select(Whiteboard.content_version).where(Whiteboard.id == whiteboard_id)
+    ).scalar() or 0
+
+def conditional_board_read(f):
+    """白板读取接口的条件请求：ETag 由白板内容版本生成，If-None-Match 命中时直接返回 304
+
+    需要放在 whiteboard_auth_required 之后使用。
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        whiteboard_id = request.whiteboard.id
+        g.board_content_version = get_content_version(whiteboard_id)
+        etag = f"wb{whiteboard_id}-v{g.board_content_version}"
+
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return decorated_function
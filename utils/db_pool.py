@@ -0,0 +1,108 @@
+import threading
+import time
+from sqlalchemy import exc, event
+from sqlalchemy.pool import QueuePool
+
+# 等待超过该时长（秒）的取连接计为慢取连接
+SLOW_CHECKOUT = 0.01
+
+_local = threading.local()
+
+class PoolStats:
+    """连接池取连接的等待时间和饱和度"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self.invalidations = 0
+        self.disconnects = 0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, wait, checked_out):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.slow_checkouts += wait >= SLOW_CHECKOUT
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_disconnect(self):
+        with self._lock:
+            self.disconnects += 1
+
+class MonitoredQueuePool(QueuePool):
+    """记录取连接等待时间的 QueuePool，通过 poolclass 引擎参数使用"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        # QueuePool 内部会递归调用 _do_get，只统计最外层
+        if getattr(_local, 'in_checkout', False):
+            return super()._do_get()
+
+        _local.in_checkout = True
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        finally:
+            _local.in_checkout = False
+        self.stats.record_checkout(time.perf_counter() - started, self.checkedout())
+        return entry
+
+    def recreate(self):
+        # 连接失效后重建连接池时保留统计数据
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def snapshot(self):
+        stats = self.stats
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        with stats._lock:
+            return {
+                'pool_size': self.size(),
+                'max_overflow': self._max_overflow,
+                'checked_out': checked_out,
+                'saturation': round(checked_out / capacity, 3) if capacity else None,
+                'peak_checked_out': stats.peak_checked_out,
+                'checkouts': stats.checkouts,
+                'avg_wait_ms': round(stats.total_wait * 1000 / stats.checkouts, 3) if stats.checkouts else 0,
+                'max_wait_ms': round(stats.max_wait * 1000, 3),
+                'slow_checkouts': stats.slow_checkouts,
+                'timeouts': stats.timeouts,
+                'invalidations': stats.invalidations,
+                'disconnects': stats.disconnects
+            }
+
+def monitor_engine(engine, logger):
+    """统计连接失效；出错断开的连接由 SQLAlchemy 作废并使连接池中更早的连接失效"""
+    if not isinstance(engine.pool, MonitoredQueuePool):
+        return
+
+    @event.listens_for(engine, 'handle_error')
+    def _on_error(context):
+        if context.is_disconnect:
+            engine.pool.stats.record_disconnect()
+            logger.warning(f"数据库连接已断开，连接池将重建连接: {context.original_exception}")
+
+    @event.listens_for(engine.pool, 'invalidate')
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        engine.pool.stats.record_invalidation()
@@ -0,0 +1,144 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from utils.db_pool import MonitoredQueuePool, monitor_engine
+from utils.db_routing import READER_BIND, replica_stickiness
+from utils.metrics import register_metrics
+
+SQLITE_PRODUCTION = 'sqlite-production'
+POSTGRESQL = 'postgresql'
+
+def configure_database(app):
+    """根据 DB_PROFILE 设置连接池参数和读库绑定，需要在 db.init_app 之前调用"""
+    profile = app.config.get('DB_PROFILE') or 'default'
+
+    if profile == 'default':
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_recycle': 300,
+            'pool_pre_ping': True
+        }
+    elif profile == SQLITE_PRODUCTION:
+        _configure_sqlite_production(app)
+    elif profile == POSTGRESQL:
+        _configure_postgresql(app)
+    else:
+        raise RuntimeError(f'未知的 DB_PROFILE: {profile}')
+
+    replica_url = app.config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        if profile == SQLITE_PRODUCTION:
+            raise RuntimeError(f'DB_PROFILE={SQLITE_PRODUCTION} 已使用只读连接作为读库，不能同时配置 DATABASE_REPLICA_URL')
+        # SQLALCHEMY_ENGINE_OPTIONS 只作用于主库，从库需要显式沿用同样的连接池参数
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[READER_BIND] = {**app.config['SQLALCHEMY_ENGINE_OPTIONS'], 'url': replica_url}
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+def _configure_sqlite_production(app):
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        raise RuntimeError(f'DB_PROFILE={SQLITE_PRODUCTION} 需要使用 SQLite 数据库文件')
+
+    timeout = app.config.get('SQLITE_BUSY_TIMEOUT', 5000) / 1000
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'poolclass': MonitoredQueuePool,
+        'pool_size': app.config.get('SQLITE_WRITER_POOL_SIZE', 5),
+        'connect_args': {'timeout': timeout}
+    }
+
+    # 读库以只读模式打开同一个文件；相对路径由 Flask-SQLAlchemy 按 instance 目录解析
+    reader_url = url.set(database=f'file:{url.database}', query={'mode': 'ro', 'uri': 'true'})
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds[READER_BIND] = {
+        'url': reader_url.render_as_string(hide_password=False),
+        'poolclass': MonitoredQueuePool,
+        'pool_size': app.config.get('SQLITE_READER_POOL_SIZE', 10),
+        'connect_args': {'timeout': timeout}
+    }
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+def postgresql_pool_size(config):
+    """按工作进程数和每个进程的线程数计算 (pool_size, max_overflow)
+
+    常驻连接数覆盖单个进程的线程数，所有进程的连接总数（含溢出）不超过 DB_MAX_CONNECTIONS；
+    显式配置的 DB_POOL_SIZE / DB_MAX_OVERFLOW 优先。
+    """
+    threads = config.get('DB_THREADS_PER_WORKER', 16)
+    per_worker = max(1, config.get('DB_MAX_CONNECTIONS', 90) // max(1, config.get('DB_WORKERS', 1)))
+
+    pool_size = config.get('DB_POOL_SIZE') or min(threads, per_worker)
+    max_overflow = config.get('DB_MAX_OVERFLOW')
+    if max_overflow is None:
+        max_overflow = max(0, min(threads, per_worker - pool_size))
+    return pool_size, max_overflow
+
+def _configure_postgresql(app):
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        raise RuntimeError(f'DB_PROFILE={POSTGRESQL} 需要使用 PostgreSQL 数据库')
+
+    pool_size, max_overflow = postgresql_pool_size(app.config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'poolclass': MonitoredQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': app.config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': app.config.get('DB_POOL_RECYCLE', 1800),
+        # 不在每次取连接时 ping，断开的连接在出错时作废并重建（见 utils.db_pool.monitor_engine）
+        'pool_pre_ping': False,
+        # 后进先出，空闲连接能按 pool_recycle 自然淘汰
+        'pool_use_lifo': True,
+        # SQLAlchemy 编译语句缓存
+        'query_cache_size': app.config.get('DB_QUERY_CACHE_SIZE', 1200),
+        'connect_args': {
+            'application_name': app.config.get('DB_APPLICATION_NAME', 'dynamic-class'),
+            'connect_timeout': app.config.get('DB_CONNECT_TIMEOUT', 5)
+        }
+    }
+
+def init_app(app, db):
+    """为已创建的连接池注册连接参数和指标，需要在 db.init_app 之后调用"""
+    with app.app_context():
+        engines = dict(db.engines)
+
+    for engine in engines.values():
+        monitor_engine(engine, app.logger)
+    if READER_BIND in engines:
+        replica_stickiness.init_app(app)
+        register_metrics('replica_stickiness', replica_stickiness.stats)
+    if any(isinstance(engine.pool, MonitoredQueuePool) for engine in engines.values()):
+        register_metrics('db_pool', lambda: {
+            'writer' if key is None else key: engine.pool.snapshot()
+            for key, engine in engines.items()
+            if isinstance(engine.pool, MonitoredQueuePool)
+        })
+
+    if app.config.get('DB_PROFILE') == SQLITE_PRODUCTION:
+        _init_sqlite_pragmas(app, engines[None], engines[READER_BIND])
+
+def _init_sqlite_pragmas(app, writer, reader):
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(app.config.get('SQLITE_BUSY_TIMEOUT', 5000))}",
+        # 负数表示以 KB 为单位
+        f"PRAGMA cache_size = -{int(app.config.get('SQLITE_CACHE_SIZE_KB', 65536))}",
+        f"PRAGMA mmap_size = {int(app.config.get('SQLITE_MMAP_SIZE', 268435456))}",
+    ]
+    writer_pragmas = ['PRAGMA journal_mode = WAL', 'PRAGMA synchronous = NORMAL'] + pragmas
+    reader_pragmas = ['PRAGMA query_only = ON'] + pragmas
+
+    @event.listens_for(writer, 'connect')
+    def _writer_connect(dbapi_connection, connection_record):
+        _execute_pragmas(dbapi_connection, writer_pragmas)
+
+    @event.listens_for(reader, 'connect')
+    def _reader_connect(dbapi_connection, connection_record):
+        _execute_pragmas(dbapi_connection, reader_pragmas)
+
+    # 先由主库建立一次连接切换到 WAL，只读连接无法修改日志模式
+    writer.connect().close()
+
+def _execute_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in pragmas:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
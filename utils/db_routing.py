@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from utils.cache import TTLCache
+from utils.cache_bus import cache_bus
+
+# 读库在 SQLALCHEMY_BINDS 中的键，由 utils.db_profiles 根据配置注册
+READER_BIND = 'reader'
+
+class ReplicaStickiness:
+    """写入后的一段时间内，同一用户或白板的读取仍走主库，避免从库复制延迟导致读不到自己的写入
+
+    白板内容被修改时（例如教师发布任务）该白板也会被标记。标记通过 cache_bus 同步到所有工作进程。
+    """
+
+    def __init__(self):
+        self._recent = TTLCache(maxsize=10000, ttl=5)
+        self.stuck_reads = 0
+
+    def init_app(self, app):
+        self._recent.configure(
+            maxsize=app.config.get('REPLICA_STICKY_SIZE', 10000),
+            ttl=app.config.get('REPLICA_STICKY_SECONDS', 5)
+        )
+        cache_bus.subscribe('replica_sticky', self._mark)
+
+    @property
+    def enabled(self):
+        return self._recent.ttl > 0
+
+    def mark(self, keys):
+        if self.enabled and keys:
+            cache_bus.publish('replica_sticky', sorted(keys))
+
+    def is_sticky(self, keys):
+        if any(self._recent.get(key) for key in keys):
+            self.stuck_reads += 1
+            return True
+        return False
+
+    def _mark(self, keys):
+        for key in keys:
+            self._recent.set(key, True)
+
+    def stats(self):
+        return {
+            'window_seconds': self._recent.ttl,
+            'tracked': len(self._recent),
+            'stuck_reads': self.stuck_reads
+        }
+
+replica_stickiness = ReplicaStickiness()
+
+def _request_identities():
+    """当前请求的用户和白板，作为读写一致性的标记键"""
+    if not has_request_context():
+        return set()
+    keys = set()
+    if 'user_id' in flask_session:
+        keys.add(f"user:{flask_session['user_id']}")
+    user = getattr(request, 'user', None)
+    if user is not None:
+        keys.add(f'user:{user.id}')
+    whiteboard = getattr(request, 'whiteboard', None)
+    if whiteboard is not None:
+        keys.add(f'board:{whiteboard.id}')
+    return keys
+
+class RoutingSession(Session):
+    """标记为只读的请求把查询发往读库，写入、flush 以及写入之后的查询仍使用主库"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_reader(clause):
+            return self._db.engines[READER_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_reader(self, clause):
+        if not has_app_context() or not g.get('db_use_reader'):
+            return False
+        if READER_BIND not in self._db.engines or self._flushing:
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            g.db_wrote = True
+            return False
+        # 同一请求写入之后的读取走主库，保证读到自己的写入
+        if g.get('db_wrote'):
+            return False
+        return not replica_stickiness.is_sticky(_request_identities())
+
+def _written_keys(obj):
+    """被修改的对象对应的标记键：白板和用户本身（重置密钥、停用等），以及白板内容所属的白板"""
+    from models.user import User
+    from models.whiteboard import Whiteboard
+
+    if isinstance(obj, Whiteboard):
+        return {f'board:{obj.id}'} if obj.id is not None else set()
+    if isinstance(obj, User):
+        return {f'user:{obj.id}'} if obj.id is not None else set()
+    whiteboard_id = getattr(obj, 'whiteboard_id', None)
+    return {f'board:{whiteboard_id}'} if whiteboard_id is not None else set()
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    if has_app_context():
+        g.db_wrote = True
+    # 记录被修改的白板、用户以及内容所属的白板，提交后标记
+    keys = session.info.setdefault('sticky_keys', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        keys.update(_written_keys(obj))
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _mark_sticky(session):
+    keys = session.info.pop('sticky_keys', None)
+    if keys is None:
+        return
+    replica_stickiness.mark(keys | _request_identities())
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_sticky(session):
+    session.info.pop('sticky_keys', None)
+
+@contextmanager
+def use_primary():
+    """在只读接口中临时让查询走主库，用于凭证、token 和权限校验，避免从库延迟让已撤销的凭证继续生效"""
+    if not has_app_context():
+        yield
+        return
+    previous = g.get('db_use_reader')
+    g.db_use_reader = False
+    try:
+        yield
+    finally:
+        g.db_use_reader = previous
+
+def use_reader(f):
+    """只读接口：查询发往读库（未配置读库时不起作用）
+
+    需要放在认证装饰器之后，认证查询仍走主库，并且标记键能取到 request.whiteboard / request.user。
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_use_reader = True
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,9 @@
+_providers = {}
+
+def register_metrics(name, provider):
+    """注册一个指标来源，provider 是返回可 JSON 序列化字典的函数"""
+    _providers[name] = provider
+
+def collect_metrics():
+    """收集所有已注册的指标"""
+    return {name: provider() for name, provider in _providers.items()}
@@ -0,0 +1,69 @@
+import base64
+from datetime import datetime
+from flask import request
+from extensions import db
+
+# 请求了分页但未指定 limit 时的默认值和上限
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class CursorError(ValueError):
+    """分页参数无效"""
+
+def encode_cursor(created_at, *keys):
+    """把 (created_at, 整数键...) 编码为不透明的游标字符串"""
+    raw = '|'.join([created_at.isoformat()] + [str(key) for key in keys]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, key_count=1):
+    """解码游标，返回 (created_at, 整数键...)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded).decode('utf-8').split('|')
+        if len(parts) != key_count + 1:
+            raise ValueError(cursor)
+        return (datetime.fromisoformat(parts[0]),) + tuple(int(part) for part in parts[1:])
+    except Exception:
+        raise CursorError('after 参数无效')
+
+def get_page_args():
+    """读取 limit/after 参数；两者都未提供时返回 (None, None)，表示兼容旧客户端返回全部数据"""
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    if limit is None and after is None:
+        return None, None
+
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise CursorError('limit 参数无效')
+        if limit <= 0:
+            raise CursorError('limit 参数无效')
+    return min(limit, MAX_PAGE_SIZE), after
+
+def keyset_paginate(query, model):
+    """按 (created_at, id) 倒序的游标分页，返回 (items, next_cursor)
+
+    未提供 limit/after 时返回全部数据，next_cursor 为 None。
+    """
+    limit, after = get_page_args()
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if limit is None:
+        return query.all(), None
+
+    if after:
+        created_at, item_id = decode_cursor(after)
+        query = query.filter(db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < item_id)
+        ))
+
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    return items, encode_cursor(items[-1].created_at, items[-1].id)
@@ -0,0 +1,118 @@
+from collections import namedtuple
+from flask import g, has_app_context
+from sqlalchemy import select
+from extensions import db
+from models.class_models import Class, TeacherClass, ClassSubject
+from utils.cache import TTLCache
+from utils.cache_bus import cache_bus
+from utils.db_routing import use_primary
+from utils.metrics import register_metrics
+
+CLASS_TEACHER = 'class_teacher'  # 班主任（班级创建者）
+TEACHING_TEACHER = 'teaching_teacher'  # 已批准加入班级的授课老师
+
+class ClassPermission(namedtuple('ClassPermission', ['role', 'subjects'])):
+    """用户在某个班级中的身份，subjects 为可以发布内容的学科（保持原有顺序的元组）
+
+    班主任拥有班级的全部学科；授课老师只拥有分配给自己的学科。
+    """
+
+    __slots__ = ()
+
+    @property
+    def is_class_teacher(self):
+        return self.role == CLASS_TEACHER
+
+    @property
+    def is_member(self):
+        """班主任或已批准的授课老师（不要求已分配学科）"""
+        return self.role is not None
+
+    @property
+    def is_teaching_teacher(self):
+        """已分配学科的授课老师"""
+        return self.role == TEACHING_TEACHER and bool(self.subjects)
+
+    @property
+    def can_teach(self):
+        """可以查看和管理白板内容"""
+        return self.is_class_teacher or self.is_teaching_teacher
+
+NO_PERMISSION = ClassPermission(None, ())
+
+class ClassPermissionService:
+    """解析 (用户, 班级) 的身份和学科
+
+    同一请求内结果保存在 g 上，跨请求使用短 TTL 缓存。
+    班主任批准/移除老师、分配学科、修改班级学科以及老师退出班级时需要调用 invalidate_class。
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def init_app(self, app):
+        self._cache.configure(
+            maxsize=app.config.get('PERMISSION_CACHE_SIZE', 10000),
+            ttl=app.config.get('PERMISSION_CACHE_TTL', 60)
+        )
+        register_metrics('permission_cache', self._cache.stats)
+        cache_bus.subscribe('class_permissions', self._evict_class)
+
+    def resolve(self, user_id, class_id):
+        """返回 ClassPermission，用户与班级无关时返回 NO_PERMISSION"""
+        key = (user_id, class_id)
+        memo = g.setdefault('class_permissions', {})
+        permission = memo.get(key)
+        if permission is None:
+            permission = self._cache.get(key)
+            if permission is None:
+                # 权限总是在主库查询，避免从库延迟让已移除的老师继续访问
+                with use_primary():
+                    permission = self._load(user_id, class_id)
+                self._cache.set(key, permission)
+            memo[key] = permission
+        return permission
+
+    def _load(self, user_id, class_id):
+        row = db.session.execute(
+            select(Class.teacher_id, TeacherClass.id, TeacherClass.assigned_subjects)
+            .outerjoin(TeacherClass, db.and_(
+                TeacherClass.class_id == Class.id,
+                TeacherClass.teacher_id == user_id,
+                TeacherClass.is_approved == True
+            ))
+            .where(Class.id == class_id)
+            .limit(1)
+        ).first()
+        if row is None:
+            return NO_PERMISSION
+
+        if row.teacher_id == user_id:
+            subjects = db.session.execute(
+                select(ClassSubject.subject_name).where(ClassSubject.class_id == class_id).order_by(ClassSubject.id)
+            ).scalars().all()
+            return ClassPermission(CLASS_TEACHER, tuple(subjects))
+
+        if row.id is not None:
+            subjects = [subject.strip() for subject in (row.assigned_subjects or '').split(',')]
+            return ClassPermission(TEACHING_TEACHER, tuple(subject for subject in subjects if subject))
+
+        return NO_PERMISSION
+
+    def invalidate_class(self, class_id):
+        """清除某个班级所有用户的身份缓存（同步到所有工作进程）"""
+        if has_app_context():
+            memo = g.get('class_permissions')
+            if memo:
+                for key in [key for key in memo if key[1] == class_id]:
+                    del memo[key]
+        cache_bus.publish('class_permissions', class_id)
+
+    def _evict_class(self, class_id):
+        self._cache.delete_where(lambda key, permission: key[1] == class_id)
+
+    def clear(self):
+        self._cache.clear()
+
+# 创建全局实例
+class_permissions = ClassPermissionService()
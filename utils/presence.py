@@ -0,0 +1,225 @@
+import threading
+from datetime import timedelta
+from sqlalchemy import select, update, bindparam, or_
+from extensions import db, socketio
+from models.class_models import Class
+from models.whiteboard import Whiteboard
+from utils.status_broadcaster import status_broadcaster
+from utils.status_history import open_online_interval, close_online_interval, close_online_intervals
+from utils.time_utils import get_china_time, format_china_time
+from utils.timing_wheel import TimingWheel
+
+class PresenceRegistry:
+    """白板在线状态登记表
+
+    心跳只更新进程内存中的最后心跳时间，在线判断直接读内存，
+    last_heartbeat 由后台任务按批写回数据库（每个工作进程写回自己收到的心跳）。只有上线/离线切换时才立即写库。
+    每次心跳都会在时间轮上重新登记离线截止时间，到期后立即把白板切换为离线。
+    """
+
+    def __init__(self, timeout=30):
+        self.app = None
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._last_seen = {}  # whiteboard_id -> 最后心跳时间
+        self._pending = {}  # 等待写回数据库的心跳时间
+        self._wheel = TimingWheel()
+        self.flush_interval = 10
+        self._detector_started = False
+
+    def init_app(self, app):
+        self.app = app
+        self.timeout = app.config.get('WHITEBOARD_OFFLINE_TIMEOUT', self.timeout)
+        self._wheel = TimingWheel(tick=app.config.get('OFFLINE_DETECTOR_TICK', 1.0))
+        self.flush_interval = app.config.get('PRESENCE_FLUSH_INTERVAL', self.flush_interval)
+        if not self._detector_started:
+            self._detector_started = True
+            socketio.start_background_task(self._run_offline_detector)
+            socketio.start_background_task(self._run_flusher)
+
+    def _run_offline_detector(self):
+        """后台推进时间轮，把到期的白板切换为离线"""
+        while True:
+            socketio.sleep(self._wheel.tick)
+            expired = self._wheel.advance()
+            if not expired:
+                continue
+            try:
+                with self.app.app_context():
+                    self.sweep_offline(expired)
+            except Exception as e:
+                self.app.logger.error(f"离线检测出错: {str(e)}")
+
+    def _run_flusher(self):
+        """后台定期把本进程收到的心跳时间写回数据库"""
+        while True:
+            socketio.sleep(self.flush_interval)
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                self.app.logger.error(f"写回白板心跳时间时出错: {str(e)}")
+
+    def _is_fresh(self, last_seen, now):
+        return last_seen is not None and (now - last_seen).total_seconds() < self.timeout
+
+    def touch(self, whiteboard_id, now=None):
+        """记录一次心跳，返回白板在此之前是否已被本进程视为在线"""
+        now = now or get_china_time()
+        with self._lock:
+            was_online = self._is_fresh(self._last_seen.get(whiteboard_id), now)
+            self._last_seen[whiteboard_id] = now
+            self._pending[whiteboard_id] = now
+        self._wheel.schedule(whiteboard_id, self.timeout)
+        return was_online
+
+    def last_seen(self, whiteboard_id, fallback=None):
+        """最后心跳时间，取本进程记录和数据库中的值（fallback）较新的一个
+
+        多个工作进程时同一白板的心跳可能落在其他进程，本进程的记录可能比数据库旧。
+        """
+        seen = self._last_seen.get(whiteboard_id)
+        if seen is None or (fallback is not None and fallback > seen):
+            return fallback
+        return seen
+
+    def is_online(self, whiteboard_id, fallback=None):
+        """判断白板是否在线，fallback 为数据库中的 last_heartbeat"""
+        return self._is_fresh(self.last_seen(whiteboard_id, fallback), get_china_time())
+
+    def forget(self, whiteboard_id):
+        """移除内存中的在线记录（未写回的心跳时间仍会被写回）"""
+        with self._lock:
+            self._last_seen.pop(whiteboard_id, None)
+        self._wheel.cancel(whiteboard_id)
+
+    def _forget_stale(self, whiteboard_ids, now):
+        """移除已经超时的内存记录，期间又收到心跳的白板保留"""
+        with self._lock:
+            for whiteboard_id in whiteboard_ids:
+                if not self._is_fresh(self._last_seen.get(whiteboard_id), now):
+                    self._last_seen.pop(whiteboard_id, None)
+
+    def mark_online(self, whiteboard_id, now=None):
+        """把白板标记为在线，只有状态真正发生变化时才开启在线区间，返回是否发生了切换"""
+        now = now or get_china_time()
+        result = db.session.execute(
+            update(Whiteboard)
+            .where(Whiteboard.id == whiteboard_id, Whiteboard.is_online.isnot(True))
+            .values(is_online=True, last_heartbeat=now)
+        )
+        changed = result.rowcount > 0
+        if changed:
+            open_online_interval(whiteboard_id, now)
+        db.session.commit()
+        return changed
+
+    def mark_offline(self, whiteboard_id):
+        """把白板标记为离线，返回是否发生了切换"""
+        last_seen = self._last_seen.get(whiteboard_id)
+        self.forget(whiteboard_id)
+        values = {'is_online': False}
+        if last_seen:
+            values['last_heartbeat'] = last_seen
+        result = db.session.execute(
+            update(Whiteboard)
+            .where(Whiteboard.id == whiteboard_id, Whiteboard.is_online == True)
+            .values(**values)
+        )
+        changed = result.rowcount > 0
+        if changed:
+            close_online_interval(whiteboard_id, last_seen)
+        db.session.commit()
+        return changed
+
+    def sweep_offline(self, whiteboard_ids=None):
+        """把超时的白板批量切换为离线，whiteboard_ids 为空时检查所有在线白板，返回切换的数量"""
+        # 先写回内存中的心跳，保证数据库中的 last_heartbeat 足够新
+        self.flush()
+
+        now = get_china_time()
+        cutoff_time = now - timedelta(seconds=self.timeout)
+        query = (
+            select(Whiteboard.id, Whiteboard.last_heartbeat, Class.teacher_id)
+            .join(Class, Whiteboard.class_id == Class.id)
+            .where(
+                Whiteboard.is_online == True,
+                Whiteboard.last_heartbeat <= cutoff_time
+            )
+        )
+        if whiteboard_ids is not None:
+            query = query.where(Whiteboard.id.in_(whiteboard_ids))
+        offline_rows = [
+            row for row in db.session.execute(query).all()
+            if not self.is_online(row.id, row.last_heartbeat)
+        ]
+        offline_ids = [row.id for row in offline_rows]
+
+        if whiteboard_ids is not None:
+            # 时间轮到期但数据库中的心跳仍然新鲜（其他工作进程收到了之后的心跳），清除本进程过期的记录
+            self._forget_stale(set(whiteboard_ids).difference(offline_ids), now)
+        if not offline_rows:
+            return 0
+
+        db.session.execute(
+            update(Whiteboard)
+            .where(
+                Whiteboard.id.in_(offline_ids),
+                Whiteboard.is_online == True,
+                Whiteboard.last_heartbeat <= cutoff_time
+            )
+            .values(is_online=False)
+        )
+        close_online_intervals(offline_ids)
+        db.session.commit()
+
+        updates_by_teacher = {}
+        for row in offline_rows:
+            self.forget(row.id)
+            updates_by_teacher.setdefault(row.teacher_id, []).append({
+                'whiteboard_id': row.id,
+                'is_online': False,
+                'last_heartbeat': format_china_time(row.last_heartbeat)
+            })
+
+        for teacher_id, updates in updates_by_teacher.items():
+            status_broadcaster.publish_changes(f"teacher_{teacher_id}", updates)
+
+        return len(offline_rows)
+
+    def flush(self):
+        """把积累的心跳时间用一条批量 UPDATE 写回数据库，返回写回的白板数量
+
+        只覆盖更旧的 last_heartbeat，避免其他工作进程刚写入的较新时间被本进程的旧值覆盖。
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            table = Whiteboard.__table__
+            db.session.execute(
+                update(table)
+                .where(
+                    table.c.id == bindparam('b_id'),
+                    or_(table.c.last_heartbeat.is_(None), table.c.last_heartbeat < bindparam('b_seen'))
+                )
+                .values(last_heartbeat=bindparam('b_seen')),
+                [{'b_id': whiteboard_id, 'b_seen': last_seen}
+                 for whiteboard_id, last_seen in pending.items()]
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # 写回失败时放回队列，保留较新的时间
+            with self._lock:
+                for whiteboard_id, last_seen in pending.items():
+                    newer = self._pending.get(whiteboard_id)
+                    if newer is None or newer < last_seen:
+                        self._pending[whiteboard_id] = last_seen
+            raise
+        return len(pending)
+
+# 创建全局实例
+presence_registry = PresenceRegistry()
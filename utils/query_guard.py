@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.metrics import register_metrics
+
+class QueryBudgetExceeded(RuntimeError):
+    """请求执行的 SQL 语句数超过上限"""
+
+class RequestSQLStats:
+    """单个请求的 SQL 执行情况"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()  # 参数化后的语句 -> 执行次数
+
+    def repeated_shapes(self, threshold):
+        """执行次数达到阈值的语句，通常是循环中逐行加载关系（N+1）"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+def _request_stats():
+    stats = g.get('sql_stats')
+    if stats is None:
+        stats = g.sql_stats = RequestSQLStats()
+    return stats
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if not query_guard.enabled or not has_request_context():
+        return
+    stats = _request_stats()
+    stats.count += 1
+    if query_guard.instrument:
+        stats.shapes[statement] += 1
+        # 开始时间记在本条语句的执行上下文上，语句出错时随上下文一起丢弃，不会残留在连接池的连接里
+        context._query_guard_started_at = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_guard_started_at', None)
+    if started is not None and has_request_context():
+        _request_stats().total_time += time.perf_counter() - started
+
+class QueryGuard:
+    """请求级 SQL 统计
+
+    SQL_STATEMENT_LIMIT：语句数上限，测试模式下超过上限的请求直接抛出 QueryBudgetExceeded，其他模式只记录警告。
+    SQL_INSTRUMENTATION：统计每个请求的语句数、数据库耗时和重复语句，按接口汇总到 /metrics，
+    调试模式下还会写入 X-SQL-* 响应头。
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.instrument = False
+        self.limit = 0
+        self.repeat_threshold = 5
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.limit = app.config.get('SQL_STATEMENT_LIMIT', 0)
+        self.instrument = app.config.get('SQL_INSTRUMENTATION', False)
+        self.repeat_threshold = app.config.get('SQL_REPEAT_THRESHOLD', 5)
+        self.enabled = bool(self.limit or self.instrument)
+        if not self.enabled:
+            return
+
+        app.after_request(self._after_request)
+        if self.instrument:
+            register_metrics('sql_endpoints', self.endpoint_stats)
+
+    def _after_request(self, response):
+        stats = g.get('sql_stats') or RequestSQLStats()
+
+        if self.instrument:
+            repeated = stats.repeated_shapes(self.repeat_threshold)
+            self._record(request.endpoint or request.path, stats, bool(repeated))
+            if repeated:
+                shape, count = repeated[0]
+                self.app.logger.warning(
+                    f"{request.method} {request.path} 疑似 N+1 查询，同一语句执行了 {count} 次: {shape[:200]}"
+                )
+            if self.app.debug:
+                response.headers['X-SQL-Statements'] = str(stats.count)
+                response.headers['X-SQL-Time-Ms'] = f"{stats.total_time * 1000:.1f}"
+                response.headers['X-SQL-Repeated'] = str(len(repeated))
+
+        if self.limit and stats.count > self.limit:
+            message = f"{request.method} {request.path} 执行了 {stats.count} 条 SQL 语句，超过上限 {self.limit}"
+            if self.app.testing:
+                raise QueryBudgetExceeded(message)
+            self.app.logger.warning(message)
+        return response
+
+    def _record(self, endpoint, stats, repeated):
+        with self._lock:
+            item = self._endpoints.get(endpoint)
+            if item is None:
+                item = self._endpoints[endpoint] = {
+                    'requests': 0, 'statements': 0, 'max_statements': 0,
+                    'db_time': 0.0, 'max_db_time': 0.0, 'repeated_requests': 0
+                }
+            item['requests'] += 1
+            item['statements'] += stats.count
+            item['max_statements'] = max(item['max_statements'], stats.count)
+            item['db_time'] += stats.total_time
+            item['max_db_time'] = max(item['max_db_time'], stats.total_time)
+            item['repeated_requests'] += repeated
+
+    def endpoint_stats(self):
+        """各接口的汇总数据，按数据库总耗时从高到低排列"""
+        with self._lock:
+            items = [(endpoint, dict(item)) for endpoint, item in self._endpoints.items()]
+        items.sort(key=lambda pair: pair[1]['db_time'], reverse=True)
+        return [{
+            'endpoint': endpoint,
+            'requests': item['requests'],
+            'avg_statements': round(item['statements'] / item['requests'], 1),
+            'max_statements': item['max_statements'],
+            'avg_db_time_ms': round(item['db_time'] * 1000 / item['requests'], 2),
+            'max_db_time_ms': round(item['max_db_time'] * 1000, 2),
+            'total_db_time_ms': round(item['db_time'] * 1000, 1),
+            'repeated_requests': item['repeated_requests']
+        } for endpoint, item in items]
+
+# 创建全局实例
+query_guard = QueryGuard()
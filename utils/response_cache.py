@@ -0,0 +1,201 @@
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, make_response, current_app, g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.cache import TTLCache
+from utils.cache_bus import cache_bus
+from utils.content_version import get_content_version
+from utils.metrics import register_metrics
+from utils.single_flight import SingleFlight
+
+class LocalResponseBackend:
+    """进程内存储，每个工作进程各自缓存"""
+
+    name = 'local'
+    shared = False
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, whiteboard_id, key):
+        return self._cache.get((whiteboard_id, key))
+
+    def set(self, whiteboard_id, key, body):
+        self._cache.set((whiteboard_id, key), body)
+
+    def invalidate(self, whiteboard_ids):
+        whiteboard_ids = set(whiteboard_ids)
+        self._cache.delete_where(lambda key, body: key[0] in whiteboard_ids)
+
+    def stats(self):
+        stats = self._cache.stats()
+        return {'size': stats['size'], 'maxsize': stats['maxsize'], 'ttl': stats['ttl']}
+
+class RedisResponseBackend:
+    """Redis 存储，多个工作进程共用；每块白板用一个集合记录自己的缓存键以便整体清除"""
+
+    name = 'redis'
+    shared = True
+    PREFIX = 'dynamic-class:response:'
+
+    def __init__(self, url, ttl):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RESPONSE_CACHE_BACKEND=redis 需要安装 redis，请执行 pip install redis')
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def _index_key(self, whiteboard_id):
+        return f"{self.PREFIX}{whiteboard_id}:keys"
+
+    def get(self, whiteboard_id, key):
+        return self._redis.get(f"{self.PREFIX}{whiteboard_id}:{key}")
+
+    def set(self, whiteboard_id, key, body):
+        full_key = f"{self.PREFIX}{whiteboard_id}:{key}"
+        index_key = self._index_key(whiteboard_id)
+        pipe = self._redis.pipeline()
+        pipe.set(full_key, body, ex=self.ttl)
+        pipe.sadd(index_key, full_key)
+        pipe.expire(index_key, self.ttl)
+        pipe.execute()
+
+    def invalidate(self, whiteboard_ids):
+        for whiteboard_id in whiteboard_ids:
+            index_key = self._index_key(whiteboard_id)
+            keys = self._redis.smembers(index_key)
+            self._redis.delete(index_key, *keys)
+
+    def stats(self):
+        return {'ttl': self.ttl}
+
+class ResponseCache:
+    """白板读取接口的响应缓存：(白板, 内容版本, 接口, 查询参数) -> JSON 字节
+
+    白板内容变更的事务提交后清除该白板的全部条目；键中带有内容版本，
+    提交前开始计算、提交后才写入的旧响应也不会被读到。
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'local')
+        ttl = app.config.get('RESPONSE_CACHE_TTL', 300)
+        if backend == 'redis':
+            url = app.config.get('RESPONSE_CACHE_URL') or app.config.get('CACHE_BUS_URL')
+            if not url:
+                raise RuntimeError('RESPONSE_CACHE_BACKEND=redis 需要配置 RESPONSE_CACHE_URL 或 CACHE_BUS_URL')
+            self.backend = RedisResponseBackend(url, ttl)
+        elif backend == 'local':
+            self.backend = LocalResponseBackend(app.config.get('RESPONSE_CACHE_SIZE', 2000), ttl)
+        else:
+            self.backend = None
+
+        register_metrics('response_cache', self.stats)
+        register_metrics('board_read_single_flight', board_read_flight.stats)
+        cache_bus.subscribe('board_responses', self._evict)
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def get(self, whiteboard_id, key):
+        try:
+            body = self.backend.get(whiteboard_id, key)
+        except Exception as e:
+            current_app.logger.error(f"读取响应缓存失败: {str(e)}")
+            body = None
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def set(self, whiteboard_id, key, body):
+        try:
+            self.backend.set(whiteboard_id, key, body)
+        except Exception as e:
+            current_app.logger.error(f"写入响应缓存失败: {str(e)}")
+
+    def invalidate_whiteboards(self, whiteboard_ids):
+        """清除这些白板的缓存响应；进程内存储时同步到所有工作进程"""
+        if not self.enabled or not whiteboard_ids:
+            return
+        if self.backend.shared:
+            self._evict(list(whiteboard_ids))
+        else:
+            cache_bus.publish('board_responses', list(whiteboard_ids))
+
+    def _evict(self, whiteboard_ids):
+        if not self.enabled:
+            return
+        try:
+            self.backend.invalidate(whiteboard_ids)
+        except Exception as e:
+            current_app.logger.error(f"清除响应缓存失败: {str(e)}")
+
+    def stats(self):
+        if not self.enabled:
+            return {'backend': None}
+        with self._lock:
+            stats = {'backend': self.backend.name, 'hits': self.hits, 'misses': self.misses}
+        stats.update(self.backend.stats())
+        return stats
+
+# 创建全局实例
+response_cache = ResponseCache()
+board_read_flight = SingleFlight()
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    whiteboard_ids = session.info.pop('content_committed_whiteboards', None)
+    if whiteboard_ids:
+        response_cache.invalidate_whiteboards(whiteboard_ids)
+
+def cached_board_response(f):
+    """缓存白板读取接口的 200 响应，并合并同时到达的相同请求
+
+    缓存未命中时，同一白板、同一内容版本的相同请求只有一个执行查询，其余等待并共用结果。
+    需要放在 conditional_board_read 之后使用，304 的请求不会经过缓存。
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        whiteboard_id = request.whiteboard.id
+        version = g.get('board_content_version')
+        if version is None:
+            version = get_content_version(whiteboard_id)
+        query = urlencode(sorted(request.args.items(multi=True)))
+        key = f"v{version}:{request.endpoint}:{query}"
+
+        if response_cache.enabled:
+            body = response_cache.get(whiteboard_id, key)
+            if body is not None:
+                return current_app.response_class(body, mimetype='application/json')
+
+        leader_response = []
+
+        def compute():
+            response = make_response(f(*args, **kwargs))
+            leader_response.append(response)
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                return response.get_data()
+            return None
+
+        body, is_leader = board_read_flight.do((whiteboard_id, key), compute)
+        if is_leader:
+            if body is not None and response_cache.enabled:
+                response_cache.set(whiteboard_id, key, body)
+            return leader_response[0]
+        if body is None:
+            # 执行方出错、响应不可共用或等待超时，自行计算
+            return f(*args, **kwargs)
+        return current_app.response_class(body, mimetype='application/json')
+    return decorated_function
@@ -1,14 +1,23 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from utils.time_utils import get_china_time, format_china_time
-from datetime import timedelta
+
+# 工作进程角色，运行定时任务的角色在多进程部署中只能有一个进程使用
+WORKER_ROLES = ('all', 'web', 'scheduler')
+SCHEDULER_ROLES = ('all', 'scheduler')
 
 class SchedulerManager:
+    """全局定时任务，整个部署只能有一个进程运行（由 WORKER_ROLE 决定）"""
+
     def __init__(self):
         self.scheduler = BackgroundScheduler()
         self.app = None
     
     def init_app(self, app):
         self.app = app
+        role = app.config.get('WORKER_ROLE', 'all')
+        if role not in WORKER_ROLES:
+            raise RuntimeError(f'未知的 WORKER_ROLE: {role}，可选 {", ".join(WORKER_ROLES)}')
+        if role not in SCHEDULER_ROLES:
+            return
         self.setup_jobs()
         if not self.scheduler.running:
             self.scheduler.start()
@@ -17,45 +26,68 @@ class SchedulerManager:
         self.scheduler.add_job(
             func=self.cleanup_offline_whiteboards,
             trigger="interval",
-            minutes=1
+            seconds=self.app.config.get('OFFLINE_RECONCILE_INTERVAL', 600)
+        )
+        self.scheduler.add_job(
+            func=self.compact_change_log,
+            trigger="interval",
+            hours=24
         )
+        self.scheduler.add_job(
+            func=self.compact_socket_outbox,
+            trigger="interval",
+            hours=24
+        )
+    
+    def compact_change_log(self):
+        """删除超过保留期的白板变更日志"""
+        if not self.app:
+            return
+        
+        with self.app.app_context():
+            from extensions import db
+            from utils.change_log import compact_change_log
+            
+            try:
+                removed = compact_change_log(self.app.config.get('CHANGE_LOG_RETENTION_DAYS', 7))
+                if removed:
+                    self.app.logger.info(f"清理了 {removed} 条白板变更日志")
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"清理白板变更日志时出错: {str(e)}")
+    
+    def compact_socket_outbox(self):
+        """删除放弃投递且超过保留期的 Socket.IO 事件"""
+        if not self.app:
+            return
+        
+        with self.app.app_context():
+            from extensions import db
+            from utils.socket_outbox import socket_outbox
+            
+            try:
+                removed = socket_outbox.compact(self.app.config.get('CHANGE_LOG_RETENTION_DAYS', 7))
+                if removed:
+                    self.app.logger.info(f"清理了 {removed} 条放弃投递的 Socket.IO 事件")
+            except Exception as e:
+                db.session.rollback()
+                self.app.logger.error(f"清理 Socket.IO 发件箱时出错: {str(e)}")
     
     def cleanup_offline_whiteboards(self):
-        """清理长时间没有心跳的白板状态"""
+        """兜底对账：离线检测由时间轮实时完成，这里低频扫描遗漏的白板（如进程重启前在线的白板）"""
         if not self.app:
             return
             
         with self.app.app_context():
-            from extensions import db, socketio
-            from models.whiteboard import Whiteboard, WhiteboardStatusHistory
+            from extensions import db
+            from utils.presence import presence_registry
             
             try:
-                cutoff_time = get_china_time() - timedelta(minutes=15/60)
-                offline_whiteboards = Whiteboard.query.filter(
-                    Whiteboard.is_online == True,
-                    Whiteboard.last_heartbeat < cutoff_time
-                ).all()
-                
-                for whiteboard in offline_whiteboards:
-                    whiteboard.is_online = False
-                    db.session.commit()
-                    
-                    status_history = WhiteboardStatusHistory(
-                        whiteboard_id=whiteboard.id,
-                        is_online=False
-                    )
-                    db.session.add(status_history)
-                    db.session.commit()
-                    
-                    socketio.emit('whiteboard_status_update', {
-                        'whiteboard_id': whiteboard.id,
-                        'is_online': False,
-                        'last_heartbeat': format_china_time(whiteboard.last_heartbeat)
-                    }, room=f"teacher_{whiteboard.class_obj.teacher_id}")
-                    
-                if offline_whiteboards:
-                    self.app.logger.info(f"清理了 {len(offline_whiteboards)} 个离线白板状态")
+                count = presence_registry.sweep_offline()
+                if count:
+                    self.app.logger.info(f"清理了 {count} 个离线白板状态")
             except Exception as e:
+                db.session.rollback()
                 self.app.logger.error(f"清理离线白板状态时出错: {str(e)}")
 
 # 创建全局实例
@@ -0,0 +1,52 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """安装了 orjson 时用它编码 jsonify 的响应，否则退回 Flask 默认实现
+
+    输出与默认实现等价：键排序、日期仍按 HTTP 日期格式输出；区别只是中文不再转义为 \\uXXXX。
+    是否缩进只由 compact 决定（设为 False 时缩进两格），与调试模式无关。
+    """
+
+    ORJSON_OPTIONS = (
+        (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        if orjson is not None else 0
+    )
+
+    @property
+    def fast(self):
+        return orjson is not None
+
+    def _default(self, obj):
+        if isinstance(obj, tuple):
+            return list(obj)
+        return self.default(obj)
+
+    def encode(self, obj, indent=False):
+        """编码为 UTF-8 字节"""
+        if orjson is None:
+            if indent:
+                return super().dumps(obj, indent=2).encode('utf-8')
+            return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+        option = self.ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else self.ORJSON_OPTIONS
+        return orjson.dumps(obj, default=self._default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if not self.fast:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj, indent=self.compact is False) + b'\n',
+                                        mimetype=self.mimetype)
+
+def json_backend():
+    """当前使用的 JSON 编码库"""
+    return 'orjson' if orjson is not None else 'json'
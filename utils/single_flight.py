@@ -0,0 +1,54 @@
+import threading
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class SingleFlight:
+    """合并并发的相同计算：同一个 key 同时只执行一次，其余调用等待并共享结果
+
+    计算出错或等待超时时，等待方拿到 None，需要自行计算。
+    """
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.deduplicated = 0
+
+    def do(self, key, fn):
+        """返回 (result, 是否由本次调用执行)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                return None, False
+            if call.result is not None:
+                with self._lock:
+                    self.deduplicated += 1
+            return call.result, False
+
+        try:
+            call.result = fn()
+            return call.result, True
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'deduplicated': self.deduplicated,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,189 @@
+import json
+import threading
+import uuid
+from datetime import timedelta
+from sqlalchemy import event, select, delete, update, exists, or_
+from sqlalchemy.orm import Session, aliased
+from extensions import db, socketio
+from models.socket_outbox import SocketOutbox
+from utils.metrics import register_metrics
+from utils.time_utils import get_china_time
+
+class SocketOutboxDispatcher:
+    """Socket.IO 事件发件箱
+
+    enqueue 把事件和数据修改写入同一个事务，提交后唤醒本进程的投递线程。投递线程按房间分批推送，
+    推送成功后删除，失败时按指数退避重试，保证至少投递一次（客户端可能收到重复事件）。
+    同一房间的事件按写入顺序送达，超过重试次数的事件连同房间里排在它后面的事件一起放弃。
+    写入事件的进程负责投递自己的事件；运行定时任务的进程（WORKER_ROLE 为 all 或 scheduler）
+    还会接管超过 orphan_after 秒仍未投递的事件，例如提交之后、推送之前进程退出留下的事件。
+    """
+
+    def __init__(self):
+        self.app = None
+        self.owner = uuid.uuid4().hex
+        self.poll_interval = 1.0
+        self.batch_size = 200
+        self.max_attempts = 10
+        self.orphan_after = 30
+        self.adopt_orphans = True
+        self._wake = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+        self._stats = {
+            'delivered': 0,
+            'batches': 0,
+            'retries': 0,
+            'failed': 0,
+            'adopted': 0
+        }
+
+    def init_app(self, app):
+        from utils.scheduler import SCHEDULER_ROLES
+
+        self.app = app
+        self.poll_interval = app.config.get('SOCKET_OUTBOX_POLL_INTERVAL', self.poll_interval)
+        self.batch_size = app.config.get('SOCKET_OUTBOX_BATCH_SIZE', self.batch_size)
+        self.max_attempts = app.config.get('SOCKET_OUTBOX_MAX_ATTEMPTS', self.max_attempts)
+        self.orphan_after = app.config.get('SOCKET_OUTBOX_ORPHAN_AFTER', self.orphan_after)
+        self.adopt_orphans = app.config.get('WORKER_ROLE', 'all') in SCHEDULER_ROLES
+        register_metrics('socket_outbox', self.stats)
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run)
+
+    def enqueue(self, event_name, data, room):
+        """在当前事务中登记一条推送，事务提交后才会投递，回滚时一并丢弃"""
+        db.session.add(SocketOutbox(
+            event=event_name,
+            room=room,
+            payload=json.dumps(data, ensure_ascii=False),
+            owner=self.owner
+        ))
+        db.session.info['socket_outbox_pending'] = True
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        """后台投递线程：有新事件提交时立即投递，否则每隔 poll_interval 秒检查到期的重试"""
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    while self.dispatch() >= self.batch_size:
+                        pass
+            except Exception as e:
+                self.app.logger.error(f"投递 Socket.IO 事件时出错: {str(e)}")
+
+    def _claimable(self, outbox, now):
+        """本进程可以投递的事件：自己写入的，或者允许接管的遗留事件"""
+        if self.adopt_orphans:
+            orphan_cutoff = now - timedelta(seconds=self.orphan_after)
+            return or_(outbox.owner == self.owner, outbox.created_at <= orphan_cutoff)
+        return outbox.owner == self.owner
+
+    def dispatch(self):
+        """投递一批到期的事件，返回本批取出的事件数
+
+        同一房间的事件按写入顺序推送：房间里更早的事件还在等待重试或由其他进程投递时，后面的事件留在队列里。
+        """
+        now = get_china_time()
+        earlier = aliased(SocketOutbox)
+        held_back = exists().where(
+            earlier.room == SocketOutbox.room,
+            earlier.id < SocketOutbox.id,
+            earlier.attempts < self.max_attempts,
+            or_(earlier.next_attempt_at > now, ~self._claimable(earlier, now))
+        )
+        query = select(SocketOutbox).where(
+            SocketOutbox.next_attempt_at <= now,
+            SocketOutbox.attempts < self.max_attempts,
+            self._claimable(SocketOutbox, now),
+            ~held_back
+        )
+        rows = db.session.execute(query.order_by(SocketOutbox.id).limit(self.batch_size)).scalars().all()
+        if not rows:
+            db.session.rollback()
+            return 0
+
+        by_room = {}
+        for row in rows:
+            by_room.setdefault(row.room, []).append(row)
+
+        # 推送出错通常是消息队列不可用，之后的事件不再尝试，整体等待重试。
+        # 每个房间只有第一条未送达的事件计入重试，后面的事件被它挡住，等它送达后再按顺序推送
+        delivered, undelivered, error = [], [], None
+        for room, room_rows in by_room.items():
+            for row in room_rows:
+                if error is None:
+                    try:
+                        socketio.emit(row.event, json.loads(row.payload), room=room)
+                        delivered.append(row.id)
+                        continue
+                    except Exception as e:
+                        error = e
+                undelivered.append(row)
+                break
+
+        adopted = sum(row.owner != self.owner for row in rows)
+        failed = 0
+        if delivered:
+            db.session.execute(delete(SocketOutbox).where(SocketOutbox.id.in_(delivered)))
+        for row in undelivered:
+            row.attempts += 1
+            row.owner = self.owner
+            row.last_error = str(error)
+            row.next_attempt_at = now + timedelta(seconds=min(2 ** row.attempts, 300))
+            if row.attempts >= self.max_attempts:
+                # 放弃一条事件时，房间里排在它后面的事件一并放弃，不会越过丢失的事件先送达
+                result = db.session.execute(
+                    update(SocketOutbox).where(
+                        SocketOutbox.room == row.room,
+                        SocketOutbox.id > row.id,
+                        SocketOutbox.attempts < self.max_attempts
+                    ).values(attempts=self.max_attempts, last_error=f'前序事件 {row.id} 投递失败')
+                )
+                failed += 1 + result.rowcount
+        db.session.commit()
+
+        if error is not None:
+            self.app.logger.warning(f"Socket.IO 事件推送失败，{len(undelivered)} 个房间等待重试: {str(error)}")
+        if failed:
+            self.app.logger.error(f"{failed} 条 Socket.IO 事件超过重试次数，已放弃投递")
+        with self._lock:
+            self._stats['delivered'] += len(delivered)
+            self._stats['batches'] += len(by_room)
+            self._stats['retries'] += len(undelivered)
+            self._stats['failed'] += failed
+            self._stats['adopted'] += adopted
+        return len(rows)
+
+    def compact(self, retention_days):
+        """删除超过重试次数且早于保留期的事件，返回删除的数量"""
+        cutoff = get_china_time() - timedelta(days=retention_days)
+        result = db.session.execute(
+            delete(SocketOutbox).where(
+                SocketOutbox.attempts >= self.max_attempts,
+                SocketOutbox.created_at < cutoff
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+# 创建全局实例
+socket_outbox = SocketOutboxDispatcher()
+
+@event.listens_for(Session, 'after_commit')
+def _wake_after_commit(session):
+    if session.info.pop('socket_outbox_pending', False):
+        socket_outbox.wake()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('socket_outbox_pending', None)
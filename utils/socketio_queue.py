@@ -0,0 +1,65 @@
+import pickle
+import threading
+import weakref
+import socketio
+
+class LocalMessageQueue(socketio.BaseManager):
+    """进程内的 Socket.IO 消息队列替身，用于测试
+
+    同一进程中频道相同的多个 Socket.IO 服务器互相转发推送，相当于多个工作进程共用一个 Redis。
+    推送同步送达（Flask-SocketIO 的测试客户端不支持异步的消息队列），推送数据和 Redis 后端一样
+    经过 pickle 序列化，不能序列化的数据在测试中同样会失败。只转发 emit。
+    """
+
+    name = 'local'
+
+    _channels = {}  # channel -> WeakSet[LocalMessageQueue]
+    _lock = threading.Lock()
+
+    def __init__(self, channel='socketio'):
+        super().__init__()
+        self.channel = channel
+        with self._lock:
+            self._channels.setdefault(channel, weakref.WeakSet()).add(self)
+
+    def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, **kwargs):
+        if kwargs.get('ignore_queue'):
+            return super().emit(event, data, namespace, room=room, skip_sid=skip_sid, callback=callback)
+
+        data = pickle.loads(pickle.dumps(data))
+        with self._lock:
+            peers = list(self._channels.get(self.channel, ()))
+        for peer in peers:
+            if peer.server is None:
+                continue
+            # 回调只能由发出推送的服务器处理
+            socketio.BaseManager.emit(peer, event, data, namespace, room=room, skip_sid=skip_sid,
+                                  callback=callback if peer is self else None)
+
+def message_queue_options(app):
+    """根据 SOCKETIO_MESSAGE_QUEUE 生成 socketio.init_app 的消息队列参数
+
+    未配置时推送只送达本进程的连接；配置 redis:// 或 amqp:// 等地址后所有工作进程共用消息队列；
+    local:// 使用进程内替身。
+    """
+    url = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return {}
+
+    channel = app.config.get('SOCKETIO_CHANNEL', 'dynamic-class')
+    if url.startswith('local://'):
+        return {'client_manager': LocalMessageQueue(channel=channel)}
+
+    if url.startswith(('redis://', 'rediss://')):
+        module, package = 'redis', 'redis'
+    elif url.startswith('kafka://'):
+        module, package = 'kafka', 'kafka-python'
+    elif url.startswith('zmq+'):
+        module, package = 'zmq', 'pyzmq'
+    else:
+        module, package = 'kombu', 'kombu'
+    try:
+        __import__(module)
+    except ImportError:
+        raise RuntimeError(f'配置了 SOCKETIO_MESSAGE_QUEUE 但未安装 {package}，请执行 pip install {package}')
+    return {'message_queue': url, 'channel': channel}
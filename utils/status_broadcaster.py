@@ -0,0 +1,104 @@
+import threading
+import time
+from extensions import socketio
+from utils.metrics import register_metrics
+
+class StatusBroadcaster:
+    """白板状态推送合并器
+
+    上线/离线切换立即唤醒后台线程推送 whiteboard_status_update，不在心跳请求中推送；
+    仅刷新最后心跳时间的推送按教师房间合并，每隔 interval 秒发送一次 whiteboard_status_batch。
+    在线状态可以由下一次心跳或教师重新连接时恢复，不经过 Socket.IO 发件箱。
+    """
+
+    def __init__(self, interval=5):
+        self.app = None
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}  # room -> {whiteboard_id: update}
+        self._changes = []  # 待发送的状态切换 (事件, 数据, 房间)
+        self._wake = threading.Event()
+        self._started = False
+        self._stats = {
+            'changes_sent': 0,
+            'refreshes_received': 0,
+            'refreshes_merged': 0,
+            'batches_sent': 0
+        }
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('STATUS_BATCH_INTERVAL', self.interval)
+        register_metrics('status_broadcast', self.stats)
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run)
+
+    def _run(self):
+        next_flush = time.monotonic() + self.interval
+        while True:
+            self._wake.wait(max(0, next_flush - time.monotonic()))
+            self._wake.clear()
+            try:
+                self.send_changes()
+                if time.monotonic() >= next_flush:
+                    next_flush = time.monotonic() + self.interval
+                    self.flush()
+            except Exception as e:
+                self.app.logger.error(f"推送白板状态批次时出错: {str(e)}")
+
+    def publish_change(self, room, update):
+        """状态发生切换，由后台线程立即推送"""
+        with self._lock:
+            pending = self._pending.get(room)
+            if pending:
+                pending.pop(update['whiteboard_id'], None)
+            self._changes.append(('whiteboard_status_update', update, room))
+            self._stats['changes_sent'] += 1
+        self._wake.set()
+
+    def publish_changes(self, room, updates):
+        """多块白板同时切换状态，合并为一条批量事件由后台线程立即推送"""
+        with self._lock:
+            pending = self._pending.get(room)
+            if pending:
+                for update in updates:
+                    pending.pop(update['whiteboard_id'], None)
+            self._changes.append(('whiteboard_status_batch', {'updates': updates}, room))
+            self._stats['changes_sent'] += len(updates)
+        self._wake.set()
+
+    def send_changes(self):
+        """发送排队的状态切换"""
+        with self._lock:
+            changes, self._changes = self._changes, []
+        for event, data, room in changes:
+            socketio.emit(event, data, room=room)
+
+    def publish_refresh(self, room, update):
+        """只刷新最后心跳时间，等待下一次批量推送"""
+        with self._lock:
+            pending = self._pending.setdefault(room, {})
+            if update['whiteboard_id'] in pending:
+                self._stats['refreshes_merged'] += 1
+            pending[update['whiteboard_id']] = update
+            self._stats['refreshes_received'] += 1
+
+    def flush(self):
+        """发送所有房间积累的心跳刷新"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._stats['batches_sent'] += len(pending)
+        for room, updates in pending.items():
+            socketio.emit('whiteboard_status_batch', {'updates': list(updates.values())}, room=room)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['emits_saved'] = stats['refreshes_received'] - stats['batches_sent']
+        stats['pending_rooms'] = len(self._pending)
+        stats['pending_changes'] = len(self._changes)
+        return stats
+
+# 创建全局实例
+status_broadcaster = StatusBroadcaster()
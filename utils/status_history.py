@@ -0,0 +1,159 @@
+from sqlalchemy import insert, update, delete, select
+from extensions import db
+from models.whiteboard import Whiteboard, WhiteboardStatusHistory
+from utils.time_utils import get_china_time
+
+def open_online_interval(whiteboard_id, online_from=None):
+    """白板上线时开启一个在线区间（已有未结束的区间时不重复开启）"""
+    online_from = online_from or get_china_time()
+    existing = db.session.execute(
+        select(WhiteboardStatusHistory.id).where(
+            WhiteboardStatusHistory.whiteboard_id == whiteboard_id,
+            WhiteboardStatusHistory.online_from.isnot(None),
+            WhiteboardStatusHistory.online_until.is_(None)
+        ).limit(1)
+    ).first()
+    if existing:
+        return
+
+    db.session.add(WhiteboardStatusHistory(
+        whiteboard_id=whiteboard_id,
+        is_online=True,
+        recorded_at=online_from,
+        online_from=online_from
+    ))
+
+def close_online_interval(whiteboard_id, online_until=None):
+    """白板离线时结束其未结束的在线区间"""
+    db.session.execute(
+        update(WhiteboardStatusHistory)
+        .where(
+            WhiteboardStatusHistory.whiteboard_id == whiteboard_id,
+            WhiteboardStatusHistory.online_from.isnot(None),
+            WhiteboardStatusHistory.online_until.is_(None)
+        )
+        .values(is_online=False, online_until=online_until or get_china_time())
+    )
+
+def close_online_intervals(whiteboard_ids):
+    """批量结束多块白板的在线区间，结束时间取各白板数据库中的 last_heartbeat"""
+    last_heartbeat = (
+        select(Whiteboard.last_heartbeat)
+        .where(Whiteboard.id == WhiteboardStatusHistory.whiteboard_id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(WhiteboardStatusHistory)
+        .where(
+            WhiteboardStatusHistory.whiteboard_id.in_(whiteboard_ids),
+            WhiteboardStatusHistory.online_from.isnot(None),
+            WhiteboardStatusHistory.online_until.is_(None)
+        )
+        .values(is_online=False, online_until=db.func.coalesce(last_heartbeat, get_china_time()))
+    )
+
+def get_online_intervals(whiteboard_id, start, end):
+    """查询与 [start, end) 有交集的在线区间，返回 (online_from, online_until) 列表"""
+    rows = db.session.execute(
+        select(WhiteboardStatusHistory.online_from, WhiteboardStatusHistory.online_until)
+        .where(
+            WhiteboardStatusHistory.whiteboard_id == whiteboard_id,
+            WhiteboardStatusHistory.online_from < end,
+            db.or_(
+                WhiteboardStatusHistory.online_until.is_(None),
+                WhiteboardStatusHistory.online_until > start
+            )
+        )
+        .order_by(WhiteboardStatusHistory.online_from)
+    ).all()
+    return [(online_from, online_until) for online_from, online_until in rows]
+
+def get_uptime_seconds(whiteboard_id, start, end, intervals=None):
+    """统计白板在 [start, end) 内的在线秒数，intervals 为已查询的 get_online_intervals 结果"""
+    if intervals is None:
+        intervals = get_online_intervals(whiteboard_id, start, end)
+    now = get_china_time()
+    total = 0
+    for online_from, online_until in intervals:
+        interval_start = max(online_from, start)
+        interval_end = min(online_until or now, end)
+        if interval_end > interval_start:
+            total += (interval_end - interval_start).total_seconds()
+    return total
+
+def _build_intervals(points, gap_seconds, still_online):
+    """把按时间排序的 (is_online, recorded_at) 点记录合并为 (online_from, online_until) 区间"""
+    intervals = []
+    start = last = None
+    for is_online, recorded_at in points:
+        if is_online:
+            if start is None:
+                start = recorded_at
+            elif (recorded_at - last).total_seconds() > gap_seconds:
+                # 两次心跳间隔过长，说明中间掉线过
+                intervals.append((start, last))
+                start = recorded_at
+            last = recorded_at
+        elif start is not None:
+            intervals.append((start, recorded_at))
+            start = last = None
+
+    if start is not None:
+        # 当前仍在线的白板保留一个未结束的区间
+        intervals.append((start, None if still_online else last))
+    return intervals
+
+def compact_status_history(gap_seconds=None, logger=None):
+    """一次性任务：把旧的逐条心跳记录改写为在线区间，返回 (删除的旧记录数, 生成的区间数)"""
+    if gap_seconds is None:
+        from flask import current_app
+        gap_seconds = current_app.config.get('WHITEBOARD_OFFLINE_TIMEOUT', 30)
+
+    whiteboard_ids = db.session.execute(
+        select(WhiteboardStatusHistory.whiteboard_id)
+        .where(WhiteboardStatusHistory.online_from.is_(None))
+        .distinct()
+    ).scalars().all()
+
+    removed_total = 0
+    created_total = 0
+    for whiteboard_id in whiteboard_ids:
+        legacy_filter = (
+            WhiteboardStatusHistory.whiteboard_id == whiteboard_id,
+            WhiteboardStatusHistory.online_from.is_(None)
+        )
+        points = db.session.execute(
+            select(WhiteboardStatusHistory.is_online, WhiteboardStatusHistory.recorded_at)
+            .where(*legacy_filter, WhiteboardStatusHistory.recorded_at.isnot(None))
+            .order_by(WhiteboardStatusHistory.recorded_at, WhiteboardStatusHistory.id)
+        ).all()
+        has_open_interval = db.session.execute(
+            select(WhiteboardStatusHistory.id).where(
+                WhiteboardStatusHistory.whiteboard_id == whiteboard_id,
+                WhiteboardStatusHistory.online_from.isnot(None),
+                WhiteboardStatusHistory.online_until.is_(None)
+            ).limit(1)
+        ).first() is not None
+        still_online = not has_open_interval and bool(db.session.execute(
+            select(Whiteboard.is_online).where(Whiteboard.id == whiteboard_id)
+        ).scalar())
+
+        intervals = _build_intervals(points, gap_seconds, still_online)
+
+        removed = db.session.execute(delete(WhiteboardStatusHistory).where(*legacy_filter)).rowcount
+        if intervals:
+            db.session.execute(insert(WhiteboardStatusHistory), [{
+                'whiteboard_id': whiteboard_id,
+                'is_online': online_until is None,
+                'recorded_at': online_from,
+                'online_from': online_from,
+                'online_until': online_until
+            } for online_from, online_until in intervals])
+        db.session.commit()
+
+        removed_total += removed
+        created_total += len(intervals)
+        if logger:
+            logger(f"白板 {whiteboard_id}: {removed} 条记录合并为 {len(intervals)} 个在线区间")
+
+    return removed_total, created_total
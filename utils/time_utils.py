@@ -15,8 +15,8 @@ def format_china_time(dt):
     try:
         # 如果时间没有时区信息，假设它是北京时间
         if dt.tzinfo is None:
-            # 直接格式化，不进行时区转换
-            return dt.strftime('%Y-%m-%d %H:%M:%S')
+            # 直接格式化，不进行时区转换（isoformat 与 strftime 结果相同，但快得多）
+            return dt.isoformat(' ', 'seconds')
         else:
             # 如果有时区信息，转换为北京时间
             china_dt = dt.astimezone(china_tz)
@@ -0,0 +1,92 @@
+from sqlalchemy import select, union_all, literal, cast, null, Integer, Boolean, DateTime, String, Text
+from extensions import db
+from models.announcement import Announcement
+from models.assignment import Assignment
+from models.task import Task
+from utils.pagination import encode_cursor, decode_cursor
+
+# 类型标识，同一时间的记录按此顺序排列（任务、公告、作业）
+KIND_TASK = 0
+KIND_ANNOUNCEMENT = 1
+KIND_ASSIGNMENT = 2
+KIND_NAMES = {KIND_TASK: 'task', KIND_ANNOUNCEMENT: 'announcement', KIND_ASSIGNMENT: 'assignment'}
+
+def _null(type_):
+    return cast(null(), type_)
+
+def _columns(model, kind):
+    """各类型对齐为同一组列，列名与 board_payloads 中使用的属性名一致"""
+    is_task = model is Task
+    is_announcement = model is Announcement
+    return [
+        literal(kind, Integer).label('kind'),
+        model.id.label('id'),
+        model.title.label('title'),
+        (_null(Text) if is_announcement else model.description).label('description'),
+        (model.content if is_announcement else _null(Text)).label('content'),
+        (model.priority if is_task else _null(Integer)).label('priority'),
+        (model.action_id if is_task else _null(Integer)).label('action_id'),
+        (_null(DateTime) if is_announcement else model.due_date).label('due_date'),
+        (model.is_acknowledged if is_task else _null(Boolean)).label('is_acknowledged'),
+        (model.is_completed if is_task else _null(Boolean)).label('is_completed'),
+        (model.subject if model is not Announcement else _null(String)).label('subject'),
+        (model.is_long_term if is_announcement else _null(Boolean)).label('is_long_term'),
+        model.created_at.label('created_at'),
+    ]
+
+def _branch(model, kind, whiteboard_id, date_column, start, end, after, limit):
+    query = select(*_columns(model, kind)).where(model.whiteboard_id == whiteboard_id)
+    if start is not None:
+        query = query.where(date_column >= start, date_column < end)
+
+    if after is not None:
+        created_at, after_kind, after_id = after
+        # 把 (created_at, kind, id) 的游标条件展开到每个分支，使各分支都能走索引
+        if kind > after_kind:
+            query = query.where(model.created_at <= created_at)
+        elif kind == after_kind:
+            query = query.where(db.or_(
+                model.created_at < created_at,
+                db.and_(model.created_at == created_at, model.id < after_id)
+            ))
+        else:
+            query = query.where(model.created_at < created_at)
+
+    if limit is not None:
+        # 每个分支最多取 limit 条，合并的开销与历史总量无关
+        query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+        query = select(query.subquery())
+    return query
+
+def build_timeline_query(whiteboard_id, start=None, end=None, assignments_by_due_date=False, limit=None, after=None):
+    """构造合并时间线的 UNION ALL 查询，after 为解码后的 (created_at, kind, id)，limit 为要取的行数"""
+    branches = [
+        _branch(Task, KIND_TASK, whiteboard_id, Task.created_at, start, end, after, limit),
+        _branch(Announcement, KIND_ANNOUNCEMENT, whiteboard_id, Announcement.created_at, start, end, after, limit),
+        _branch(Assignment, KIND_ASSIGNMENT, whiteboard_id,
+                Assignment.due_date if assignments_by_due_date else Assignment.created_at,
+                start, end, after, limit),
+    ]
+    timeline = union_all(*branches).subquery('timeline')
+    query = select(timeline).order_by(timeline.c.created_at.desc(), timeline.c.kind, timeline.c.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def fetch_timeline(whiteboard_id, start=None, end=None, assignments_by_due_date=False, limit=None, after=None):
+    """用一条 UNION ALL 查询按 created_at 倒序返回任务、公告和作业，返回 (rows, next_cursor)
+
+    start/end 为日期范围；assignments_by_due_date 为真时作业按截止日期筛选。
+    rows 的 kind 列为类型标识，其余列可直接传给 board_payloads 中的序列化函数。
+    """
+    after_key = decode_cursor(after, key_count=2) if after else None
+    fetch = limit + 1 if limit is not None else None
+
+    query = build_timeline_query(whiteboard_id, start, end, assignments_by_due_date, fetch, after_key)
+    rows = db.session.execute(query).all()
+    if limit is None or len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.kind, last.id)
@@ -0,0 +1,56 @@
+import math
+import threading
+import time
+
+class TimingWheel:
+    """哈希时间轮
+
+    每个 key 只登记一个截止时间，重新登记会覆盖旧的截止时间，登记和取消都是 O(1)。
+    advance() 按流逝的时间推进指针，返回到期的 key 列表。
+    """
+
+    def __init__(self, tick=1.0, slots=512):
+        self.tick = tick
+        self._slots = [dict() for _ in range(slots)]  # key -> 到期的 tick 序号
+        self._index = {}  # key -> 所在槽位
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._current_tick = 0
+
+    def _tick_at(self, timestamp):
+        return int((timestamp - self._started_at) / self.tick)
+
+    def schedule(self, key, delay):
+        """登记（或重新登记）key 在 delay 秒后到期"""
+        expires_tick = math.ceil((time.monotonic() + delay - self._started_at) / self.tick)
+        slot = expires_tick % len(self._slots)
+        with self._lock:
+            old_slot = self._index.get(key)
+            if old_slot is not None and old_slot != slot:
+                self._slots[old_slot].pop(key, None)
+            self._slots[slot][key] = expires_tick
+            self._index[key] = slot
+
+    def cancel(self, key):
+        with self._lock:
+            slot = self._index.pop(key, None)
+            if slot is not None:
+                self._slots[slot].pop(key, None)
+
+    def advance(self):
+        """推进到当前时间，返回期间到期的 key"""
+        target_tick = self._tick_at(time.monotonic())
+        expired = []
+        with self._lock:
+            while self._current_tick < target_tick:
+                self._current_tick += 1
+                bucket = self._slots[self._current_tick % len(self._slots)]
+                for key, expires_tick in list(bucket.items()):
+                    if expires_tick <= self._current_tick:
+                        del bucket[key]
+                        self._index.pop(key, None)
+                        expired.append(key)
+        return expired
+
+    def __len__(self):
+        return len(self._index)